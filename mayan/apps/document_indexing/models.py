@@ -255,11 +255,12 @@ class IndexTemplateNode(MPTTModel):
 
     def index_document(self, document, acquire_lock=True, index_instance_node_parent=None):
         # Start transaction after the lock in case the locking backend uses
-        # the database.
+        # the database. Wait for the lock instead of retrying the whole
+        # task, indexing other documents holds it only briefly.
         try:
             if acquire_lock:
                 lock = LockingBackend.get_backend().acquire_lock(
-                    name=self.get_lock_string()
+                    blocking=True, name=self.get_lock_string()
                 )
         except LockError:
             raise
@@ -27,6 +27,7 @@ DEFAULT_DOCUMENTS_FILE_STORAGE_BACKEND = 'django.core.files.storage.FileSystemSt
 DEFAULT_DOCUMENTS_FILE_STORAGE_BACKEND_ARGUMENTS = {
     'location': os.path.join(settings.MEDIA_ROOT, 'document_file_storage')
 }
+DEFAULT_DOCUMENTS_FILE_STORAGE_DEDUPLICATION = False
 DEFAULT_DOCUMENTS_FILE_PAGE_IMAGE_CACHE_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
 DEFAULT_DOCUMENTS_FILE_PAGE_IMAGE_CACHE_STORAGE_BACKEND_ARGUMENTS = {
     'location': os.path.join(
@@ -84,6 +85,8 @@ DOCUMENT_FILE_ACTION_PAGE_CHOICES = (
     (DOCUMENT_FILE_ACTION_PAGES_APPEND, _('Append. Create a new version and append the new file pages.')),
     (DOCUMENT_FILE_ACTION_PAGES_KEEP, _('Keep. Do not create a new version and keep the current version pages.')),
 )
+DOCUMENT_FILE_DEDUPLICATION_LOCK_NAME = 'document_file_checksum_{}'
+DOCUMENT_FILE_DEDUPLICATION_LOCK_TIMEOUT = 60
 DOCUMENT_IMAGE_TASK_TIMEOUT = 120
 
 IMAGE_ERROR_NO_ACTIVE_VERSION = 'document_no_active_version'
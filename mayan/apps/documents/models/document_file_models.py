@@ -5,7 +5,7 @@ import shutil
 from django.apps import apps
 from django.db import models, transaction
 from django.urls import reverse
-from django.utils.encoding import force_text
+from django.utils.encoding import force_bytes, force_text
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 
@@ -19,18 +19,25 @@ from mayan.apps.converter.exceptions import (
 from mayan.apps.events.classes import EventManagerMethodAfter
 from mayan.apps.events.decorators import method_event
 from mayan.apps.file_caching.models import CachePartitionFile
+from mayan.apps.lock_manager.backends.base import LockingBackend
+from mayan.apps.lock_manager.exceptions import LockError
 from mayan.apps.mimetype.api import get_mimetype
 from mayan.apps.storage.classes import DefinedStorageLazy
+from mayan.apps.storage.utils import field_file_link
 
 from ..events import (
     event_document_file_created, event_document_file_deleted,
     event_document_file_downloaded, event_document_file_edited
 )
 from ..literals import (
+    DOCUMENT_FILE_DEDUPLICATION_LOCK_NAME,
+    DOCUMENT_FILE_DEDUPLICATION_LOCK_TIMEOUT,
     STORAGE_NAME_DOCUMENT_FILE_PAGE_IMAGE_CACHE, STORAGE_NAME_DOCUMENT_FILES
 )
 from ..managers import DocumentFileManager, ValidDocumentFileManager
-from ..settings import setting_hash_block_size
+from ..settings import (
+    setting_document_file_storage_deduplication, setting_hash_block_size
+)
 from ..signals import (
     signal_post_document_created, signal_post_document_file_upload
 )
@@ -127,6 +134,18 @@ class DocumentFile(
     def hash_function():
         return hashlib.sha256()
 
+    @staticmethod
+    def get_file_lock(name):
+        """
+        Return a lock that serializes the reference counting of a stored
+        file shared by deduplicated document files.
+        """
+        return LockingBackend.get_backend().acquire_lock(
+            blocking=True, name=DOCUMENT_FILE_DEDUPLICATION_LOCK_NAME.format(
+                hashlib.sha256(force_bytes(s=name)).hexdigest()
+            ), timeout=DOCUMENT_FILE_DEDUPLICATION_LOCK_TIMEOUT
+        )
+
     @classmethod
     def execute_pre_create_hooks(cls, kwargs=None):
         """
@@ -216,11 +235,27 @@ class DocumentFile(
         for page in self.pages.all():
             page.delete()
 
-        self.file.storage.delete(name=self.file.name)
+        name = self.file.name
+        storage = self.file.storage
+
         self.cache_partition.delete()
 
         result = super().delete(*args, **kwargs)
 
+        def delete_stored_file():
+            # Counted after the row of this document file is gone and
+            # while holding the lock for concurrent deletions of the other
+            # references to agree on the last one. Files deduplicated while
+            # the setting was enabled are still shared after disabling it.
+            lock = DocumentFile.get_file_lock(name=name)
+            try:
+                if not DocumentFile.objects.filter(file=name).exists():
+                    storage.delete(name=name)
+            finally:
+                lock.release()
+
+        transaction.on_commit(func=delete_stored_file)
+
         if self.document.files.count() == 0:
             self.document.is_stub = False
             self.document._event_ignore = True
@@ -228,6 +263,65 @@ class DocumentFile(
 
         return result
 
+    def file_deduplicate(self):
+        """
+        Point the document file to the stored file of an existing document
+        file with the same checksum and remove the newly stored copy.
+        Returns True if the document file was deduplicated.
+        """
+        if not self.checksum:
+            return False
+
+        queryset = DocumentFile.objects.filter(
+            checksum=self.checksum
+        ).exclude(file=self.file.name).exclude(pk=self.pk)
+
+        for name in queryset.values_list('file', flat=True).distinct():
+            try:
+                lock = DocumentFile.get_file_lock(name=name)
+            except LockError:
+                logger.debug(
+                    'Unable to lock stored file "%s" for deduplication.', name
+                )
+                continue
+
+            try:
+                # Check again while holding the lock, the other document
+                # files might have been deleted in the meantime.
+                if queryset.filter(file=name).exists() and self.file.storage.exists(name):
+                    stored_name = self.file.name
+                    DocumentFile.objects.filter(pk=self.pk).update(file=name)
+                    self.file.name = name
+                else:
+                    continue
+            finally:
+                lock.release()
+
+            logger.debug(
+                'Document file "%s" deduplicated to stored file "%s".',
+                self, name
+            )
+
+            try:
+                lock = DocumentFile.get_file_lock(name=stored_name)
+            except LockError:
+                logger.debug(
+                    'Unable to lock stored file "%s" for deletion.',
+                    stored_name
+                )
+            else:
+                try:
+                    # Another new document file might have been
+                    # deduplicated to the stored file of this one.
+                    if not DocumentFile.objects.filter(file=stored_name).exists():
+                        self.file.storage.delete(name=stored_name)
+                finally:
+                    lock.release()
+
+            return True
+
+        return False
+
     def execute_pre_save_hooks(self):
         """
         Helper method to allow checking if new files are possible from
@@ -276,6 +370,13 @@ class DocumentFile(
         # then download event in the same way.
         return self.open()
 
+    def get_file_reference_count(self):
+        """
+        Return the number of document files that use the stored file of
+        this document file.
+        """
+        return DocumentFile.objects.filter(file=self.file.name).count()
+
     def get_intermediate_file(self):
         cache_filename = 'intermediate_file'
 
@@ -417,6 +518,9 @@ class DocumentFile(
                     'user': user
                 }
             )
+            # Local files that allow it are linked into the storage instead
+            # of being copied.
+            field_file_link(field_file=self.file)
 
         try:
             with transaction.atomic():
@@ -467,6 +571,12 @@ class DocumentFile(
             raise
         else:
             if new_document_file:
+                if setting_document_file_storage_deduplication.value:
+                    # Executed after the transaction commits to allow the
+                    # reference count of the shared stored file to see this
+                    # document file.
+                    transaction.on_commit(func=self.file_deduplicate)
+
                 signal_post_document_file_upload.send(
                     sender=DocumentFile, instance=self
                 )
@@ -82,13 +82,30 @@ class DocumentFilePage(PagedModelMixin, models.Model):
             'transformations cache filename: %s', combined_cache_filename
         )
 
+        # Published cache files are complete and immutable, a hit needs no
+        # lock. The lock only coalesces the generation of a missing file.
+        try:
+            self.cache_partition.get_file(filename=combined_cache_filename)
+        except CachePartitionFile.DoesNotExist:
+            logger.debug(
+                'transformations cache file "%s" not found', combined_cache_filename
+            )
+        else:
+            logger.debug(
+                'transformations cache file "%s" found', combined_cache_filename
+            )
+            return combined_cache_filename
+
         try:
             if _acquire_lock:
                 lock_name = self.get_lock_name(
                     _combined_cache_filename=combined_cache_filename
                 )
+                # Wait for a concurrent generation of the same image to
+                # finish and use its result.
                 lock = LockingBackend.get_backend().acquire_lock(
-                    name=lock_name, timeout=DOCUMENT_IMAGE_TASK_TIMEOUT
+                    blocking=True, name=lock_name,
+                    timeout=DOCUMENT_IMAGE_TASK_TIMEOUT
                 )
         except Exception:
             raise
@@ -96,21 +113,11 @@ class DocumentFilePage(PagedModelMixin, models.Model):
             # Second try block to release the lock even on fatal errors inside
             # the block.
             try:
-                try:
-                    self.cache_partition.get_file(
-                        filename=combined_cache_filename
-                    )
-                except CachePartitionFile.DoesNotExist:
-                    logger.debug(
-                        'transformations cache file "%s" not found', combined_cache_filename
-                    )
+                # Generated by another caller while waiting for the lock.
+                if not self.cache_partition.files.filter(filename=combined_cache_filename).exists():
                     image = self.get_image(transformations=transformation_list)
                     with self.cache_partition.create_file(filename=combined_cache_filename) as file_object:
                         file_object.write(image.getvalue())
-                else:
-                    logger.debug(
-                        'transformations cache file "%s" found', combined_cache_filename
-                    )
 
                 return combined_cache_filename
             finally:
@@ -119,53 +119,47 @@ class DocumentVersionPage(
             'transformations cache filename: %s', combined_cache_filename
         )
 
-        content_object_lock_name = self.content_object.get_lock_name(user=user)
+        # Published cache files are complete and immutable, a hit needs no
+        # lock. The locks only coalesce the generation of a missing file.
         try:
-            content_object_lock = LockingBackend.get_backend().acquire_lock(
-                name=content_object_lock_name,
-                timeout=DOCUMENT_IMAGE_TASK_TIMEOUT * 2
+            self.cache_partition.get_file(filename=combined_cache_filename)
+        except CachePartitionFile.DoesNotExist:
+            logger.debug(
+                'transformations cache file "%s" not found, '
+                'generating new image', combined_cache_filename
             )
-        except Exception:
-            raise
         else:
-            lock_name = self.get_lock_name(
-                _combined_cache_filename=combined_cache_filename
+            logger.debug(
+                'transformations cache file "%s" found, '
+                'returning it to caller', combined_cache_filename
             )
-            try:
-                if _acquire_lock:
-                    lock = LockingBackend.get_backend().acquire_lock(
-                        name=lock_name, timeout=DOCUMENT_IMAGE_TASK_TIMEOUT
-                    )
-            except Exception:
-                raise
-            else:
-                # Second try block to release the lock even on fatal errors inside
-                # the block.
-                try:
-                    try:
-                        self.cache_partition.get_file(
-                            filename=combined_cache_filename
-                        )
-                    except CachePartitionFile.DoesNotExist:
-                        logger.debug(
-                            'transformations cache file "%s" not found, '
-                            'generating new image', combined_cache_filename
-                        )
-                        image = self.get_image(transformations=transformation_list)
-                        with self.cache_partition.create_file(filename=combined_cache_filename) as file_object:
-                            file_object.write(image.getvalue())
-                    else:
-                        logger.debug(
-                            'transformations cache file "%s" found, '
-                            'returning it to caller', combined_cache_filename
-                        )
-
-                    return combined_cache_filename
-                finally:
-                    if _acquire_lock:
-                        lock.release()
-            finally:
-                content_object_lock.release()
+            return combined_cache_filename
+
+        lock_names = [self.content_object.get_lock_name(user=user)]
+        if _acquire_lock:
+            lock_names.append(
+                self.get_lock_name(
+                    _combined_cache_filename=combined_cache_filename
+                )
+            )
+
+        # Acquire the lock of the content object and this page's lock
+        # together. Wait for a concurrent generation of the same image to
+        # finish and use its result.
+        lock = LockingBackend.get_backend().acquire_locks(
+            blocking=True, names=lock_names,
+            timeout=DOCUMENT_IMAGE_TASK_TIMEOUT * 2
+        )
+        try:
+            # Generated by another caller while waiting for the lock.
+            if not self.cache_partition.files.filter(filename=combined_cache_filename).exists():
+                image = self.get_image(transformations=transformation_list)
+                with self.cache_partition.create_file(filename=combined_cache_filename) as file_object:
+                    file_object.write(image.getvalue())
+
+            return combined_cache_filename
+        finally:
+            lock.release()
 
     def get_absolute_url(self):
         return reverse(
@@ -11,6 +11,7 @@ from .literals import (
     DEFAULT_DOCUMENTS_FILE_PAGE_IMAGE_CACHE_MAXIMUM_SIZE,
     DEFAULT_DOCUMENTS_FILE_STORAGE_BACKEND,
     DEFAULT_DOCUMENTS_FILE_STORAGE_BACKEND_ARGUMENTS,
+    DEFAULT_DOCUMENTS_FILE_STORAGE_DEDUPLICATION,
     DEFAULT_DOCUMENTS_HASH_BLOCK_SIZE, DEFAULT_DOCUMENTS_LIST_THUMBNAIL_WIDTH,
     DEFAULT_DOCUMENTS_PREVIEW_HEIGHT, DEFAULT_DOCUMENTS_PREVIEW_WIDTH,
     DEFAULT_DOCUMENTS_PRINT_HEIGHT, DEFAULT_DOCUMENTS_PRINT_WIDTH,
@@ -77,6 +78,15 @@ setting_document_file_storage_backend_arguments = namespace.add_setting(
         'Arguments to pass to the DOCUMENT_FILE_STORAGE_BACKEND.'
     )
 )
+setting_document_file_storage_deduplication = namespace.add_setting(
+    default=DEFAULT_DOCUMENTS_FILE_STORAGE_DEDUPLICATION,
+    global_name='DOCUMENTS_FILE_STORAGE_DEDUPLICATION', help_text=_(
+        'Store identical document files only once. New document files '
+        'whose checksum matches an existing document file will reuse the '
+        'stored file of the existing document file. The stored file is '
+        'deleted only when the last document file using it is deleted.'
+    )
+)
 setting_document_file_page_image_cache_storage_backend = namespace.add_setting(
     default=DEFAULT_DOCUMENTS_FILE_PAGE_IMAGE_CACHE_STORAGE_BACKEND,
     global_name='DOCUMENTS_FILE_PAGE_IMAGE_CACHE_STORAGE_BACKEND', help_text=_(
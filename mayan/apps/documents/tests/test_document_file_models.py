@@ -1,6 +1,10 @@
 from pathlib import Path
 
-from .base import GenericDocumentTestCase
+from ..settings import setting_document_file_storage_deduplication
+
+from .base import (
+    GenericDocumentTestCase, GenericTransactionDocumentTestCase
+)
 from .literals import TEST_SMALL_DOCUMENT_CHECKSUM
 
 
@@ -48,3 +52,63 @@ class DocumentFileTestCase(GenericDocumentTestCase):
 
     def test_method_get_absolute_url(self):
         self.assertTrue(self.test_document.file_latest.get_absolute_url())
+
+
+class DocumentFileDeduplicationTestCase(
+    GenericTransactionDocumentTestCase
+):
+    def setUp(self):
+        super().setUp()
+        setting_document_file_storage_deduplication.set(value=True)
+
+    def test_duplicate_file_shares_stored_file(self):
+        test_document_file_1 = self.test_document_file
+
+        self._upload_test_document_file()
+
+        self.assertEqual(
+            self.test_document_file.file.name, test_document_file_1.file.name
+        )
+        self.assertEqual(self.test_document_file.get_file_reference_count(), 2)
+        self.assertEqual(
+            self.test_document_file.checksum_update(save=False),
+            TEST_SMALL_DOCUMENT_CHECKSUM
+        )
+
+    def test_duplicate_file_delete_keeps_stored_file(self):
+        test_document_file_1 = self.test_document_file
+
+        self._upload_test_document_file()
+
+        test_document_file_1.delete()
+
+        self.assertTrue(self.test_document_file.exists())
+        self.assertEqual(self.test_document_file.get_file_reference_count(), 1)
+
+    def test_file_delete_without_deduplication(self):
+        setting_document_file_storage_deduplication.set(value=False)
+
+        self.test_document_file.delete()
+
+        self.assertFalse(self.test_document_file.exists())
+
+    def test_shared_file_delete_after_disabling_deduplication(self):
+        test_document_file_1 = self.test_document_file
+
+        self._upload_test_document_file()
+
+        setting_document_file_storage_deduplication.set(value=False)
+
+        test_document_file_1.delete()
+
+        self.assertTrue(self.test_document_file.exists())
+
+    def test_last_duplicate_file_delete_removes_stored_file(self):
+        test_document_file_1 = self.test_document_file
+
+        self._upload_test_document_file()
+
+        test_document_file_1.delete()
+        self.test_document_file.delete()
+
+        self.assertFalse(self.test_document_file.exists())
@@ -24,4 +24,12 @@ DJANGO_TO_WHOOSH_FIELD_MAP = {
     models.UUIDField: {'field': whoosh.fields.TEXT, 'transformation': str},
     RGBColorField: {'field': whoosh.fields.TEXT},
 }
+# Commit the changes of an index session every this many instances,
+# bytes of indexed text or seconds. The duration must stay well below the
+# timeout of the index lock.
+WHOOSH_INDEX_BATCH_COUNT = 1000
+WHOOSH_INDEX_BATCH_DURATION = 60
+WHOOSH_INDEX_BATCH_SIZE = 32 * 1024 * 1024
 WHOOSH_INDEX_DIRECTORY_NAME = 'whoosh'
+WHOOSH_INDEX_LOCK_NAME = 'dynamic_search_whoosh_index'
+WHOOSH_INDEX_LOCK_TIMEOUT = 300
@@ -1,5 +1,6 @@
 import logging
 from pathlib import Path
+import time
 
 import whoosh
 from whoosh import qparser
@@ -7,22 +8,186 @@ from whoosh.filedb.filestore import FileStorage
 from whoosh.index import EmptyIndexError
 
 from django.conf import settings
+from django.utils.encoding import force_text
 
 from mayan.apps.lock_manager.backends.base import LockingBackend
 from mayan.apps.lock_manager.exceptions import LockError
 
-from ..classes import SearchBackend, SearchField, SearchModel
+from ..classes import (
+    SearchBackend, SearchBackendIndexSession, SearchField, SearchModel
+)
 from ..settings import setting_results_limit
 
-from .literals import DJANGO_TO_WHOOSH_FIELD_MAP, WHOOSH_INDEX_DIRECTORY_NAME
+from .literals import (
+    DJANGO_TO_WHOOSH_FIELD_MAP, WHOOSH_INDEX_BATCH_COUNT,
+    WHOOSH_INDEX_BATCH_DURATION, WHOOSH_INDEX_BATCH_SIZE,
+    WHOOSH_INDEX_DIRECTORY_NAME, WHOOSH_INDEX_LOCK_NAME,
+    WHOOSH_INDEX_LOCK_TIMEOUT
+)
 logger = logging.getLogger(name=__name__)
 
 
+class WhooshSearchBackendIndexSession(SearchBackendIndexSession):
+    """
+    Keeps a writer open per search model index and commits them every
+    `batch_count` instances or `batch_size` bytes of indexed text instead
+    of once per instance. The index lock is held from the first change of
+    a batch until its commit, the changes of other processes run between
+    the batches. Batches are also committed after WHOOSH_INDEX_BATCH_DURATION
+    seconds for the lock lease not to expire while they are written.
+    """
+    def __init__(self, batch_count=None, batch_size=None, **kwargs):
+        super().__init__(**kwargs)
+        self.batch_count = batch_count or self.search_backend.batch_count
+        self.batch_size = batch_size or self.search_backend.batch_size
+        self._lock = None
+        self._lock_timestamp = None
+        self._reset()
+
+    def _acquire_lock(self):
+        if not self._lock:
+            self._lock = LockingBackend.get_backend().acquire_lock(
+                blocking=True, name=WHOOSH_INDEX_LOCK_NAME,
+                timeout=WHOOSH_INDEX_LOCK_TIMEOUT
+            )
+            self._lock_timestamp = time.monotonic()
+
+    def _add_change(self, size):
+        self._change_count += 1
+        self._change_size += size
+
+        if self._change_count >= self.batch_count or self._change_size >= self.batch_size:
+            self.commit()
+        elif self._lock and time.monotonic() - self._lock_timestamp >= WHOOSH_INDEX_BATCH_DURATION:
+            self.commit()
+
+    def _get_writer(self, search_model, instance):
+        # The deletions of a writer do not see the documents it added,
+        # commit before changing the same instance twice.
+        key = (search_model, instance.pk)
+        if key in self._changed_keys:
+            self.commit()
+
+        self._changed_keys.add(key)
+
+        try:
+            return self._writers[search_model]
+        except KeyError:
+            self._acquire_lock()
+            try:
+                writer = self.search_backend.get_index(
+                    search_model=search_model
+                ).writer()
+            except whoosh.index.LockError as exception:
+                # The index is still being written by a process whose lock
+                # lease expired. Raised as a lock error for the tasks to
+                # retry.
+                raise LockError(
+                    'Unable to open the index writer of search model '
+                    '"{}"; {}'.format(search_model.get_full_name(), exception)
+                ) from exception
+
+            self._writers[search_model] = writer
+            return writer
+
+    def _reset(self):
+        if self._lock:
+            self._lock.release()
+            self._lock = None
+            self._lock_timestamp = None
+
+        self._change_count = 0
+        self._change_size = 0
+        self._changed_keys = set()
+        self._writers = {}
+
+    def cancel(self):
+        try:
+            for writer in self._writers.values():
+                writer.cancel()
+        finally:
+            self._reset()
+
+    def clear_search_model_index(self, search_model):
+        self.commit()
+        self._acquire_lock()
+
+        try:
+            index = self.search_backend.get_index(search_model=search_model)
+            self.search_backend.get_storage().create_index(
+                index.schema, indexname=search_model.get_full_name()
+            )
+        finally:
+            self._reset()
+
+    def commit(self):
+        writers = list(self._writers.values())
+
+        try:
+            while writers:
+                writers.pop(0).commit()
+        except Exception:
+            # Release the index locks of the writers left.
+            for writer in writers:
+                writer.cancel()
+            raise
+        finally:
+            self._reset()
+
+    def deindex_instance(self, instance):
+        search_model = SearchModel.get_for_model(instance=instance)
+
+        writer = self._get_writer(instance=instance, search_model=search_model)
+        writer.delete_by_term('id', str(instance.pk))
+
+        self._add_change(size=0)
+
+    def index_instance(self, instance):
+        try:
+            search_model = SearchModel.get_for_model(instance=instance)
+        except KeyError:
+            """
+            A KeyError is not fatal. It means search is not configured
+            for this instance.
+            """
+            return
+
+        field_map = self.search_backend.get_resolved_field_map(
+            search_model=search_model
+        )
+        kwargs = search_model.sieve(field_map=field_map, instance=instance)
+
+        writer = self._get_writer(instance=instance, search_model=search_model)
+        writer.delete_by_term('id', str(instance.pk))
+        try:
+            writer.add_document(**kwargs)
+        except Exception as exception:
+            logger.error(
+                'Unexpected exception while indexing object id: %s, '
+                'search model: %s, index data: %s, raw data: %s, '
+                'field map: %s; %s', instance.pk, search_model.get_full_name(),
+                kwargs, instance.__dict__, field_map, exception,
+                exc_info=True
+            )
+            raise
+
+        self._add_change(
+            size=sum(len(force_text(s=value)) for value in kwargs.values())
+        )
+
+
 class WhooshSearchBackend(SearchBackend):
     _resolved_field_maps = {}
+    index_session_class = WhooshSearchBackendIndexSession
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.batch_count = self.kwargs.get(
+            'batch_count', WHOOSH_INDEX_BATCH_COUNT
+        )
+        self.batch_size = self.kwargs.get(
+            'batch_size', WHOOSH_INDEX_BATCH_SIZE
+        )
         self.index_path = Path(
             self.kwargs.get(
                 'index_path', Path(settings.MEDIA_ROOT, WHOOSH_INDEX_DIRECTORY_NAME)
@@ -77,30 +242,12 @@ class WhooshSearchBackend(SearchBackend):
         return SearchBackend.limit_queryset(queryset=queryset)
 
     def clear_search_model_index(self, search_model):
-        index = self.get_index(search_model=search_model)
-
-        # Clear the model index
-        self.get_storage().create_index(
-            index.schema, indexname=search_model.get_full_name()
-        )
+        with self.get_index_session() as index_session:
+            index_session.clear_search_model_index(search_model=search_model)
 
     def deindex_instance(self, instance):
-        try:
-            lock = LockingBackend.get_backend().acquire_lock(
-                name='dynamic_search_whoosh_deindex_instance'
-            )
-        except LockError:
-            raise
-        else:
-            try:
-                search_model = SearchModel.get_for_model(instance=instance)
-                index = self.get_index(search_model=search_model)
-
-                writer = index.writer()
-                writer.delete_by_term('id', str(instance.pk))
-                writer.commit()
-            finally:
-                lock.release()
+        with self.get_index_session() as index_session:
+            index_session.deindex_instance(instance=instance)
 
     def get_index(self, search_model):
         storage = self.get_storage()
@@ -118,6 +265,14 @@ class WhooshSearchBackend(SearchBackend):
 
         return index
 
+    def get_indexed_id_list(self, search_model):
+        index = self.get_index(search_model=search_model)
+
+        with index.reader() as reader:
+            return [
+                fields['id'] for fields in reader.all_stored_fields()
+            ]
+
     def get_resolved_field_map(self, search_model):
         if search_model not in self._resolved_field_maps:
 
@@ -154,95 +309,6 @@ class WhooshSearchBackend(SearchBackend):
     def get_storage(self):
         return FileStorage(path=self.index_path)
 
-    def index_instance(self, instance, exclude_set=None):
-        try:
-            lock = LockingBackend.get_backend().acquire_lock(
-                name='dynamic_search_whoosh_index_instance'
-            )
-        except LockError:
-            raise
-        else:
-            try:
-                # Use a private method to allow using a single lock for
-                # all recursions.
-                self._index_instance(
-                    instance=instance, exclude_set=exclude_set
-                )
-            finally:
-                lock.release()
-
-    def _index_instance(self, instance, exclude_set=None):
-        if not exclude_set:
-            exclude_set = set()
-
-        # Avoid infinite recursion.
-        if instance in exclude_set:
-            return
-
-        exclude_set.add(instance)
-
-        try:
-            search_model = SearchModel.get_for_model(instance=instance)
-        except KeyError:
-            """
-            A KeyError is not fatal. It means search is not configured
-            for this instance but we still need to check if one of its
-            field's related models are configure for search and need
-            to be updated.
-            """
-        else:
-            index = self.get_index(search_model=search_model)
-
-            writer = index.writer()
-            kwargs = search_model.sieve(
-                field_map=self.get_resolved_field_map(search_model=search_model), instance=instance
-            )
-            writer.delete_by_term('id', str(instance.pk))
-            try:
-                writer.add_document(**kwargs)
-                writer.commit()
-            except Exception as exception:
-                logger.error(
-                    'Unexpected exception while indexing object id: %s, '
-                    'search model: %s, index data: %s, raw data: %s, '
-                    'field map: %s; %s', search_model.get_full_name(),
-                    instance.pk, kwargs, instance.__dict__,
-                    self.get_resolved_field_map(search_model=search_model),
-                    exception, exc_info=True
-                )
-                raise
-
-        for field_class in instance._meta.get_fields():
-            # Only to recursive indexing for related models that are
-            # known to have a search configuration.
-            if field_class.related_model and field_class.related_model in SearchModel._model_search_relationships.get(instance._meta.model, ()):
-                field_instance = getattr(instance, field_class.name, None)
-
-                if field_instance:
-                    try:
-                        # Try as a many field.
-                        results = field_instance.all()
-                    except AttributeError:
-                        # Try as a one to one field.
-                        try:
-                            results = [field_instance.get()]
-                        except AttributeError:
-                            # It is neither then it must be a
-                            # foreign key.
-                            results = [field_instance]
-
-                    for instance in results:
-                        self._index_instance(
-                            instance=instance, exclude_set=exclude_set
-                        )
-
-    def index_search_model(self, search_model):
-        index = self.get_index(search_model=search_model)
-
-        # Clear the model index
-        self.get_storage().create_index(
-            index.schema, indexname=search_model.get_full_name()
-        )
-
-        for instance in search_model.model._meta.default_manager.all():
-            self.index_instance(instance=instance)
+    def index_instance(self, instance):
+        with self.get_index_session() as index_session:
+            index_session.index_instance(instance=instance)
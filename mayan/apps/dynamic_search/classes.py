@@ -2,7 +2,8 @@ from collections import Iterable
 import logging
 
 from django.apps import apps
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.signals import post_save, pre_delete, pre_save
 from django.utils.encoding import force_text
 from django.utils.functional import cached_property
 from django.utils.module_loading import import_string
@@ -17,8 +18,8 @@ from mayan.apps.views.literals import LIST_MODE_CHOICE_LIST
 
 from .exceptions import DynamicSearchException
 from .literals import (
-    DEFAULT_SCOPE_OPERATOR, DELIMITER, SCOPE_DELIMITER,
-    SCOPE_OPERATOR_CHOICES
+    DEFAULT_SCOPE_OPERATOR, DELIMITER, INDEX_STALE_ID_BATCH_SIZE,
+    SCOPE_DELIMITER, SCOPE_OPERATOR_CHOICES
 )
 from .settings import (
     setting_backend, setting_backend_arguments,
@@ -27,7 +28,49 @@ from .settings import (
 logger = logging.getLogger(name=__name__)
 
 
+class SearchBackendIndexSession:
+    """
+    Context manager to index or remove many instances with the same
+    search backend. Backends able to batch their changes subclass it,
+    this default passes each change to the backend as it happens. The
+    pending changes are committed when the session ends and canceled if
+    it ends with an exception.
+    """
+    def __init__(self, search_backend):
+        self.search_backend = search_backend
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.cancel()
+
+    def cancel(self):
+        """
+        Discard the changes not committed yet.
+        """
+
+    def clear_search_model_index(self, search_model):
+        self.search_backend.clear_search_model_index(search_model=search_model)
+
+    def commit(self):
+        """
+        Make the pending changes visible to the searches.
+        """
+
+    def deindex_instance(self, instance):
+        self.search_backend.deindex_instance(instance=instance)
+
+    def index_instance(self, instance):
+        self.search_backend.index_instance(instance=instance)
+
+
 class SearchBackend:
+    index_session_class = SearchBackendIndexSession
+
     @staticmethod
     def get_instance():
         return import_string(dotted_path=setting_backend.value)(
@@ -45,12 +88,63 @@ class SearchBackend:
     def _search(self, global_and_search, search_model, query_string, user):
         raise NotImplementedError
 
+    def clear_search_model_index(self, search_model):
+        """
+        Optional method for subclasses to overload.
+        """
+
     def deindex_instance(self, instance):
         raise NotImplementedError
 
+    def get_index_session(self, **kwargs):
+        """
+        Return a session to index or remove many instances at once.
+        """
+        return self.index_session_class(search_backend=self, **kwargs)
+
     def index_instance(self, instance):
         raise NotImplementedError
 
+    def get_indexed_id_list(self, search_model):
+        """
+        Optional method for subclasses to overload. Return the primary
+        keys of the instances present in the index of the search model.
+        """
+        return ()
+
+    def index_search_model(self, search_model):
+        """
+        Index all the instances of the search model in place and remove
+        the entries of the instances that no longer exist, in a single
+        session. The index is never emptied, searches keep returning the
+        existing entries while it is updated.
+        """
+        manager = search_model.model._meta.default_manager
+
+        with self.get_index_session() as index_session:
+            for instance in manager.iterator():
+                index_session.index_instance(instance=instance)
+
+            id_list = list(
+                map(str, self.get_indexed_id_list(search_model=search_model))
+            )
+
+            for index in range(0, len(id_list), INDEX_STALE_ID_BATCH_SIZE):
+                batch = id_list[index:index + INDEX_STALE_ID_BATCH_SIZE]
+                existing_id_list = set(
+                    map(
+                        str, manager.filter(pk__in=batch).values_list(
+                            'pk', flat=True
+                        )
+                    )
+                )
+
+                for pk in batch:
+                    if pk not in existing_id_list:
+                        index_session.deindex_instance(
+                            instance=search_model.model(pk=pk)
+                        )
+
     def search(
         self, search_model, query_string, user, global_and_search=False
     ):
@@ -193,9 +287,71 @@ class SearchField:
         return self._label or self.get_model_field().verbose_name
 
 
+class SearchModelDependency:
+    """
+    The instances of `search_model` index the fields `field_names` of the
+    instances of `model` found following `lookup`. A change to these
+    fields requires reindexing the instances of the search model that
+    `lookup` matches.
+    """
+    def __init__(self, lookup, model, search_model):
+        self.field_names = set()
+        self.lookup = lookup
+        self.model = model
+        self.search_model = search_model
+
+    def __repr__(self):
+        return '<{}: {} {}>'.format(
+            self.__class__.__name__, self.search_model.get_full_name(),
+            self.lookup
+        )
+
+    def get_attnames(self):
+        """
+        Return the attribute names holding the values of the fields or
+        None if a field has no value that can be compared.
+        """
+        result = set()
+
+        for field_name in self.field_names:
+            field = self.model._meta.get_field(field_name=field_name)
+            if not field.concrete or field.many_to_many:
+                return None
+
+            result.add(field.attname)
+
+        return result
+
+    def get_dependent_queryset(self, object_id):
+        return self.search_model.model._meta.default_manager.filter(
+            **{self.lookup: object_id}
+        )
+
+    def is_changed(self, instance, previous_values, update_fields=None):
+        """
+        Tell if saving `instance` can change the indexed values of the
+        dependent instances. `previous_values` are the values of the
+        attributes before saving, None when unknown.
+        """
+        attnames = self.get_attnames()
+
+        if update_fields is not None:
+            if attnames and not (attnames | self.field_names) & set(update_fields):
+                return False
+
+        if attnames is None or previous_values is None:
+            return True
+
+        for attname in attnames:
+            if previous_values[attname] != getattr(instance, attname):
+                return True
+
+        return False
+
+
 class SearchModel(AppsModuleLoaderMixin):
     _loader_module_name = 'search'
-    _model_search_relationships = {}
+    _model_search_dependencies = {}
     _registry = {}
 
     @staticmethod
@@ -213,11 +369,20 @@ class SearchModel(AppsModuleLoaderMixin):
     def function_return_same(value):
         return value
 
+    @classmethod
+    def get_dependencies(cls, model):
+        """
+        Return the dependencies of the search models on the fields of
+        `model`.
+        """
+        return cls._model_search_dependencies.get(model, {}).values()
+
     @staticmethod
     def initialize():
         # Hide a circular import
         from .handlers import (
-            handler_factory_deindex_instance, handler_index_instance
+            handler_factory_deindex_instance, handler_index_dependents,
+            handler_index_instance, handler_load_dependency_values
         )
 
         for search_model in SearchModel.all():
@@ -247,6 +412,18 @@ class SearchModel(AppsModuleLoaderMixin):
 
             search_model._initialize()
 
+        for model in SearchModel._model_search_dependencies:
+            pre_save.connect(
+                dispatch_uid='search_handler_load_dependency_values_{}'.format(model._meta.label),
+                receiver=handler_load_dependency_values,
+                sender=model
+            )
+            post_save.connect(
+                dispatch_uid='search_handler_index_dependents_{}'.format(model._meta.label),
+                receiver=handler_index_dependents,
+                sender=model
+            )
+
     @classmethod
     def all(cls):
         return sorted(
@@ -309,24 +486,23 @@ class SearchModel(AppsModuleLoaderMixin):
 
     def _initialize(self):
         for search_field in self.search_fields:
-            related_model = get_related_field(
-                model=self.model, related_field_name=search_field.field
-            ).model
+            field_names = search_field.field.split(LOOKUP_SEP)
 
-            if related_model != self.model:
-                self.__class__._model_search_relationships.setdefault(
-                    self.model, set()
-                )
-                self.__class__._model_search_relationships[self.model].add(
-                    related_model
-                )
+            if len(field_names) > 1:
+                related_model = get_related_field(
+                    model=self.model, related_field_name=search_field.field
+                ).model
+                lookup = LOOKUP_SEP.join(field_names[:-1])
 
-                self.__class__._model_search_relationships.setdefault(
-                    related_model, set()
+                dependencies = self.__class__._model_search_dependencies.setdefault(
+                    related_model, {}
                 )
-                self.__class__._model_search_relationships[related_model].add(
-                    self.model
+                dependency = dependencies.setdefault(
+                    (self, lookup), SearchModelDependency(
+                        lookup=lookup, model=related_model, search_model=self
+                    )
                 )
+                dependency.field_names.add(field_names[-1])
 
     def add_model_field(self, *args, **kwargs):
         """
@@ -1,4 +1,50 @@
-from .tasks import task_deindex_instance, task_index_instance
+from django.db import transaction
+
+from mayan.apps.lock_manager.backends.base import LockingBackend
+from mayan.apps.lock_manager.exceptions import LockError
+
+from .classes import SearchModel
+from .literals import (
+    INDEX_DEPENDENTS_PENDING_LOCK_NAME, INDEX_UPDATE_PENDING_LOCK_NAME,
+    INDEX_UPDATE_PENDING_MARGIN
+)
+from .settings import setting_index_update_delay
+from .tasks import (
+    task_deindex_instance, task_index_instance, task_index_instance_dependents
+)
+
+
+def _queue_coalesced_task(task, lock_name, kwargs):
+    """
+    Queue the task delayed by SEARCH_INDEX_UPDATE_DELAY seconds unless one
+    is already pending for `lock_name`. The pending tasks are locks that
+    expire before their task is due, the task reads the objects when it
+    runs and so includes all the changes made while the lock was held.
+    """
+    delay = setting_index_update_delay.value
+
+    # Delayed execution is needed to coalesce the tasks.
+    if delay and not task.app.conf.task_always_eager:
+        def queue_task():
+            try:
+                # The pending locks are expected to be found held and are
+                # not measured.
+                LockingBackend.get_backend().acquire_lock(
+                    name=lock_name, statistics=False, timeout=delay
+                )
+            except LockError:
+                return
+
+            task.apply_async(
+                countdown=delay + INDEX_UPDATE_PENDING_MARGIN, kwargs=kwargs
+            )
+
+        # Acquired after the transaction of the caller, if any, for the
+        # backends with transaction scoped locks to hold the pending lock
+        # in the session scope, until it expires.
+        transaction.on_commit(func=queue_task)
+    else:
+        task.apply_async(kwargs=kwargs)
 
 
 def handler_factory_deindex_instance(search_model):
@@ -17,13 +63,63 @@ def handler_factory_deindex_instance(search_model):
     return handler_deindex_instance
 
 
+def handler_index_dependents(sender, **kwargs):
+    """
+    Queue the reindex of the instances of the search models that include
+    the values of the saved instance, only for the search models whose
+    indexed fields changed.
+    """
+    if kwargs.get('raw'):
+        return
+
+    instance = kwargs['instance']
+    previous_values = instance.__dict__.pop(
+        '_search_dependency_values', None
+    )
+
+    for dependency in SearchModel.get_dependencies(model=sender):
+        if dependency.is_changed(instance=instance, previous_values=previous_values, update_fields=kwargs['update_fields']):
+            _queue_coalesced_task(
+                kwargs={
+                    'lookup': dependency.lookup, 'object_id': instance.pk,
+                    'search_model_full_name': dependency.search_model.get_full_name()
+                }, lock_name=INDEX_DEPENDENTS_PENDING_LOCK_NAME.format(
+                    instance._meta.label_lower, instance.pk,
+                    dependency.search_model.get_full_name(),
+                    dependency.lookup
+                ), task=task_index_instance_dependents
+            )
+
+
 def handler_index_instance(sender, **kwargs):
     instance = kwargs['instance']
 
-    task_index_instance.apply_async(
+    _queue_coalesced_task(
         kwargs={
             'app_label': instance._meta.app_label,
             'model_name': instance._meta.model_name,
             'object_id': instance.pk
-        }
+        }, lock_name=INDEX_UPDATE_PENDING_LOCK_NAME.format(
+            instance._meta.app_label, instance._meta.model_name, instance.pk
+        ), task=task_index_instance
     )
+
+
+def handler_load_dependency_values(sender, **kwargs):
+    """
+    Keep the values of the fields indexed by other search models before
+    they are saved, to compare them after the save.
+    """
+    instance = kwargs['instance']
+
+    if kwargs.get('raw') or instance._state.adding:
+        return
+
+    attnames = set()
+    for dependency in SearchModel.get_dependencies(model=sender):
+        attnames.update(dependency.get_attnames() or ())
+
+    if attnames:
+        instance._search_dependency_values = sender._base_manager.filter(
+            pk=instance.pk
+        ).values(*attnames).first()
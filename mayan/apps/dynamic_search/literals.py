@@ -4,11 +4,26 @@ DEFAULT_RESULTS_LIMIT = 100
 DEFAULT_SEARCH_BACKEND = 'mayan.apps.dynamic_search.backends.django.DjangoSearchBackend'
 DEFAULT_SEARCH_BACKEND_ARGUMENTS = {}
 DEFAULT_SEARCH_DISABLE_SIMPLE_SEARCH = False
+DEFAULT_SEARCH_INDEX_DEPENDENTS_PAGE_DELAY = 1
+DEFAULT_SEARCH_INDEX_DEPENDENTS_PAGE_SIZE = 500
+DEFAULT_SEARCH_INDEX_UPDATE_DELAY = 5
 DEFAULT_SEARCH_MATCH_ALL_DEFAULT_VALUE = 'false'
 DEFAULT_SEARCH_RESULTS_LIMIT = 100
 
 DELIMITER = '_'
 
+# Held while an index update of the instance or of its dependents is
+# queued.
+INDEX_DEPENDENTS_PENDING_LOCK_NAME = 'dynamic_search_index_dependents_pending_{}_{}_{}_{}'
+INDEX_UPDATE_PENDING_LOCK_NAME = 'dynamic_search_index_update_pending_{}.{}_{}'
+# Seconds between the expiration of the pending lock and the execution of
+# its task. Changes made once the lock expired queue a new task instead
+# of relying on a task that might have read the objects already.
+INDEX_UPDATE_PENDING_MARGIN = 1
+# Number of indexed primary keys checked per query for instances deleted
+# when indexing a whole search model.
+INDEX_STALE_ID_BATCH_SIZE = 1000
+
 SEARCH_MODEL_NAME_KWARG = 'search_model_name'
 TASK_RETRY_DELAY = 5
 
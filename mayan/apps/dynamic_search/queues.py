@@ -13,6 +13,13 @@ queue_search.add_task_type(
     label=_('Remove a model instance from the search engine.'),
     name='task_deindex_instance',
 )
+queue_search.add_task_type(
+    dotted_path='mayan.apps.dynamic_search.tasks.task_index_instance_dependents',
+    label=_(
+        'Index a page of the model instances that include the values of '
+        'a changed instance.'
+    ), name='task_index_instance_dependents',
+)
 queue_search.add_task_type(
     dotted_path='mayan.apps.dynamic_search.tasks.task_index_instance',
     label=_('Index a model instance to the search engine.'),
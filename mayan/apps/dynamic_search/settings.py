@@ -5,6 +5,9 @@ from mayan.apps.smart_settings.classes import SettingNamespace
 from .literals import (
     DEFAULT_SEARCH_BACKEND, DEFAULT_SEARCH_BACKEND_ARGUMENTS,
     DEFAULT_SEARCH_DISABLE_SIMPLE_SEARCH,
+    DEFAULT_SEARCH_INDEX_DEPENDENTS_PAGE_DELAY,
+    DEFAULT_SEARCH_INDEX_DEPENDENTS_PAGE_SIZE,
+    DEFAULT_SEARCH_INDEX_UPDATE_DELAY,
     DEFAULT_SEARCH_MATCH_ALL_DEFAULT_VALUE, DEFAULT_SEARCH_RESULTS_LIMIT
 )
 
@@ -27,6 +30,30 @@ setting_disable_simple_search = namespace.add_setting(
         'search button.'
     )
 )
+setting_index_dependents_page_delay = namespace.add_setting(
+    default=DEFAULT_SEARCH_INDEX_DEPENDENTS_PAGE_DELAY,
+    global_name='SEARCH_INDEX_DEPENDENTS_PAGE_DELAY', help_text=_(
+        'Time in seconds to wait between the pages of objects reindexed '
+        'after a change to an object they include in their search data, '
+        'like the documents of a document type.'
+    )
+)
+setting_index_dependents_page_size = namespace.add_setting(
+    default=DEFAULT_SEARCH_INDEX_DEPENDENTS_PAGE_SIZE,
+    global_name='SEARCH_INDEX_DEPENDENTS_PAGE_SIZE', help_text=_(
+        'Number of objects reindexed per page after a change to an object '
+        'they include in their search data.'
+    )
+)
+setting_index_update_delay = namespace.add_setting(
+    default=DEFAULT_SEARCH_INDEX_UPDATE_DELAY,
+    global_name='SEARCH_INDEX_UPDATE_DELAY', help_text=_(
+        'Time in seconds to wait before updating the search index after a '
+        'change to an object. Further changes to the same object during '
+        'this time are included in the same update. Use 0 to update the '
+        'index after every change.'
+    )
+)
 setting_match_all_default_value = namespace.add_setting(
     global_name='SEARCH_MATCH_ALL_DEFAULT_VALUE',
     default=DEFAULT_SEARCH_MATCH_ALL_DEFAULT_VALUE,
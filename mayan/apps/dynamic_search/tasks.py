@@ -7,6 +7,9 @@ from mayan.celery import app
 
 from .classes import SearchBackend, SearchModel
 from .literals import TASK_RETRY_DELAY
+from .settings import (
+    setting_index_dependents_page_delay, setting_index_dependents_page_size
+)
 
 logger = logging.getLogger(name=__name__)
 
@@ -34,16 +37,18 @@ def task_deindex_instance(self, app_label, model_name, object_id):
     ignore_result=True
 )
 def task_index_search_model(self, search_model_full_name):
+    logger.info('Executing')
+
     search_model = SearchModel.get(name=search_model_full_name)
 
-    for instance in search_model.model._meta.default_manager.all():
-        task_index_instance.apply_async(
-            kwargs={
-                'app_label': instance._meta.app_label,
-                'model_name': instance._meta.model_name,
-                'object_id': instance.pk
-            }
+    try:
+        SearchBackend.get_instance().index_search_model(
+            search_model=search_model
         )
+    except LockError as exception:
+        raise self.retry(exc=exception)
+
+    logger.info('Finished')
 
 
 @app.task(
@@ -75,3 +80,48 @@ def task_index_instance(self, app_label, model_name, object_id):
                 raise self.retry(exc=exception)
 
     logger.info('Finished')
+
+
+@app.task(
+    bind=True, default_retry_delay=TASK_RETRY_DELAY, max_retries=None,
+    ignore_result=True
+)
+def task_index_instance_dependents(
+    self, search_model_full_name, lookup, object_id, pk_after=None
+):
+    """
+    Reindex a page of the instances of the search model that `lookup`
+    matches to the changed object and queue the next page.
+    """
+    logger.info('Executing')
+
+    search_model = SearchModel.get(name=search_model_full_name)
+    page_size = setting_index_dependents_page_size.value
+
+    queryset = search_model.model._meta.default_manager.filter(
+        **{lookup: object_id}
+    )
+    if pk_after is not None:
+        queryset = queryset.filter(pk__gt=pk_after)
+
+    id_list = list(
+        queryset.order_by('pk').values_list('pk', flat=True).distinct()[:page_size]
+    )
+
+    try:
+        with SearchBackend.get_instance().get_index_session() as index_session:
+            for instance in search_model.model._meta.default_manager.filter(pk__in=id_list):
+                index_session.index_instance(instance=instance)
+    except LockError as exception:
+        raise self.retry(exc=exception)
+
+    if len(id_list) == page_size:
+        task_index_instance_dependents.apply_async(
+            countdown=setting_index_dependents_page_delay.value, kwargs={
+                'lookup': lookup, 'object_id': object_id,
+                'pk_after': id_list[-1],
+                'search_model_full_name': search_model_full_name
+            }
+        )
+
+    logger.info('Finished')
@@ -1,14 +1,20 @@
+import mock
+
 from django.test import override_settings
 from django.utils.encoding import force_text
 
 from mayan.apps.documents.permissions import permission_document_view
 from mayan.apps.documents.search import document_search
 from mayan.apps.documents.tests.mixins.document_mixins import DocumentTestMixin
+from mayan.apps.lock_manager.exceptions import LockError
 from mayan.apps.storage.utils import fs_cleanup, mkdtemp
 from mayan.apps.testing.tests.base import BaseTestCase
 
 from ..classes import SearchBackend
-from ..settings import setting_backend_arguments
+from ..settings import (
+    setting_backend_arguments, setting_index_dependents_page_size
+)
+from ..tasks import task_index_instance_dependents
 
 
 @override_settings(SEARCH_BACKEND='mayan.apps.dynamic_search.backends.django.DjangoSearchBackend')
@@ -348,3 +354,117 @@ class WhooshSearchBackendDocumentSearchTestCase(
             user=self._test_case_user
         )
         self.assertEqual(queryset.count(), 1)
+
+    def test_index_search_model(self):
+        self._upload_test_document(label='first_doc')
+        self._upload_test_document(label='second_doc')
+        self.grant_access(
+            obj=self.test_documents[0], permission=permission_document_view
+        )
+        self.grant_access(
+            obj=self.test_documents[1], permission=permission_document_view
+        )
+
+        self.search_backend.clear_search_model_index(
+            search_model=document_search
+        )
+        self.search_backend.index_search_model(search_model=document_search)
+
+        queryset = self.search_backend.search(
+            search_model=document_search,
+            query_string={'q': 'first* OR second*'}, user=self._test_case_user
+        )
+        self.assertEqual(queryset.count(), 2)
+
+    def test_index_search_model_deleted_instance(self):
+        self._upload_test_document(label='first_doc')
+        self.search_backend.clear_search_model_index(
+            search_model=document_search
+        )
+
+        test_deleted_document = document_search.model._meta.default_manager.get(
+            pk=self.test_document.pk
+        )
+        test_deleted_document.pk = self.test_document.pk + 1000
+        self.search_backend.index_instance(instance=test_deleted_document)
+
+        self.search_backend.index_search_model(search_model=document_search)
+
+        self.assertEqual(
+            self.search_backend.get_indexed_id_list(
+                search_model=document_search
+            ), [str(self.test_document.pk)]
+        )
+
+    def test_index_session_batch_commit(self):
+        self._upload_test_document(label='first_doc')
+        self._upload_test_document(label='second_doc')
+        self.search_backend.clear_search_model_index(
+            search_model=document_search
+        )
+        index = self.search_backend.get_index(search_model=document_search)
+
+        with self.search_backend.get_index_session(batch_count=2) as index_session:
+            index_session.index_instance(instance=self.test_documents[0])
+            self.assertEqual(index.refresh().doc_count(), 0)
+
+            index_session.index_instance(instance=self.test_documents[1])
+            self.assertEqual(index.refresh().doc_count(), 2)
+
+    @mock.patch(
+        'mayan.apps.dynamic_search.backends.whoosh.WHOOSH_INDEX_BATCH_DURATION', 0
+    )
+    def test_index_session_batch_duration(self):
+        self._upload_test_document(label='first_doc')
+        self.search_backend.clear_search_model_index(
+            search_model=document_search
+        )
+        index = self.search_backend.get_index(search_model=document_search)
+
+        with self.search_backend.get_index_session() as index_session:
+            index_session.index_instance(instance=self.test_document)
+            self.assertEqual(index.refresh().doc_count(), 1)
+
+    def test_index_session_index_locked(self):
+        self._upload_test_document(label='first_doc')
+        index = self.search_backend.get_index(search_model=document_search)
+
+        writer = index.writer()
+        try:
+            with self.assertRaises(LockError):
+                with self.search_backend.get_index_session() as index_session:
+                    index_session.index_instance(instance=self.test_document)
+        finally:
+            writer.cancel()
+
+    def test_index_session_same_instance(self):
+        self._upload_test_document(label='first_doc')
+        self.search_backend.clear_search_model_index(
+            search_model=document_search
+        )
+
+        with self.search_backend.get_index_session() as index_session:
+            index_session.index_instance(instance=self.test_document)
+            index_session.index_instance(instance=self.test_document)
+
+        index = self.search_backend.get_index(search_model=document_search)
+        self.assertEqual(index.doc_count(), 1)
+
+    def test_index_instance_dependents_pages(self):
+        self._upload_test_document(label='first_doc')
+        self._upload_test_document(label='second_doc')
+        self.search_backend.clear_search_model_index(
+            search_model=document_search
+        )
+        setting_index_dependents_page_size.set(value=1)
+
+        task_index_instance_dependents.apply_async(
+            kwargs={
+                'lookup': 'document_type',
+                'object_id': self.test_document_type.pk,
+                'search_model_full_name': document_search.get_full_name()
+            }
+        )
+
+        index = self.search_backend.get_index(search_model=document_search)
+        self.assertEqual(index.doc_count(), 2)
@@ -4,7 +4,7 @@ from mayan.apps.documents.tests.mixins.document_mixins import DocumentTestMixin
 from mayan.apps.tags.tests.mixins import TagTestMixin
 from mayan.apps.testing.tests.base import BaseTestCase
 
-from ..classes import SearchBackend
+from ..classes import SearchBackend, SearchModel, SearchModelDependency
 
 
 class ScopedSearchTestCase(DocumentTestMixin, TagTestMixin, BaseTestCase):
@@ -90,3 +90,55 @@ class ScopedSearchTestCase(DocumentTestMixin, TagTestMixin, BaseTestCase):
             user=self._test_case_user
         )
         self.assertEqual(queryset.count(), 1)
+
+
+class SearchModelDependencyTestCase(DocumentTestMixin, BaseTestCase):
+    auto_upload_test_document = False
+
+    def test_document_type_dependency(self):
+        dependencies = {
+            (
+                dependency.search_model, dependency.lookup
+            ): dependency for dependency in SearchModel.get_dependencies(
+                model=self.test_document_type._meta.model
+            )
+        }
+        dependency = dependencies[(document_search, 'document_type')]
+
+        self.assertEqual(dependency.field_names, {'label'})
+        self.assertEqual(dependency.get_attnames(), {'label'})
+
+    def test_is_changed(self):
+        dependency = SearchModelDependency(
+            lookup='document_type', model=self.test_document_type._meta.model,
+            search_model=document_search
+        )
+        dependency.field_names.add('label')
+
+        previous_values = {'label': self.test_document_type.label}
+
+        self.assertFalse(
+            dependency.is_changed(
+                instance=self.test_document_type,
+                previous_values=previous_values
+            )
+        )
+        self.assertTrue(
+            dependency.is_changed(
+                instance=self.test_document_type, previous_values=None
+            )
+        )
+        self.assertFalse(
+            dependency.is_changed(
+                instance=self.test_document_type, previous_values=None,
+                update_fields=('delete_time_period',)
+            )
+        )
+
+        self.test_document_type.label = 'edited'
+        self.assertTrue(
+            dependency.is_changed(
+                instance=self.test_document_type,
+                previous_values=previous_values
+            )
+        )
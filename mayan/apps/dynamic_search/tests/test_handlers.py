@@ -0,0 +1,81 @@
+import mock
+
+from mayan.apps.documents.tests.mixins.document_mixins import DocumentTestMixin
+from mayan.apps.lock_manager.classes import LockStatistics
+from mayan.apps.testing.tests.base import (
+    BaseTestCase, BaseTransactionTestCase
+)
+
+from ..literals import INDEX_UPDATE_PENDING_MARGIN
+from ..settings import setting_index_update_delay
+
+
+class IndexUpdateHandlerTestCase(
+    DocumentTestMixin, BaseTransactionTestCase
+):
+    def _save_test_document_twice(self):
+        with mock.patch('mayan.apps.dynamic_search.handlers.task_index_instance') as self.mock_task:
+            self.mock_task.app.conf.task_always_eager = False
+
+            self.test_document.save()
+            self.test_document.save()
+
+    def test_index_update_coalescing(self):
+        setting_index_update_delay.set(value=5)
+
+        self._save_test_document_twice()
+
+        self.assertEqual(self.mock_task.apply_async.call_count, 1)
+        self.assertEqual(
+            self.mock_task.apply_async.call_args[1]['countdown'],
+            5 + INDEX_UPDATE_PENDING_MARGIN
+        )
+
+    def test_index_update_coalescing_lock_statistics(self):
+        setting_index_update_delay.set(value=5)
+        LockStatistics.clear()
+
+        self._save_test_document_twice()
+
+        self.assertFalse(
+            [
+                prefix for prefix in LockStatistics._values
+                if prefix.startswith('dynamic_search')
+            ]
+        )
+
+    def test_index_update_no_delay(self):
+        setting_index_update_delay.set(value=0)
+
+        self._save_test_document_twice()
+
+        self.assertEqual(self.mock_task.apply_async.call_count, 2)
+
+
+class IndexDependentsHandlerTestCase(DocumentTestMixin, BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        setting_index_update_delay.set(value=0)
+
+    def _get_document_type_dependent_calls(self):
+        return [
+            call for call in self.mock_task.apply_async.call_args_list
+            if call[1]['kwargs']['lookup'] == 'document_type'
+        ]
+
+    def test_index_dependents_changed(self):
+        with mock.patch('mayan.apps.dynamic_search.handlers.task_index_instance_dependents') as self.mock_task:
+            self.test_document_type.label = 'edited'
+            self.test_document_type.save()
+
+        calls = self._get_document_type_dependent_calls()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(
+            calls[0][1]['kwargs']['object_id'], self.test_document_type.pk
+        )
+
+    def test_index_dependents_unchanged(self):
+        with mock.patch('mayan.apps.dynamic_search.handlers.task_index_instance_dependents') as self.mock_task:
+            self.test_document_type.save()
+
+        self.assertEqual(len(self._get_document_type_dependent_calls()), 0)
@@ -0,0 +1,31 @@
+from django.http import HttpResponse
+
+from mayan.apps.rest_api import generics
+
+from .classes import CacheMetrics
+from .literals import PROMETHEUS_CONTENT_TYPE
+from .models import Cache
+from .permissions import permission_cache_view
+
+
+class APICacheMetricListView(generics.ListAPIView):
+    """
+    get: Returns the metrics of the caches in the Prometheus text format.
+    """
+    mayan_object_permissions = {'GET': (permission_cache_view,)}
+    queryset = Cache.objects.all()
+
+    def get_serializer(self, *args, **kwargs):
+        return None
+
+    def get_serializer_class(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return HttpResponse(
+            CacheMetrics.get_prometheus_text(
+                caches=self.filter_queryset(
+                    queryset=self.get_queryset()
+                ).order_by('pk')
+            ), content_type=PROMETHEUS_CONTENT_TYPE
+        )
@@ -0,0 +1,607 @@
+from collections import OrderedDict
+import logging
+import threading
+import time
+
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils.timezone import now
+
+from .eviction_policies import (
+    CacheEvictionPolicy, GreedyDualSizeFrequencyEvictionPolicy
+)
+from .literals import (
+    ACCESS_BUFFER_MAXIMUM_SIZE, ACCESS_FLUSH_BATCH_SIZE,
+    ACCESS_FLUSH_INTERVAL, MEMORY_TIER_ENTRY_TIMEOUT, METRIC_BYTES_SERVED,
+    METRIC_EVICTED_BYTES, METRIC_EVICTIONS, METRIC_GENERATION_COUNT,
+    METRIC_GENERATION_SECONDS, METRIC_HITS, METRIC_MISSES,
+    METRIC_PRUNE_COUNT, METRIC_PRUNE_SECONDS,
+    METRICS_GENERATION_START_MAXIMUM_COUNT
+)
+from .settings import (
+    setting_memory_tier_maximum_file_size, setting_memory_tier_maximum_size
+)
+
+logger = logging.getLogger(name=__name__)
+
+
+class CachePartitionFileAccessBuffer:
+    """
+    Accumulate the hits and the last access time of the cache partition
+    files in the memory of the process instead of updating the database on
+    every read. The accumulated values are written in bulk when the buffer
+    is full, when it is older than ACCESS_FLUSH_INTERVAL, by the periodic
+    flush task, and before a cache is pruned.
+    """
+    _accesses = {}
+    _lock = threading.Lock()
+    _timestamp_flush = time.monotonic()
+
+    @classmethod
+    def _merge(cls, accesses):
+        # Put back the accesses of a failed flush without losing the ones
+        # added in the meantime.
+        with cls._lock:
+            for pk, (hits, datetime_accessed) in accesses.items():
+                buffered_hits, buffered_datetime_accessed = cls._accesses.get(
+                    pk, (0, datetime_accessed)
+                )
+                cls._accesses[pk] = (
+                    hits + buffered_hits,
+                    max(datetime_accessed, buffered_datetime_accessed)
+                )
+
+    @classmethod
+    def add(cls, cache_partition_file_id):
+        with cls._lock:
+            hits, datetime_accessed = cls._accesses.get(
+                cache_partition_file_id, (0, None)
+            )
+            cls._accesses[cache_partition_file_id] = (hits + 1, now())
+
+            flush = len(cls._accesses) >= ACCESS_BUFFER_MAXIMUM_SIZE or time.monotonic() - cls._timestamp_flush >= ACCESS_FLUSH_INTERVAL
+
+        if flush:
+            try:
+                cls.flush()
+            except Exception:
+                """
+                Already logged, the accesses are kept for the next flush
+                and must not fail the read.
+                """
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._accesses = {}
+            cls._timestamp_flush = time.monotonic()
+
+    @classmethod
+    def flush(cls):
+        """
+        Write the accumulated accesses to the database. Returns the number
+        of files updated.
+        """
+        with cls._lock:
+            accesses = cls._accesses
+            cls._accesses = {}
+            cls._timestamp_flush = time.monotonic()
+
+        if not accesses:
+            return 0
+
+        CachePartitionFile = apps.get_model(
+            app_label='file_caching', model_name='CachePartitionFile'
+        )
+
+        items = list(accesses.items())
+
+        try:
+            with transaction.atomic():
+                for index in range(0, len(items), ACCESS_FLUSH_BATCH_SIZE):
+                    batch = items[index:index + ACCESS_FLUSH_BATCH_SIZE]
+
+                    hits_expression = F('hits') + Case(
+                        *[
+                            When(pk=pk, then=Value(hits))
+                            for pk, (hits, datetime_accessed) in batch
+                        ], default=Value(0), output_field=IntegerField()
+                    )
+
+                    CachePartitionFile.objects.filter(
+                        pk__in=[pk for pk, access in batch]
+                    ).update(
+                        datetime_accessed=Case(
+                            *[
+                                When(pk=pk, then=Value(datetime_accessed))
+                                for pk, (hits, datetime_accessed) in batch
+                            ], default=F('datetime_accessed')
+                        ),
+                        eviction_priority=GreedyDualSizeFrequencyEvictionPolicy.get_priority_expression(
+                            hits=hits_expression
+                        ), hits=hits_expression
+                    )
+        except Exception as exception:
+            logger.error(
+                'Unable to flush the cache partition file accesses; %s',
+                exception, exc_info=True
+            )
+            cls._merge(accesses=accesses)
+            raise
+
+        logger.debug('Flushed the accesses of %d cache files.', len(items))
+
+        return len(items)
+
+
+class CacheEvictionSimulator:
+    """
+    In memory model of a cache used to replay a recorded access trace with
+    an eviction policy. Files are added on a miss and evicted the same way
+    `Cache.prune` does. Time is the position of the access in the trace.
+    """
+    @staticmethod
+    def read_trace(file_object, cache_id=None):
+        """
+        Parse the lines logged by the `mayan.apps.file_caching.trace`
+        logger. The last three fields of each line are the cache id, the
+        file name and the file size, anything before is ignored.
+        """
+        for line in file_object:
+            parts = line.split()
+            if len(parts) < 3:
+                continue
+
+            line_cache_id, key, size = parts[-3:]
+
+            if cache_id is None or int(line_cache_id) == cache_id:
+                yield key, int(size)
+
+    def __init__(self, maximum_size, policy_name):
+        self.entries = {}
+        self.eviction_clock = 0
+        self.maximum_size = maximum_size
+        self.policy = CacheEvictionPolicy.get(name=policy_name)(cache=self)
+        self.statistics = {
+            'bytes_hit': 0, 'bytes_requested': 0, 'evictions': 0,
+            'hits': 0, 'requests': 0
+        }
+        self.tick = 0
+        self.total_size = 0
+
+    def _prune(self):
+        excess_size = self.total_size - self.maximum_size + 1
+        if excess_size <= 0:
+            return
+
+        self.policy.simulation_prune_start()
+
+        entries = []
+        size = 0
+        for entry in sorted(self.entries.values(), key=self.policy.get_simulation_key):
+            entries.append(entry)
+            size += entry.size
+            if size >= excess_size:
+                break
+
+        for entry in entries:
+            del self.entries[entry.key]
+
+        self.total_size -= size
+        self.statistics['evictions'] += len(entries)
+        self.policy.simulation_evicted(entries=entries)
+
+    def _update_priority(self, entry):
+        entry.eviction_priority = GreedyDualSizeFrequencyEvictionPolicy.get_priority(
+            clock=self.eviction_clock, file_size=entry.size,
+            hits=entry.hits
+        )
+
+    def access(self, key, size):
+        """
+        Returns True for a hit.
+        """
+        self.tick += 1
+        self.statistics['bytes_requested'] += size
+        self.statistics['requests'] += 1
+
+        entry = self.entries.get(key)
+        if entry:
+            entry.datetime_accessed = self.tick
+            entry.hits += 1
+            self._update_priority(entry=entry)
+            self.statistics['bytes_hit'] += size
+            self.statistics['hits'] += 1
+            return True
+        else:
+            self._prune()
+            # The file is created and then read, which counts as its first
+            # hit like in the caches.
+            entry = CacheEvictionSimulatorEntry(
+                datetime=self.tick, key=key, pk=self.tick, size=size
+            )
+            entry.datetime_accessed = self.tick
+            entry.hits = 1
+            self._update_priority(entry=entry)
+            self.entries[key] = entry
+            self.total_size += size
+            return False
+
+    def get_results(self):
+        results = self.statistics.copy()
+        results['byte_hit_rate'] = results['bytes_hit'] / (
+            results['bytes_requested'] or 1
+        )
+        results['hit_rate'] = results['hits'] / (results['requests'] or 1)
+        return results
+
+    def replay(self, trace):
+        for key, size in trace:
+            self.access(key=key, size=size)
+
+        return self.get_results()
+
+
+class CacheEvictionSimulatorEntry:
+    def __init__(self, datetime, key, pk, size):
+        self.datetime = datetime
+        self.datetime_accessed = None
+        self.eviction_priority = 0
+        self.hits = 0
+        self.key = key
+        self.pk = pk
+        self.size = size
+
+
+class CacheMemoryTier:
+    """
+    Least recently used store, in the memory of the process, of the
+    content of the small cache files. Enabled by setting
+    FILE_CACHING_MEMORY_TIER_MAXIMUM_SIZE. Files are added when created and
+    when read from the storage, and removed when deleted or purged in this
+    process. Entries expire after MEMORY_TIER_ENTRY_TIMEOUT seconds to pick
+    up the purges done by other processes.
+    """
+    _entries = OrderedDict()
+    _lock = threading.Lock()
+    _size = 0
+
+    @classmethod
+    def _remove(cls, key):
+        cache_partition_file_id, content, timestamp = cls._entries.pop(key)
+        cls._size -= len(content)
+
+    @classmethod
+    def accepts(cls, file_size):
+        maximum_size = setting_memory_tier_maximum_size.value
+
+        return maximum_size > 0 and file_size <= min(
+            maximum_size, setting_memory_tier_maximum_file_size.value
+        )
+
+    @classmethod
+    def add(cls, cache_partition_id, filename, cache_partition_file_id, content):
+        if not cls.accepts(file_size=len(content)):
+            return
+
+        key = (cache_partition_id, filename)
+        maximum_size = setting_memory_tier_maximum_size.value
+
+        with cls._lock:
+            if key in cls._entries:
+                cls._remove(key=key)
+
+            while cls._entries and cls._size + len(content) > maximum_size:
+                cls._remove(key=next(iter(cls._entries)))
+
+            cls._entries[key] = (
+                cache_partition_file_id, content, time.monotonic()
+            )
+            cls._size += len(content)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries = OrderedDict()
+            cls._size = 0
+
+    @classmethod
+    def get(cls, cache_partition_id, filename):
+        """
+        Return the id of the cache partition file and its content or None.
+        """
+        key = (cache_partition_id, filename)
+
+        with cls._lock:
+            try:
+                cache_partition_file_id, content, timestamp = cls._entries[key]
+            except KeyError:
+                return None
+
+            if time.monotonic() - timestamp > MEMORY_TIER_ENTRY_TIMEOUT:
+                cls._remove(key=key)
+                return None
+
+            cls._entries.move_to_end(key=key)
+
+            return cache_partition_file_id, content
+
+    @classmethod
+    def get_statistics(cls):
+        with cls._lock:
+            return {'count': len(cls._entries), 'size': cls._size}
+
+    @classmethod
+    def invalidate(cls, cache_partition_id, filename=None):
+        """
+        Remove a file or all the files of a cache partition.
+        """
+        with cls._lock:
+            if filename is None:
+                keys = [
+                    key for key in cls._entries
+                    if key[0] == cache_partition_id
+                ]
+            else:
+                keys = [(cache_partition_id, filename)]
+
+            for key in keys:
+                if key in cls._entries:
+                    cls._remove(key=key)
+
+
+class CacheMetrics:
+    """
+    Counters of the caches accumulated in the memory of the process and
+    added to the `CacheMetric` totals in bulk at the same moments as the
+    file accesses. Flushing is best effort, counters that fail to be
+    written are discarded.
+    """
+    # Metric name, Prometheus name, type and help. Summaries use the name
+    # of their sum and count metrics.
+    prometheus_metrics = (
+        (
+            METRIC_HITS, 'hits_total', 'counter',
+            'Cache files read from the cache.'
+        ),
+        (
+            METRIC_MISSES, 'misses_total', 'counter',
+            'Cache files requested but not found.'
+        ),
+        (
+            METRIC_BYTES_SERVED, 'served_bytes_total', 'counter',
+            'Bytes of the cache files read from the cache.'
+        ),
+        (
+            METRIC_EVICTIONS, 'evictions_total', 'counter',
+            'Cache files deleted by reason.'
+        ),
+        (
+            METRIC_EVICTED_BYTES, 'evicted_bytes_total', 'counter',
+            'Bytes of the cache files deleted by reason.'
+        ),
+        (
+            (METRIC_GENERATION_SECONDS, METRIC_GENERATION_COUNT),
+            'generation_duration_seconds', 'summary',
+            'Time from a miss to the creation of the cache file.'
+        ),
+        (
+            (METRIC_PRUNE_SECONDS, METRIC_PRUNE_COUNT),
+            'prune_duration_seconds', 'summary',
+            'Time spent deleting files to make room for new ones.'
+        ),
+    )
+    prometheus_prefix = 'mayan_file_caching_'
+
+    _generation_starts = OrderedDict()
+    _lock = threading.Lock()
+    _timestamp_flush = time.monotonic()
+    _values = {}
+
+    @staticmethod
+    def _get_prometheus_labels(cache, label=None):
+        labels = [
+            ('cache', cache.pk), ('storage', cache.defined_storage_name)
+        ]
+        if label:
+            labels.append(('reason', label))
+
+        return '{{{}}}'.format(
+            ','.join(
+                '{}="{}"'.format(
+                    key, str(value).replace('\\', '\\\\').replace('"', '\\"')
+                ) for key, value in labels
+            )
+        )
+
+    @classmethod
+    def add(cls, cache_id, name, label='', value=1):
+        key = (cache_id, name, label)
+
+        with cls._lock:
+            cls._values[key] = cls._values.get(key, 0) + value
+            flush = time.monotonic() - cls._timestamp_flush >= ACCESS_FLUSH_INTERVAL
+
+        if flush:
+            cls.flush()
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._generation_starts = OrderedDict()
+            cls._timestamp_flush = time.monotonic()
+            cls._values = {}
+
+    @classmethod
+    def discard(cls, cache_id):
+        """
+        Drop the counters not yet flushed of a cache that is being deleted.
+        """
+        with cls._lock:
+            cls._values = {
+                key: value for key, value in cls._values.items()
+                if key[0] != cache_id
+            }
+
+    @classmethod
+    def flush(cls):
+        with cls._lock:
+            values = cls._values
+            cls._timestamp_flush = time.monotonic()
+            cls._values = {}
+
+        if not values:
+            return
+
+        Cache = apps.get_model(app_label='file_caching', model_name='Cache')
+        CacheMetric = apps.get_model(
+            app_label='file_caching', model_name='CacheMetric'
+        )
+
+        # Counters of caches deleted since they were added are dropped.
+        # The foreign key check may be deferred until the end of the
+        # transaction of the caller, creating their rows would make it
+        # fail there instead of here.
+        cache_ids = set(
+            Cache.objects.filter(
+                pk__in={cache_id for cache_id, name, label in values}
+            ).values_list('pk', flat=True)
+        )
+
+        for (cache_id, name, label), value in values.items():
+            if cache_id not in cache_ids:
+                continue
+
+            queryset = CacheMetric.objects.filter(
+                cache_id=cache_id, label=label, name=name
+            )
+
+            try:
+                if not queryset.update(value=F('value') + value):
+                    try:
+                        with transaction.atomic():
+                            CacheMetric.objects.create(
+                                cache_id=cache_id, label=label, name=name,
+                                value=value
+                            )
+                    except IntegrityError:
+                        # Created by another process in the meantime.
+                        queryset.update(value=F('value') + value)
+            except Exception as exception:
+                logger.error(
+                    'Unable to write the metric "%s" of cache %s; %s', name,
+                    cache_id, exception, exc_info=True
+                )
+
+    @classmethod
+    def generation_end(cls, cache_id, cache_partition_id, filename):
+        with cls._lock:
+            timestamp = cls._generation_starts.pop(
+                (cache_partition_id, filename), None
+            )
+
+        if timestamp is not None:
+            cls.add(
+                cache_id=cache_id, name=METRIC_GENERATION_SECONDS,
+                value=time.monotonic() - timestamp
+            )
+            cls.add(cache_id=cache_id, name=METRIC_GENERATION_COUNT)
+
+    @classmethod
+    def generation_start(cls, cache_partition_id, filename):
+        """
+        Remember the time of a miss. The duration is recorded if the file is
+        created afterwards by this process.
+        """
+        with cls._lock:
+            cls._generation_starts[
+                (cache_partition_id, filename)
+            ] = time.monotonic()
+
+            if len(cls._generation_starts) > METRICS_GENERATION_START_MAXIMUM_COUNT:
+                cls._generation_starts.popitem(last=False)
+
+    @classmethod
+    def get_prometheus_text(cls, caches):
+        """
+        Return the metrics of the caches in the Prometheus text exposition
+        format.
+        """
+        CacheMetric = apps.get_model(
+            app_label='file_caching', model_name='CacheMetric'
+        )
+
+        cls.flush()
+
+        caches = list(caches)
+        values = {
+            (cache_metric.cache_id, cache_metric.name, cache_metric.label): cache_metric.value
+            for cache_metric in CacheMetric.objects.filter(cache__in=caches)
+        }
+
+        lines = []
+
+        def add_metric(name, metric_type, help_text, samples):
+            lines.append(
+                '# HELP {}{} {}'.format(cls.prometheus_prefix, name, help_text)
+            )
+            lines.append(
+                '# TYPE {}{} {}'.format(cls.prometheus_prefix, name, metric_type)
+            )
+            for suffix, labels, value in samples:
+                lines.append(
+                    '{}{}{}{} {}'.format(
+                        cls.prometheus_prefix, name, suffix, labels,
+                        repr(float(value))
+                    )
+                )
+
+        for metric_name, name, metric_type, help_text in cls.prometheus_metrics:
+            samples = []
+
+            for cache in caches:
+                if metric_type == 'summary':
+                    for suffix, summary_name in zip(('_sum', '_count'), metric_name):
+                        samples.append(
+                            (
+                                suffix, cls._get_prometheus_labels(cache=cache),
+                                values.get((cache.pk, summary_name, ''), 0)
+                            )
+                        )
+                else:
+                    labels = sorted(
+                        label for cache_id, value_name, label in values
+                        if cache_id == cache.pk and value_name == metric_name
+                    ) or ['']
+
+                    for label in labels:
+                        samples.append(
+                            (
+                                '', cls._get_prometheus_labels(
+                                    cache=cache, label=label
+                                ), values.get((cache.pk, metric_name, label), 0)
+                            )
+                        )
+
+            add_metric(
+                help_text=help_text, metric_type=metric_type, name=name,
+                samples=samples
+            )
+
+        add_metric(
+            help_text='Sum of the size of the files of the cache.',
+            metric_type='gauge', name='size_bytes', samples=[
+                ('', cls._get_prometheus_labels(cache=cache), cache.total_size)
+                for cache in caches
+            ]
+        )
+        add_metric(
+            help_text='Maximum size of the cache.',
+            metric_type='gauge', name='maximum_size_bytes', samples=[
+                ('', cls._get_prometheus_labels(cache=cache), cache.maximum_size)
+                for cache in caches
+            ]
+        )
+
+        return '\n'.join(lines) + '\n'
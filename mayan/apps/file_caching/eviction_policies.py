@@ -0,0 +1,242 @@
+import logging
+
+from django.apps import apps
+from django.db.models import (
+    Case, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.utils.translation import ugettext_lazy as _
+
+from .literals import TINYLFU_AGING_FACTOR, TINYLFU_WINDOW_RATIO
+
+logger = logging.getLogger(name=__name__)
+
+
+class CacheEvictionPolicyMetaclass(type):
+    _registry = {}
+
+    def __new__(mcs, name, bases, attrs):
+        new_class = super().__new__(mcs, name, bases, attrs)
+
+        if new_class.name:
+            mcs._registry[new_class.name] = new_class
+
+        return new_class
+
+
+class CacheEvictionPolicy(metaclass=CacheEvictionPolicyMetaclass):
+    """
+    Decide the order in which the files of a cache are evicted. Each
+    policy implements the order twice: as a queryset for the caches and in
+    memory for the `CacheEvictionSimulator` so that recorded access traces
+    can be replayed to compare the policies. The `cache` is the simulator
+    for the simulation methods.
+    """
+    label = None
+    name = None
+
+    @classmethod
+    def get(cls, name):
+        return cls._registry[name]
+
+    @classmethod
+    def get_all(cls):
+        return sorted(
+            cls._registry.values(), key=lambda policy: policy.name
+        )
+
+    @classmethod
+    def get_choices(cls):
+        return [(policy.name, policy.label) for policy in cls.get_all()]
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def evicted(self, cache_partition_files):
+        """
+        Called after a batch of files was evicted.
+        """
+
+    def get_ordered_queryset(self, queryset):
+        raise NotImplementedError
+
+    def get_simulation_key(self, entry):
+        raise NotImplementedError
+
+    def prune_start(self):
+        """
+        Called before the files to evict are selected.
+        """
+
+    def simulation_evicted(self, entries):
+        """
+        Same as `evicted` for the simulator.
+        """
+
+    def simulation_prune_start(self):
+        """
+        Same as `prune_start` for the simulator.
+        """
+
+
+class LeastFrequentlyUsedEvictionPolicy(CacheEvictionPolicy):
+    """
+    Evict the files with the fewest hits first and the oldest among those.
+    Popularity is never forgotten.
+    """
+    label = _('Least frequently used')
+    name = 'lfu'
+
+    def get_ordered_queryset(self, queryset):
+        return queryset.order_by('hits', 'datetime', 'pk')
+
+    def get_simulation_key(self, entry):
+        return (entry.hits, entry.datetime, entry.pk)
+
+
+class LeastRecentlyUsedEvictionPolicy(CacheEvictionPolicy):
+    """
+    Evict the files accessed the longest time ago first. Files never
+    accessed use their creation time.
+    """
+    label = _('Least recently used')
+    name = 'lru'
+
+    def get_ordered_queryset(self, queryset):
+        return queryset.annotate(
+            eviction_datetime=Coalesce('datetime_accessed', 'datetime')
+        ).order_by('eviction_datetime', 'pk')
+
+    def get_simulation_key(self, entry):
+        return (entry.datetime_accessed or entry.datetime, entry.pk)
+
+
+class GreedyDualSizeFrequencyEvictionPolicy(CacheEvictionPolicy):
+    """
+    Greedy Dual Size Frequency. The priority of a file is the clock of the
+    cache plus its hits divided by its size, favoring small popular files.
+    The clock rises to the priority of the files evicted, which ages the
+    files not accessed since.
+    """
+    label = _('Greedy dual size frequency')
+    name = 'gdsf'
+
+    @staticmethod
+    def get_priority(clock, hits, file_size):
+        return clock + (hits + 1) / max(file_size, 1)
+
+    @staticmethod
+    def get_priority_expression(hits, file_size=None):
+        """
+        Expression to update the stored priority of files from a hit count
+        expression, evaluated for the clock of the cache of each file.
+        """
+        if file_size is None:
+            file_size = F('file_size')
+
+        Cache = apps.get_model(app_label='file_caching', model_name='Cache')
+
+        return Subquery(
+            Cache.objects.filter(partitions=OuterRef('partition')).values(
+                'eviction_clock'
+            )[:1], output_field=FloatField()
+        ) + Cast(
+            hits + 1, output_field=FloatField()
+        ) / Greatest(file_size, Value(1))
+
+    def evicted(self, cache_partition_files):
+        Cache = apps.get_model(app_label='file_caching', model_name='Cache')
+
+        clock = max(
+            cache_partition_file.eviction_priority
+            for cache_partition_file in cache_partition_files
+        )
+        Cache.objects.filter(pk=self.cache.pk).update(
+            eviction_clock=Greatest(F('eviction_clock'), Value(clock))
+        )
+
+    def get_ordered_queryset(self, queryset):
+        return queryset.order_by('eviction_priority', 'datetime', 'pk')
+
+    def get_simulation_key(self, entry):
+        return (entry.eviction_priority, entry.datetime, entry.pk)
+
+    def simulation_evicted(self, entries):
+        self.cache.eviction_clock = max(
+            [self.cache.eviction_clock] + [
+                entry.eviction_priority for entry in entries
+            ]
+        )
+
+
+class TinyLFUEvictionPolicy(CacheEvictionPolicy):
+    """
+    Frequency based with the two corrections of W-TinyLFU. The newest
+    files, a TINYLFU_WINDOW_RATIO of the total, form a window that is
+    evicted last so they have time to gather hits before competing with
+    the rest. Hits are halved when their sum reaches TINYLFU_AGING_FACTOR
+    times the number of files so that old popularity fades.
+    """
+    label = _('Windowed TinyLFU')
+    name = 'tinylfu'
+
+    @staticmethod
+    def get_window_size(file_count):
+        return max(1, int(file_count * TINYLFU_WINDOW_RATIO))
+
+    def get_ordered_queryset(self, queryset):
+        window_datetime = self.window_datetime
+
+        if window_datetime:
+            queryset = queryset.annotate(
+                eviction_window=Case(
+                    When(datetime__gte=window_datetime, then=Value(1)),
+                    default=Value(0), output_field=IntegerField()
+                )
+            )
+        else:
+            queryset = queryset.annotate(
+                eviction_window=Value(0, output_field=IntegerField())
+            )
+
+        return queryset.order_by('eviction_window', 'hits', 'datetime', 'pk')
+
+    def get_simulation_key(self, entry):
+        return (
+            int(entry.datetime >= self.window_datetime), entry.hits,
+            entry.datetime, entry.pk
+        )
+
+    def prune_start(self):
+        queryset = self.cache.get_files()
+        file_count = queryset.count()
+
+        hits_sum = queryset.aggregate(hits_sum=Sum('hits'))['hits_sum'] or 0
+        if hits_sum >= TINYLFU_AGING_FACTOR * file_count:
+            logger.debug('Aging the hits of the files of cache: %s', self.cache)
+            queryset.update(hits=F('hits') / 2)
+
+        self.window_datetime = queryset.order_by('-datetime').values_list(
+            'datetime', flat=True
+        )[self.get_window_size(file_count=file_count) - 1:].first()
+
+    def simulation_prune_start(self):
+        entries = self.cache.entries.values()
+
+        if sum(entry.hits for entry in entries) >= TINYLFU_AGING_FACTOR * len(entries):
+            for entry in entries:
+                entry.hits = entry.hits // 2
+
+        datetimes = sorted(
+            (entry.datetime for entry in entries), reverse=True
+        )
+        if datetimes:
+            self.window_datetime = datetimes[
+                min(
+                    len(datetimes), self.get_window_size(
+                        file_count=len(datetimes)
+                    )
+                ) - 1
+            ]
+        else:
+            self.window_datetime = 0
@@ -5,5 +5,5 @@ from .models import Cache
 
 class CacheDetailForm(DetailForm):
     class Meta:
-        fields = ()
+        fields = ('eviction_policy',)
         model = Cache
@@ -1,2 +1,35 @@
+ACCESS_BUFFER_MAXIMUM_SIZE = 1000
+ACCESS_FLUSH_BATCH_SIZE = 100
+ACCESS_FLUSH_INTERVAL = 60
+
+CACHE_EVICTION_POLICY_DEFAULT = 'lfu'
+CACHE_TEMPORARY_FILENAME_SUFFIX = '.tmp'
+
 DEFAULT_MAXIMUM_FAILED_PRUNE_ATTEMPTS = 100
 DEFAULT_MAXIMUM_NORMAL_PRUNE_ATTEMPTS = 100
+DEFAULT_MEMORY_TIER_MAXIMUM_FILE_SIZE = 128 * 2 ** 10  # 128 KB
+DEFAULT_MEMORY_TIER_MAXIMUM_SIZE = 0
+
+EVICTION_REASON_DELETE = 'delete'
+EVICTION_REASON_PRUNE = 'prune'
+EVICTION_REASON_PURGE = 'purge'
+
+MEMORY_TIER_ENTRY_TIMEOUT = 300
+
+METRIC_BYTES_SERVED = 'bytes_served'
+METRIC_EVICTED_BYTES = 'evicted_bytes'
+METRIC_EVICTIONS = 'evictions'
+METRIC_GENERATION_COUNT = 'generation_count'
+METRIC_GENERATION_SECONDS = 'generation_seconds'
+METRIC_HITS = 'hits'
+METRIC_MISSES = 'misses'
+METRIC_PRUNE_COUNT = 'prune_count'
+METRIC_PRUNE_SECONDS = 'prune_seconds'
+METRICS_GENERATION_START_MAXIMUM_COUNT = 1000
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+PRUNE_BATCH_SIZE = 100
+PURGE_BATCH_SIZE = 1000
+STORAGE_DELETE_WORKERS = 8
+TINYLFU_AGING_FACTOR = 10
+TINYLFU_WINDOW_RATIO = 0.01
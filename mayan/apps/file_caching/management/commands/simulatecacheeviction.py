@@ -0,0 +1,67 @@
+from django.core import management
+from django.utils.translation import ugettext_lazy as _
+
+from ...classes import CacheEvictionSimulator
+from ...eviction_policies import CacheEvictionPolicy
+
+
+class Command(management.BaseCommand):
+    help = 'Replay a cache access trace to compare the eviction policies.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'trace', action='store',
+            help=_(
+                'File with the lines logged by the '
+                '"mayan.apps.file_caching.trace" logger.'
+            )
+        )
+        parser.add_argument(
+            '--cache', action='store', dest='cache_id', type=int,
+            help=_('Replay only the accesses of the cache with this id.')
+        )
+        parser.add_argument(
+            '--maximum_size', action='store', dest='maximum_size',
+            help=_('Maximum size of the simulated cache in bytes.'),
+            required=True, type=int
+        )
+        parser.add_argument(
+            '--policy', action='append', dest='policies',
+            choices=[policy.name for policy in CacheEvictionPolicy.get_all()],
+            help=_(
+                'Eviction policy to simulate. Can be repeated. Defaults to '
+                'all the policies.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        with open(options['trace']) as file_object:
+            trace = list(
+                CacheEvictionSimulator.read_trace(
+                    cache_id=options['cache_id'], file_object=file_object
+                )
+            )
+
+        policies = options['policies'] or [
+            policy.name for policy in CacheEvictionPolicy.get_all()
+        ]
+
+        self.stdout.write(
+            '{:<10} {:>10} {:>10} {:>10} {:>10}'.format(
+                'Policy', 'Requests', 'Evictions', 'Hit rate',
+                'Byte rate'
+            )
+        )
+
+        for policy_name in policies:
+            results = CacheEvictionSimulator(
+                maximum_size=options['maximum_size'],
+                policy_name=policy_name
+            ).replay(trace=trace)
+
+            self.stdout.write(
+                '{:<10} {:>10} {:>10} {:>10.2%} {:>10.2%}'.format(
+                    policy_name, results['requests'], results['evictions'],
+                    results['hit_rate'], results['byte_hit_rate']
+                )
+            )
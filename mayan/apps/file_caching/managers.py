@@ -0,0 +1,36 @@
+from itertools import groupby
+
+from django.db import models
+
+from .literals import EVICTION_REASON_PURGE, PURGE_BATCH_SIZE
+
+
+class CachePartitionFileQuerySet(models.QuerySet):
+    def purge(self):
+        """
+        Delete the files in batches: one bulk delete and total size update
+        per cache and batch followed by the parallel deletion of the storage
+        files. The locks of the files are not acquired, a file being created
+        is discarded when its creation finishes. Returns the number of files
+        deleted.
+        """
+        count = 0
+        last_pk = 0
+        queryset = self.select_related('partition__cache').order_by('pk')
+
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:PURGE_BATCH_SIZE])
+            if not batch:
+                break
+
+            last_pk = batch[-1].pk
+            batch.sort(key=lambda instance: instance.partition.cache_id)
+
+            for cache_id, cache_partition_files in groupby(batch, key=lambda instance: instance.partition.cache_id):
+                cache_partition_files = list(cache_partition_files)
+                count += cache_partition_files[0].partition.cache._delete_files(
+                    cache_partition_files=cache_partition_files,
+                    reason=EVICTION_REASON_PURGE
+                )
+
+        return count
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.23 on 2026-10-19 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('file_caching', '0009_cache_total_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cachepartitionfile',
+            name='datetime_accessed',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='Date and time of the last access. Accesses are buffered and written periodically.', null=True, verbose_name='Date time accessed'),
+        ),
+        migrations.AlterField(
+            model_name='cachepartitionfile',
+            name='hits',
+            field=models.PositiveIntegerField(db_index=True, default=0, help_text='Times this cache partition file has been accessed. Accesses are buffered and written periodically.', verbose_name='Hits'),
+        ),
+    ]
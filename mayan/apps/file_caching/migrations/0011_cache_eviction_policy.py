@@ -0,0 +1,47 @@
+# Generated by Django 2.2.23 on 2026-10-19 09:24
+
+from django.db import migrations, models
+from django.db.models.functions import Cast, Greatest
+
+
+def operation_calculate_cache_partition_file_eviction_priority(apps, schema_editor):
+    CachePartitionFile = apps.get_model(
+        app_label='file_caching', model_name='CachePartitionFile'
+    )
+
+    CachePartitionFile.objects.using(
+        schema_editor.connection.alias
+    ).update(
+        eviction_priority=Cast(
+            models.F('hits') + 1, output_field=models.FloatField()
+        ) / Greatest(models.F('file_size'), models.Value(1))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('file_caching', '0010_cachepartitionfile_datetime_accessed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cache',
+            name='eviction_clock',
+            field=models.FloatField(default=0, editable=False, help_text='Priority of the last file evicted, used by the policies that age the files.', verbose_name='Eviction clock'),
+        ),
+        migrations.AddField(
+            model_name='cache',
+            name='eviction_policy',
+            field=models.CharField(choices=[('gdsf', 'Greedy dual size frequency'), ('lfu', 'Least frequently used'), ('lru', 'Least recently used'), ('tinylfu', 'Windowed TinyLFU')], default='lfu', help_text='Order in which files are deleted when the cache is full.', max_length=32, verbose_name='Eviction policy'),
+        ),
+        migrations.AddField(
+            model_name='cachepartitionfile',
+            name='eviction_priority',
+            field=models.FloatField(db_index=True, default=0, editable=False, help_text='Value of the file for the greedy dual size frequency eviction policy. Updated with the hits.', verbose_name='Eviction priority'),
+        ),
+        migrations.RunPython(
+            code=operation_calculate_cache_partition_file_eviction_priority,
+            reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.23 on 2026-10-19 09:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('file_caching', '0011_cache_eviction_policy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheMetric',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, verbose_name='Name')),
+                ('label', models.CharField(blank=True, help_text='Subdivision of the metric, like a reason.', max_length=64, verbose_name='Label')),
+                ('value', models.FloatField(default=0, verbose_name='Value')),
+                ('cache', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='file_caching.Cache', verbose_name='Cache')),
+            ],
+            options={
+                'verbose_name': 'Cache metric',
+                'verbose_name_plural': 'Cache metrics',
+                'unique_together': {('cache', 'name', 'label')},
+            },
+        ),
+    ]
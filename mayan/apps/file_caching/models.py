@@ -1,10 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+import io
 import logging
+import os
+import time
+import uuid
 
 from django.core import validators
-from django.core.files.base import ContentFile
-from django.db import models
-from django.db.models import F, Sum
+from django.core.files.base import ContentFile, File
+from django.db import models, transaction
+from django.db.models import F, Sum, Value
 from django.template.defaultfilters import filesizeformat
 from django.urls import reverse
 from django.utils.encoding import force_text
@@ -16,23 +21,39 @@ from mayan.apps.databases.model_mixins import ValueChangeModelMixin
 from mayan.apps.events.classes import EventManagerMethodAfter, EventManagerSave
 from mayan.apps.events.decorators import method_event
 from mayan.apps.lock_manager.backends.base import LockingBackend
-from mayan.apps.lock_manager.decorators import (
-    acquire_lock_class_method, release_lock_class_method, locked_class_method
-)
+from mayan.apps.lock_manager.decorators import locked_class_method
 from mayan.apps.lock_manager.exceptions import LockError
 from mayan.apps.storage.classes import DefinedStorage
 
+from .classes import (
+    CacheMemoryTier, CacheMetrics, CachePartitionFileAccessBuffer
+)
+from .eviction_policies import (
+    CacheEvictionPolicy, GreedyDualSizeFrequencyEvictionPolicy
+)
 from .events import (
     event_cache_created, event_cache_edited, event_cache_partition_purged,
     event_cache_purged
 )
 from .exceptions import FileCachingException
+from .literals import (
+    CACHE_EVICTION_POLICY_DEFAULT, CACHE_TEMPORARY_FILENAME_SUFFIX,
+    EVICTION_REASON_DELETE, EVICTION_REASON_PRUNE, EVICTION_REASON_PURGE,
+    METRIC_BYTES_SERVED, METRIC_EVICTED_BYTES, METRIC_EVICTIONS,
+    METRIC_GENERATION_COUNT, METRIC_GENERATION_SECONDS, METRIC_HITS,
+    METRIC_MISSES, METRIC_PRUNE_COUNT, METRIC_PRUNE_SECONDS,
+    PRUNE_BATCH_SIZE, STORAGE_DELETE_WORKERS
+)
+from .managers import CachePartitionFileQuerySet
 from .settings import (
     setting_maximum_failed_prune_attempts,
     setting_maximum_normal_prune_attempts
 )
 
 logger = logging.getLogger(name=__name__)
+# One line per read of a cache file with the cache id, the file name and
+# the file size. Replayed by the `simulatecacheeviction` command.
+logger_trace = logging.getLogger(name='mayan.apps.file_caching.trace')
 
 
 class Cache(ValueChangeModelMixin, models.Model):
@@ -41,11 +62,28 @@ class Cache(ValueChangeModelMixin, models.Model):
             'Internal name of the defined storage for this cache.'
         ), max_length=96, unique=True, verbose_name=_('Defined storage name')
     )
+    eviction_clock = models.FloatField(
+        default=0, editable=False, help_text=_(
+            'Priority of the last file evicted, used by the policies that '
+            'age the files.'
+        ), verbose_name=_('Eviction clock')
+    )
+    eviction_policy = models.CharField(
+        choices=CacheEvictionPolicy.get_choices(),
+        default=CACHE_EVICTION_POLICY_DEFAULT, help_text=_(
+            'Order in which files are deleted when the cache is full.'
+        ), max_length=32, verbose_name=_('Eviction policy')
+    )
     maximum_size = models.BigIntegerField(
         help_text=_('Maximum size of the cache in bytes.'), validators=[
             validators.MinValueValidator(limit_value=1)
         ], verbose_name=_('Maximum size')
     )
+    total_size = models.BigIntegerField(
+        default=0, editable=False, help_text=_(
+            'Sum of the size of the files of the cache in bytes.'
+        ), verbose_name=_('Total size')
+    )
 
     class Meta:
         verbose_name = _('Cache')
@@ -54,6 +92,109 @@ class Cache(ValueChangeModelMixin, models.Model):
     def __str__(self):
         return force_text(s=self.label)
 
+    def _delete_files(self, cache_partition_files, reason):
+        """
+        Delete the database entries in bulk and then the storage files in
+        parallel. Callers that must not delete the files in use hold their
+        locks. The `reason` labels the eviction metrics. Returns the number
+        of entries deleted.
+        """
+        with transaction.atomic():
+            file_sizes = dict(
+                CachePartitionFile.objects.select_for_update().filter(
+                    pk__in=[
+                        cache_partition_file.pk for cache_partition_file in cache_partition_files
+                    ]
+                ).values_list('pk', 'file_size')
+            )
+            # Files deleted by another process in the meantime are already
+            # discounted from the total size.
+            CachePartitionFile.objects.filter(pk__in=file_sizes).delete()
+            self._update_total_size(amount=-sum(file_sizes.values()))
+
+        if file_sizes:
+            CacheMetrics.add(
+                cache_id=self.pk, label=reason, name=METRIC_EVICTIONS,
+                value=len(file_sizes)
+            )
+            CacheMetrics.add(
+                cache_id=self.pk, label=reason, name=METRIC_EVICTED_BYTES,
+                value=sum(file_sizes.values())
+            )
+
+        for cache_partition_file in cache_partition_files:
+            CacheMemoryTier.invalidate(
+                cache_partition_id=cache_partition_file.partition_id,
+                filename=cache_partition_file.filename
+            )
+
+        def delete_storage_file(name):
+            try:
+                self.storage.delete(name=name)
+            except Exception as exception:
+                logger.error(
+                    'Unable to delete cache storage file "%s"; %s', name,
+                    exception, exc_info=True
+                )
+
+        with ThreadPoolExecutor(max_workers=STORAGE_DELETE_WORKERS) as executor:
+            executor.map(
+                delete_storage_file, [
+                    cache_partition_file.full_filename for cache_partition_file in cache_partition_files
+                    if cache_partition_file.pk in file_sizes
+                ]
+            )
+
+        return len(file_sizes)
+
+    def _get_prune_candidates(self, eviction_policy):
+        """
+        Yield the files from the least valuable to the most according to
+        the eviction policy, one batch query at a time. The buffered
+        accesses are flushed first for the order to reflect them.
+        """
+        CachePartitionFileAccessBuffer.flush()
+        eviction_policy.prune_start()
+
+        queryset = eviction_policy.get_ordered_queryset(
+            queryset=self.get_files()
+        ).select_related('partition__cache')
+        offset = 0
+
+        while True:
+            batch = list(queryset[offset:offset + PRUNE_BATCH_SIZE])
+            yield from batch
+
+            if len(batch) < PRUNE_BATCH_SIZE:
+                break
+
+            offset += PRUNE_BATCH_SIZE
+
+    def _storage_rename(self, name, new_name):
+        """
+        Atomic on storages with local paths. The others copy the file,
+        which is fine for cache files since the database entry is what
+        makes them visible.
+        """
+        try:
+            path = self.storage.path(name=name)
+        except NotImplementedError:
+            with self.storage.open(mode='rb', name=name) as file_object:
+                self.storage.delete(name=new_name)
+                self.storage.save(content=File(file=file_object), name=new_name)
+            self.storage.delete(name=name)
+        else:
+            os.replace(src=path, dst=self.storage.path(name=new_name))
+
+    def _update_total_size(self, amount):
+        Cache.objects.filter(pk=self.pk).update(
+            total_size=F('total_size') + amount
+        )
+
+    def delete(self, *args, **kwargs):
+        CacheMetrics.discard(cache_id=self.pk)
+        return super().delete(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse(
             viewname='file_caching:cache_detail', kwargs={
@@ -61,9 +202,65 @@ class Cache(ValueChangeModelMixin, models.Model):
             }
         )
 
+    def get_eviction_policy(self):
+        return CacheEvictionPolicy.get(name=self.eviction_policy)(cache=self)
+
+    def get_evictions_display(self):
+        metrics = self.get_metrics()
+
+        return ', '.join(
+            [
+                '{}: {} ({})'.format(
+                    reason, int(
+                        metrics.get((METRIC_EVICTIONS, reason), 0)
+                    ), filesizeformat(
+                        bytes_=metrics.get((METRIC_EVICTED_BYTES, reason), 0)
+                    )
+                ) for reason in (
+                    EVICTION_REASON_DELETE, EVICTION_REASON_PRUNE,
+                    EVICTION_REASON_PURGE
+                )
+            ]
+        )
+
+    get_evictions_display.help_text = _(
+        'Files and bytes deleted from the cache by reason.'
+    )
+    get_evictions_display.short_description = _('Evictions')
+
     def get_files(self):
         return CachePartitionFile.objects.filter(partition__cache__id=self.pk)
 
+    def get_hit_ratio_display(self):
+        metrics = self.get_metrics()
+        hits = metrics.get((METRIC_HITS, ''), 0)
+        total = hits + metrics.get((METRIC_MISSES, ''), 0)
+
+        if total:
+            return '{:0.1f}% ({}/{})'.format(
+                hits / total * 100, int(hits), int(total)
+            )
+        else:
+            return _('None')
+
+    get_hit_ratio_display.help_text = _(
+        'Percentage of the requests of files found in the cache.'
+    )
+    get_hit_ratio_display.short_description = _('Hit ratio')
+
+    def get_metrics(self):
+        """
+        Return the metric values of the cache keyed by name and label,
+        including the values not yet flushed by this process.
+        """
+        CacheMetrics.flush()
+
+        return {
+            (name, label): value for name, label, value in self.metrics.values_list(
+                'name', 'label', 'value'
+            )
+        }
+
     def get_maximum_size_display(self):
         return filesizeformat(bytes_=self.maximum_size)
 
@@ -72,6 +269,52 @@ class Cache(ValueChangeModelMixin, models.Model):
     )
     get_maximum_size_display.short_description = _('Maximum size')
 
+    def get_average_generation_time_display(self):
+        metrics = self.get_metrics()
+        count = metrics.get((METRIC_GENERATION_COUNT, ''), 0)
+
+        if count:
+            return _('%0.3f seconds') % (
+                metrics.get((METRIC_GENERATION_SECONDS, ''), 0) / count
+            )
+        else:
+            return _('None')
+
+    get_average_generation_time_display.help_text = _(
+        'Average time from a cache miss to the creation of the file.'
+    )
+    get_average_generation_time_display.short_description = _(
+        'Average generation time'
+    )
+
+    def get_average_prune_time_display(self):
+        metrics = self.get_metrics()
+        count = metrics.get((METRIC_PRUNE_COUNT, ''), 0)
+
+        if count:
+            return _('%0.3f seconds') % (
+                metrics.get((METRIC_PRUNE_SECONDS, ''), 0) / count
+            )
+        else:
+            return _('None')
+
+    get_average_prune_time_display.help_text = _(
+        'Average time spent deleting files to make room for new ones.'
+    )
+    get_average_prune_time_display.short_description = _(
+        'Average prune time'
+    )
+
+    def get_bytes_served_display(self):
+        return filesizeformat(
+            bytes_=self.get_metrics().get((METRIC_BYTES_SERVED, ''), 0)
+        )
+
+    get_bytes_served_display.help_text = _(
+        'Size of the files read from the cache.'
+    )
+    get_bytes_served_display.short_description = _('Bytes served')
+
     def get_defined_storage(self):
         try:
             return DefinedStorage.get(name=self.defined_storage_name)
@@ -82,11 +325,12 @@ class Cache(ValueChangeModelMixin, models.Model):
 
     def get_total_size(self):
         """
-        Return the actual usage of the cache.
+        Return the actual usage of the cache. Read from the database, the
+        counter is updated by other instances and processes.
         """
-        return self.get_files().aggregate(
-            file_size__sum=Sum('file_size')
-        )['file_size__sum'] or 0
+        return Cache.objects.filter(pk=self.pk).values_list(
+            'total_size', flat=True
+        ).first() or 0
 
     def get_total_size_display(self):
         return format_lazy(
@@ -104,51 +348,80 @@ class Cache(ValueChangeModelMixin, models.Model):
     def prune(self):
         """
         Deletes files until the total size of the cache is below the allowed
-        maximum size of the cache.
+        maximum size of the cache. Enough files to cover the excess are
+        selected and locked, files in use are skipped, and deleted as a
+        batch.
         """
+        eviction_policy = self.get_eviction_policy()
         failed_attempts = 0
         normal_attempts = 0
-        file_index = 0
+        timestamp_start = time.monotonic()
+
+        while True:
+            excess_size = self.get_total_size() - self.maximum_size + 1
+            if excess_size <= 0:
+                if normal_attempts:
+                    CacheMetrics.add(
+                        cache_id=self.pk, name=METRIC_PRUNE_SECONDS,
+                        value=time.monotonic() - timestamp_start
+                    )
+                    CacheMetrics.add(cache_id=self.pk, name=METRIC_PRUNE_COUNT)
+                break
 
-        while self.get_total_size() >= self.maximum_size:
-            cache_partition_file_queryset = self.get_files().order_by(
-                'hits', 'datetime'
-            )
+            candidate_count = 0
+            locks = {}
+            locked_size = 0
 
             try:
-                cache_partition_file = cache_partition_file_queryset[file_index]
-            except IndexError:
-                # Attempted to get a file beyond what the queryset provided.
-                file_index = 0
-            else:
-                try:
-                    cache_partition_file.delete()
-                except CachePartitionFile.DoesNotExist:
-                    # The file selected from deletion was deleted by another
-                    # process before the lock was acquired.
-                    file_index += 1
-                except LockError:
-                    logger.debug(
-                        'Lock error trying to delete file "%s" for prune. '
-                        'Skipping and attempting next file.',
-                        cache_partition_file
-                    )
-                    failed_attempts += 1
-                    file_index += 1
+                for cache_partition_file in self._get_prune_candidates(eviction_policy=eviction_policy):
+                    candidate_count += 1
+                    lock_name = cache_partition_file._lock_manager_get_lock_name()
 
-                    if failed_attempts > setting_maximum_failed_prune_attempts.value:
-                        raise FileCachingException(
-                            'Too many cache prune attempts failed.'
+                    try:
+                        locks[cache_partition_file] = LockingBackend.get_backend().acquire_lock(
+                            name=lock_name
                         )
-                else:
-                    file_index = 0
-                    normal_attempts += 1
-
-                    if normal_attempts > setting_maximum_normal_prune_attempts.value:
-                        raise FileCachingException(
-                            'Too many cache prunes trying to create a '
-                            'single new file.'
+                    except LockError:
+                        logger.debug(
+                            'Lock error trying to delete file "%s" for '
+                            'prune. Skipping and attempting next file.',
+                            cache_partition_file
                         )
+                        failed_attempts += 1
+
+                        if failed_attempts > setting_maximum_failed_prune_attempts.value:
+                            raise FileCachingException(
+                                'Too many cache prune attempts failed.'
+                            )
+                    else:
+                        locked_size += cache_partition_file.file_size
+                        if locked_size >= excess_size:
+                            break
+
+                if not candidate_count:
+                    # No files left, the counter does not match the files.
+                    self.total_size_recalculate()
+                    break
+
+                if locks:
+                    self._delete_files(
+                        cache_partition_files=list(locks),
+                        reason=EVICTION_REASON_PRUNE
+                    )
+                    eviction_policy.evicted(
+                        cache_partition_files=list(locks)
+                    )
+            finally:
+                for lock in locks.values():
+                    lock.release()
+
+            normal_attempts += 1
+
+            if normal_attempts > setting_maximum_normal_prune_attempts.value:
+                raise FileCachingException(
+                    'Too many cache prunes trying to create a single new '
+                    'file.'
+                )
 
     @method_event(
         event=event_cache_purged,
@@ -157,7 +430,8 @@ class Cache(ValueChangeModelMixin, models.Model):
     )
     def purge(self):
         """
-        Deletes the entire cache.
+        Deletes the entire cache. The files are deleted in bulk, without
+        the events of the partitions.
         """
         try:
             DefinedStorage.get(name=self.defined_storage_name)
@@ -168,9 +442,7 @@ class Cache(ValueChangeModelMixin, models.Model):
             will remain.
             """
         else:
-            for partition in self.partitions.all():
-                partition._event_actor = getattr(self, '_event_actor', None)
-                partition.purge()
+            self.get_files().purge()
 
     @method_event(
         event_manager_class=EventManagerSave,
@@ -188,6 +460,15 @@ class Cache(ValueChangeModelMixin, models.Model):
             field='maximum_size'
         )
 
+        if not self._state.adding and 'update_fields' not in kwargs:
+            # Do not overwrite the counters with stale values.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in (
+                    'eviction_clock', 'total_size'
+                )
+            ]
+
         result = super().save(*args, **kwargs)
 
         if self.maximum_size < old_maximum_size:
@@ -199,6 +480,40 @@ class Cache(ValueChangeModelMixin, models.Model):
     def storage(self):
         return self.get_defined_storage().get_storage_instance()
 
+    def total_size_recalculate(self):
+        """
+        Set the total size counter from the size of the existing files.
+        """
+        Cache.objects.filter(pk=self.pk).update(
+            total_size=self.get_files().aggregate(
+                file_size__sum=Sum('file_size')
+            )['file_size__sum'] or 0
+        )
+
+
+class CacheMetric(models.Model):
+    """
+    Total of a counter of a cache. Written in bulk by `CacheMetrics`.
+    """
+    cache = models.ForeignKey(
+        on_delete=models.CASCADE, related_name='metrics',
+        to=Cache, verbose_name=_('Cache')
+    )
+    name = models.CharField(max_length=64, verbose_name=_('Name'))
+    label = models.CharField(
+        blank=True, help_text=_('Subdivision of the metric, like a reason.'),
+        max_length=64, verbose_name=_('Label')
+    )
+    value = models.FloatField(default=0, verbose_name=_('Value'))
+
+    class Meta:
+        unique_together = ('cache', 'name', 'label')
+        verbose_name = _('Cache metric')
+        verbose_name_plural = _('Cache metrics')
+
+    def __str__(self):
+        return '{}: {}'.format(self.cache, self.name)
+
 
 class CachePartition(models.Model):
     cache = models.ForeignKey(
@@ -221,8 +536,44 @@ class CachePartition(models.Model):
     def _lock_manager_get_lock_name(self, filename):
         return self.get_file_lock_name(filename=filename)
 
+    def _publish_file(self, filename, temporary_filename):
+        """
+        Insert the entry of a complete file and rename the temporary file
+        to its final name in the same transaction. The entry only becomes
+        visible with the file in place.
+        """
+        file_size = self.cache.storage.size(name=temporary_filename)
+
+        if file_size > self.cache.maximum_size:
+            raise FileCachingException(
+                'Cache partition file %s is bigger than the maximum cache '
+                'size.' % filename
+            )
+
+        with transaction.atomic():
+            partition_file = self.files.create(
+                file_size=file_size, filename=filename
+            )
+            CachePartitionFile.objects.filter(pk=partition_file.pk).update(
+                eviction_priority=GreedyDualSizeFrequencyEvictionPolicy.get_priority_expression(
+                    file_size=Value(file_size), hits=F('hits')
+                )
+            )
+            self.cache._update_total_size(amount=file_size)
+            self.cache._storage_rename(
+                name=temporary_filename, new_name=partition_file.full_filename
+            )
+
+        return partition_file
+
     @contextmanager
     def create_file(self, filename):
+        """
+        The file is written to a temporary name and published when
+        complete. Published files are never modified and are read without
+        locking, the lock only keeps concurrent callers from generating the
+        same file.
+        """
         lock_name = self.get_file_lock_name(filename=filename)
         try:
             logger.debug('trying to acquire lock: %s', lock_name)
@@ -233,37 +584,40 @@ class CachePartition(models.Model):
 
                 # Since open "wb+" doesn't create files, force the creation
                 # of an empty file.
-                self.cache.storage.delete(
-                    name=self.get_full_filename(filename=filename)
-                )
-                self.cache.storage.save(
-                    name=self.get_full_filename(filename=filename),
+                temporary_filename = self.cache.storage.save(
+                    name=self.get_temporary_filename(filename=filename),
                     content=ContentFile(content='')
                 )
 
-                partition_file = None
-
                 try:
-                    partition_file = self.files.create(filename=filename)
-                    yield partition_file._open_for_writing(_acquire_lock=False)
+                    with self.cache.storage.open(mode='wb', name=temporary_filename) as file_object:
+                        yield file_object
+
+                    partition_file = self._publish_file(
+                        filename=filename,
+                        temporary_filename=temporary_filename
+                    )
                 except Exception as exception:
                     logger.error(
                         'Unexpected exception while trying to save new '
                         'cache file; %s', exception, exc_info=True
                     )
-                    if partition_file:
-                        partition_file.delete(_acquire_lock=False)
-                    else:
-                        # If the CachePartitionFile entry was not created
-                        # do manual clean up of the empty storage file
-                        # created with the previous`self.cache.storage.save`.
-                        self.cache.storage.delete(
-                            name=self.get_full_filename(filename=filename)
-                        )
+                    self.cache.storage.delete(name=temporary_filename)
                     raise
                 else:
-                    partition_file.close(_acquire_lock=False)
-                    partition_file._update_size(_acquire_lock=False)
+                    CacheMetrics.generation_end(
+                        cache_id=self.cache_id, cache_partition_id=self.pk,
+                        filename=filename
+                    )
+
+                    if CacheMemoryTier.accepts(file_size=partition_file.file_size):
+                        with self.cache.storage.open(mode='rb', name=partition_file.full_filename) as file_object:
+                            CacheMemoryTier.add(
+                                cache_partition_file_id=partition_file.pk,
+                                cache_partition_id=self.pk,
+                                content=file_object.read(),
+                                filename=filename
+                            )
             finally:
                 lock.release()
         except LockError:
@@ -275,7 +629,31 @@ class CachePartition(models.Model):
         return super().delete(*args, **kwargs)
 
     def get_file(self, filename):
-        return self.files.get(filename=filename)
+        """
+        Files in the memory tier are returned without querying the
+        database, with only the fields needed to open them.
+        """
+        entry = CacheMemoryTier.get(
+            cache_partition_id=self.pk, filename=filename
+        )
+
+        if entry:
+            cache_partition_file_id, content = entry
+            cache_partition_file = CachePartitionFile(
+                file_size=len(content), filename=filename,
+                partition=self, pk=cache_partition_file_id
+            )
+            cache_partition_file._state.adding = False
+            return cache_partition_file
+        else:
+            try:
+                return self.files.get(filename=filename)
+            except CachePartitionFile.DoesNotExist:
+                CacheMetrics.add(cache_id=self.cache_id, name=METRIC_MISSES)
+                CacheMetrics.generation_start(
+                    cache_partition_id=self.pk, filename=filename
+                )
+                raise
 
     def get_file_lock_name(self, filename):
         return 'cache_partition-file-{}-{}-{}'.format(
@@ -287,19 +665,23 @@ class CachePartition(models.Model):
             parent=self.name, filename=filename
         )
 
+    def get_temporary_filename(self, filename):
+        return '{}.{}{}'.format(
+            self.get_full_filename(filename=filename), uuid.uuid4().hex,
+            CACHE_TEMPORARY_FILENAME_SUFFIX
+        )
+
     @method_event(
         event=event_cache_partition_purged,
         event_manager_class=EventManagerMethodAfter,
         target='self'
     )
     def purge(self):
-        for parition_file in self.files.all():
-            parition_file.delete()
+        self.files.purge()
+        CacheMemoryTier.invalidate(cache_partition_id=self.pk)
 
 
 class CachePartitionFile(models.Model):
-    _storage_object = None
-
     partition = models.ForeignKey(
         on_delete=models.CASCADE, related_name='files',
         to=CachePartition, verbose_name=_('Cache partition')
@@ -307,16 +689,31 @@ class CachePartitionFile(models.Model):
     datetime = models.DateTimeField(
         auto_now_add=True, db_index=True, verbose_name=_('Date time')
     )
+    datetime_accessed = models.DateTimeField(
+        blank=True, db_index=True, editable=False, help_text=_(
+            'Date and time of the last access. Accesses are buffered and '
+            'written periodically.'
+        ), null=True, verbose_name=_('Date time accessed')
+    )
+    eviction_priority = models.FloatField(
+        db_index=True, default=0, editable=False, help_text=_(
+            'Value of the file for the greedy dual size frequency eviction '
+            'policy. Updated with the hits.'
+        ), verbose_name=_('Eviction priority')
+    )
     filename = models.CharField(max_length=255, verbose_name=_('Filename'))
     file_size = models.PositiveIntegerField(
         default=0, verbose_name=_('File size')
     )
     hits = models.PositiveIntegerField(
         db_index=True, default=0, help_text=_(
-            'Times this cache partition file has been accessed.'
+            'Times this cache partition file has been accessed. Accesses '
+            'are buffered and written periodically.'
         ), verbose_name='Hits'
     )
 
+    objects = CachePartitionFileQuerySet.as_manager()
+
     class Meta:
         get_latest_by = 'datetime'
         unique_together = ('partition', 'filename')
@@ -326,49 +723,49 @@ class CachePartitionFile(models.Model):
     def _lock_manager_get_lock_name(self, *args, **kwargs):
         return self.partition.get_file_lock_name(filename=self.filename)
 
-    @acquire_lock_class_method
-    def _open_for_writing(self):
-        """
-        Open the file for writing only. If the file is written to, the
-        .update_size() must be called.
-        """
-        try:
-            self._storage_object = self.partition.cache.storage.open(
-                mode='wb', name=self.full_filename
-            )
-            return self._storage_object
-        except Exception as exception:
-            logger.error(
-                'Unexpected exception opening the cache file; %s', exception,
-                exc_info=True
+    def _record_access(self):
+        CachePartitionFileAccessBuffer.add(cache_partition_file_id=self.pk)
+        CacheMetrics.add(cache_id=self.partition.cache_id, name=METRIC_HITS)
+        CacheMetrics.add(
+            cache_id=self.partition.cache_id, name=METRIC_BYTES_SERVED,
+            value=self.file_size
+        )
+
+        if logger_trace.isEnabledFor(level=logging.DEBUG):
+            logger_trace.debug(
+                '%d %s %d', self.partition.cache_id, self.full_filename,
+                self.file_size
             )
-            raise
 
     @locked_class_method
-    def _update_size(self):
-        """
-        Called after creation and initial write only.
-        """
-        self.file_size = self.partition.cache.storage.size(
-            name=self.full_filename
+    def delete(self, *args, **kwargs):
+        CacheMemoryTier.invalidate(
+            cache_partition_id=self.partition_id, filename=self.filename
         )
-        self.save()
-        if self.file_size > self.partition.cache.maximum_size:
-            raise FileCachingException(
-                'Cache partition file %s is bigger than the maximum cache '
-                'size.'
-            )
 
-    @release_lock_class_method
-    def close(self):
-        if self._storage_object is not None:
-            self._storage_object.close()
-        self._storage_object = None
+        # Remove the entry first for readers not to find the entry of a
+        # file no longer in the storage.
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            # Only discount the size if this call deleted the entry.
+            if result[0]:
+                self.partition.cache._update_total_size(
+                    amount=-self.file_size
+                )
 
-    @locked_class_method
-    def delete(self, *args, **kwargs):
         self.partition.cache.storage.delete(name=self.full_filename)
-        return super().delete(*args, **kwargs)
+
+        if result[0]:
+            CacheMetrics.add(
+                cache_id=self.partition.cache_id, label=EVICTION_REASON_DELETE,
+                name=METRIC_EVICTIONS
+            )
+            CacheMetrics.add(
+                cache_id=self.partition.cache_id, label=EVICTION_REASON_DELETE,
+                name=METRIC_EVICTED_BYTES, value=self.file_size
+            )
+
+        return result
 
     @cached_property
     def full_filename(self):
@@ -379,31 +776,47 @@ class CachePartitionFile(models.Model):
     @contextmanager
     def open(self):
         """
-        Open the file for reading only.
+        Open the file for reading only. Published files are never modified
+        and are read without locking. Files in the memory tier are returned
+        from memory.
         """
-        lock_name = self._lock_manager_get_lock_name()
+        entry = CacheMemoryTier.get(
+            cache_partition_id=self.partition_id, filename=self.filename
+        )
+
+        if entry:
+            self._record_access()
+            yield File(
+                file=io.BytesIO(initial_bytes=entry[1]),
+                name=self.full_filename
+            )
+            return
+
+        self._record_access()
         try:
-            logger.debug('trying to acquire lock: %s', lock_name)
-            self._lock = LockingBackend.get_backend().acquire_lock(name=lock_name)
-            CachePartitionFile.objects.filter(pk=self.pk).update(hits=F('hits') + 1)
-            logger.debug('acquired lock: %s', lock_name)
-            self._storage_object = None
-            try:
-                self._storage_object = self.partition.cache.storage.open(
-                    mode='rb', name=self.full_filename
+            storage_object = self.partition.cache.storage.open(
+                mode='rb', name=self.full_filename
+            )
+        except Exception as exception:
+            logger.error(
+                'Unexpected exception opening the cache file; %s', exception,
+                exc_info=True
+            )
+            raise
+
+        try:
+            if CacheMemoryTier.accepts(file_size=self.file_size):
+                content = storage_object.read()
+                CacheMemoryTier.add(
+                    cache_partition_file_id=self.pk,
+                    cache_partition_id=self.partition_id, content=content,
+                    filename=self.filename
                 )
-            except Exception as exception:
-                logger.error(
-                    'Unexpected exception opening the cache file; %s', exception,
-                    exc_info=True
+                yield File(
+                    file=io.BytesIO(initial_bytes=content),
+                    name=self.full_filename
                 )
-                raise
             else:
-                yield self._storage_object
-                self.close(_acquire_lock=False)
-            finally:
-                self.close(_acquire_lock=False)
-                self._lock.release()
-        except LockError:
-            logger.debug('unable to obtain lock: %s' % lock_name)
-            raise
+                yield storage_object
+        finally:
+            storage_object.close()
@@ -1,12 +1,20 @@
+from datetime import timedelta
+
 from django.utils.translation import ugettext_lazy as _
 
 from mayan.apps.common.queues import queue_tools
 from mayan.apps.task_manager.classes import CeleryQueue
 from mayan.apps.task_manager.workers import worker_b
 
+from .literals import ACCESS_FLUSH_INTERVAL
+
 queue_file_caching = CeleryQueue(
     name='file_caching', label=_('File caching'), worker=worker_b
 )
+queue_file_caching_periodic = CeleryQueue(
+    label=_('File caching periodic'), name='file_caching_periodic',
+    transient=True, worker=worker_b
+)
 
 queue_file_caching.add_task_type(
     dotted_path='mayan.apps.file_caching.tasks.task_cache_partition_purge',
@@ -17,3 +25,10 @@ queue_tools.add_task_type(
     dotted_path='mayan.apps.file_caching.tasks.task_cache_purge',
     label=_('Purge a file cache')
 )
+
+queue_file_caching_periodic.add_task_type(
+    dotted_path='mayan.apps.file_caching.tasks.task_cache_partition_file_access_flush',
+    label=_('Write the buffered cache file accesses and metrics'),
+    name='task_cache_partition_file_access_flush',
+    schedule=timedelta(seconds=ACCESS_FLUSH_INTERVAL)
+)
@@ -4,7 +4,8 @@ from mayan.apps.smart_settings.classes import SettingNamespace
 
 from .literals import (
     DEFAULT_MAXIMUM_FAILED_PRUNE_ATTEMPTS,
-    DEFAULT_MAXIMUM_NORMAL_PRUNE_ATTEMPTS
+    DEFAULT_MAXIMUM_NORMAL_PRUNE_ATTEMPTS,
+    DEFAULT_MEMORY_TIER_MAXIMUM_FILE_SIZE, DEFAULT_MEMORY_TIER_MAXIMUM_SIZE
 )
 
 namespace = SettingNamespace(label=_('File caching'), name='file_caching')
@@ -24,3 +25,18 @@ setting_maximum_normal_prune_attempts = namespace.add_setting(
         'space for new a file being requested, before giving up.'
     )
 )
+setting_memory_tier_maximum_file_size = namespace.add_setting(
+    default=DEFAULT_MEMORY_TIER_MAXIMUM_FILE_SIZE,
+    global_name='FILE_CACHING_MEMORY_TIER_MAXIMUM_FILE_SIZE', help_text=_(
+        'Size in bytes of the largest cache file that will be kept in the '
+        'memory tier.'
+    )
+)
+setting_memory_tier_maximum_size = namespace.add_setting(
+    default=DEFAULT_MEMORY_TIER_MAXIMUM_SIZE,
+    global_name='FILE_CACHING_MEMORY_TIER_MAXIMUM_SIZE', help_text=_(
+        'Size in bytes of the memory each process will use to keep the '
+        'content of small cache files, avoiding the database and storage '
+        'access when they are read again. Use 0 to disable the memory tier.'
+    )
+)
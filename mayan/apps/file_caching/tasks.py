@@ -6,9 +6,17 @@ from django.contrib.auth import get_user_model
 from mayan.apps.lock_manager.exceptions import LockError
 from mayan.celery import app
 
+from .classes import CacheMetrics, CachePartitionFileAccessBuffer
+
 logger = logging.getLogger(name=__name__)
 
 
+@app.task(ignore_result=True)
+def task_cache_partition_file_access_flush():
+    CachePartitionFileAccessBuffer.flush()
+    CacheMetrics.flush()
+
+
 @app.task(bind=True, ignore_result=True)
 def task_cache_partition_purge(
     self, cache_partition_id, content_type_id=None, object_id=None,
@@ -63,7 +71,6 @@ def task_cache_purge(self, cache_id, user_id=None):
     logger.info('Starting cache id %s purge', cache)
     try:
         cache._event_actor = user
-        cache._event_keep_attributes = ('_event_actor',)
         cache.purge()
     except LockError as exception:
         raise self.retry(exc=exception)
@@ -3,8 +3,14 @@ from django.utils.encoding import force_bytes
 from mayan.apps.storage.classes import DefinedStorage
 from mayan.apps.storage.utils import fs_cleanup, mkdtemp
 
+from ..classes import (
+    CacheMemoryTier, CacheMetrics, CachePartitionFileAccessBuffer
+)
 from ..models import Cache
-from ..tasks import task_cache_partition_purge, task_cache_purge
+from ..tasks import (
+    task_cache_partition_file_access_flush, task_cache_partition_purge,
+    task_cache_purge
+)
 
 from .literals import (
     TEST_CACHE_MAXIMUM_SIZE, TEST_CACHE_PARTITION_FILE_FILENAME,
@@ -21,6 +27,11 @@ class CachePartitionViewTestMixin:
         )
 
 
+class CacheAPIViewTestMixin:
+    def _request_test_cache_metric_list_api_view(self):
+        return self.get(viewname='rest_api:cache-metric-list')
+
+
 class CacheTestMixin:
     def setUp(self):
         super().setUp()
@@ -32,6 +43,11 @@ class CacheTestMixin:
             kwargs={'location': self.temporary_directory}
         )
         self.test_cache_partition_files = []
+        # Accesses, files and counters kept in memory by previous tests
+        # could match the ids of the new objects or reference deleted ones.
+        CacheMemoryTier.clear()
+        CacheMetrics.clear()
+        CachePartitionFileAccessBuffer.clear()
 
     def tearDown(self):
         fs_cleanup(filename=self.temporary_directory)
@@ -100,6 +116,9 @@ class CacheViewTestMixin:
 
 
 class FileCachingTaskTestMixin:
+    def _execute_task_cache_partition_file_access_flush(self):
+        task_cache_partition_file_access_flush.apply_async().get()
+
     def _execute_task_cache_partition_purge(self):
         task_cache_partition_purge.apply_async(
             kwargs={
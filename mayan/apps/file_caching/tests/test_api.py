@@ -0,0 +1,60 @@
+from rest_framework import status
+
+from mayan.apps.rest_api.tests.base import BaseAPITestCase
+
+from ..permissions import permission_cache_view
+
+from .mixins import CacheAPIViewTestMixin, CacheTestMixin
+
+
+class CacheMetricAPIViewTestCase(
+    CacheAPIViewTestMixin, CacheTestMixin, BaseAPITestCase
+):
+    def setUp(self):
+        super().setUp()
+        self._create_test_cache()
+        self._create_test_cache_partition()
+        self._create_test_cache_partition_file()
+
+        with self.test_cache_partition_file.open():
+            """Record a hit."""
+
+    def test_cache_metric_list_api_view_no_permission(self):
+        self._clear_events()
+
+        response = self._request_test_cache_metric_list_api_view()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn(
+            'cache="{}"'.format(self.test_cache.pk),
+            response.content.decode()
+        )
+
+        events = self._get_test_events()
+        self.assertEqual(events.count(), 0)
+
+    def test_cache_metric_list_api_view_with_access(self):
+        self.grant_access(
+            obj=self.test_cache, permission=permission_cache_view
+        )
+
+        self._clear_events()
+
+        response = self._request_test_cache_metric_list_api_view()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+        content = response.content.decode()
+        labels = '{{cache="{}",storage="{}"}}'.format(
+            self.test_cache.pk, self.test_cache.defined_storage_name
+        )
+        self.assertIn(
+            'mayan_file_caching_hits_total{} 1.0'.format(labels), content
+        )
+        self.assertIn(
+            'mayan_file_caching_served_bytes_total{} {}'.format(
+                labels, float(self.test_cache_partition_file.file_size)
+            ), content
+        )
+
+        events = self._get_test_events()
+        self.assertEqual(events.count(), 0)
@@ -0,0 +1,79 @@
+import io
+
+from mayan.apps.testing.tests.base import BaseTestCase
+
+from ..classes import CacheEvictionSimulator, CacheMemoryTier
+from ..settings import setting_memory_tier_maximum_size
+
+
+class CacheEvictionSimulatorTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # A file popular in the past followed by a working set that only
+        # fits if the old file is evicted.
+        self.test_trace = [('a', 1)] * 10 + [('b', 1), ('c', 1)] * 10
+
+    def _replay_test_trace(self, policy_name):
+        return CacheEvictionSimulator(
+            maximum_size=2, policy_name=policy_name
+        ).replay(trace=self.test_trace)
+
+    def test_read_trace(self):
+        file_object = io.StringIO(
+            '2021-01-01 DEBUG 1 partition-a 10\n'
+            '1 partition-b 20\n'
+            '2 partition-c 30\n'
+            'invalid\n'
+        )
+
+        self.assertEqual(
+            list(
+                CacheEvictionSimulator.read_trace(
+                    cache_id=1, file_object=file_object
+                )
+            ), [('partition-a', 10), ('partition-b', 20)]
+        )
+
+    def test_replay_lfu(self):
+        results = self._replay_test_trace(policy_name='lfu')
+
+        self.assertEqual(results['requests'], 30)
+        # Only the popular file hits, the working set trashes.
+        self.assertEqual(results['hits'], 9)
+
+    def test_replay_lru(self):
+        results = self._replay_test_trace(policy_name='lru')
+
+        self.assertEqual(results['hits'], 27)
+        self.assertEqual(results['evictions'], 1)
+        self.assertEqual(results['hit_rate'], 27 / 30)
+
+
+class CacheMemoryTierTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        CacheMemoryTier.clear()
+        setting_memory_tier_maximum_size.set(value=10)
+
+    def tearDown(self):
+        CacheMemoryTier.clear()
+        super().tearDown()
+
+    def test_least_recently_used_eviction(self):
+        for filename in ('a', 'b'):
+            CacheMemoryTier.add(
+                cache_partition_file_id=1, cache_partition_id=1,
+                content=b'12345', filename=filename
+            )
+
+        CacheMemoryTier.get(cache_partition_id=1, filename='a')
+        CacheMemoryTier.add(
+            cache_partition_file_id=1, cache_partition_id=1,
+            content=b'12345', filename='c'
+        )
+
+        self.assertTrue(CacheMemoryTier.get(cache_partition_id=1, filename='a'))
+        self.assertFalse(CacheMemoryTier.get(cache_partition_id=1, filename='b'))
+        self.assertEqual(
+            CacheMemoryTier.get_statistics(), {'count': 2, 'size': 10}
+        )
@@ -0,0 +1,35 @@
+from io import StringIO
+
+from django.core import management
+
+from mayan.apps.storage.utils import NamedTemporaryFile
+from mayan.apps.testing.tests.base import BaseTestCase
+
+
+class SimulateCacheEvictionManagementCommandTestCase(BaseTestCase):
+    def _call_command(self, trace, policies=None):
+        with NamedTemporaryFile(mode='w') as file_object:
+            file_object.write(trace)
+            file_object.flush()
+
+            stdout = StringIO()
+            management.call_command(
+                'simulatecacheeviction', file_object.name, maximum_size=2,
+                policies=policies, stdout=stdout
+            )
+
+        return stdout.getvalue()
+
+    def test_simulate_all_policies(self):
+        output = self._call_command(trace='1 partition-a 1\n' * 4)
+
+        for policy_name in ('gdsf', 'lfu', 'lru', 'tinylfu'):
+            self.assertIn(policy_name, output)
+
+    def test_simulate_policy(self):
+        output = self._call_command(
+            policies=['lru'], trace='1 partition-a 1\n' * 4
+        )
+
+        self.assertIn('75.00%', output)
+        self.assertNotIn('lfu', output)
@@ -2,8 +2,17 @@ import mock
 
 from mayan.apps.testing.tests.base import BaseTestCase
 
+from ..classes import (
+    CacheMemoryTier, CacheMetrics, CachePartitionFileAccessBuffer
+)
 from ..exceptions import FileCachingException
-from ..models import CachePartitionFile
+from ..literals import (
+    EVICTION_REASON_DELETE, EVICTION_REASON_PRUNE, EVICTION_REASON_PURGE,
+    METRIC_BYTES_SERVED, METRIC_EVICTED_BYTES, METRIC_EVICTIONS,
+    METRIC_GENERATION_COUNT, METRIC_HITS, METRIC_MISSES, METRIC_PRUNE_COUNT
+)
+from ..models import Cache, CacheMetric, CachePartitionFile
+from ..settings import setting_memory_tier_maximum_size
 
 from .literals import TEST_CACHE_PARTITION_FILE_FILENAME
 from .mixins import CacheTestMixin
@@ -103,9 +112,41 @@ class CacheModelTestCase(CacheTestMixin, BaseTestCase):
 
         self.test_cache_partition_file.refresh_from_db()
 
+        # Hits are buffered until flushed.
+        self.assertEqual(
+            self.test_cache_partition_file.hits, cache_partition_file_hits
+        )
+        self.assertEqual(CachePartitionFileAccessBuffer.flush(), 1)
+
+        self.test_cache_partition_file.refresh_from_db()
+
         self.assertEqual(
             self.test_cache_partition_file.hits, cache_partition_file_hits + 1
         )
+        self.assertTrue(self.test_cache_partition_file.datetime_accessed)
+
+    def test_cache_partition_file_hits_flush_bulk(self):
+        self._create_test_cache()
+        self._create_test_cache_partition()
+        self._create_test_cache_partition_file()
+        self._create_test_cache_partition_file()
+
+        for count in range(3):
+            with self.test_cache_partition_files[0].open():
+                """Do nothing"""
+
+        with self.test_cache_partition_files[1].open():
+            """Do nothing"""
+
+        # A single update between the transaction savepoint queries.
+        with self.assertNumQueries(3):
+            CachePartitionFileAccessBuffer.flush()
+
+        for cache_partition_file in self.test_cache_partition_files:
+            cache_partition_file.refresh_from_db()
+
+        self.assertEqual(self.test_cache_partition_files[0].hits, 3)
+        self.assertEqual(self.test_cache_partition_files[1].hits, 1)
 
     def test_cache_partition_file_lru_eviction(self):
         self._create_test_cache(
@@ -174,16 +215,385 @@ class CacheModelTestCase(CacheTestMixin, BaseTestCase):
         with self.test_cache_partition_files[1].open():
             """Increase hits of file #1"""
 
-        with self.test_cache_partition_files[0].open():
-            """Lock and increase hits of file #0"""
+        with self.test_cache_partition_files[0].open() as file_object:
+            """
+            Increase hits of file #0. Reads do not lock, the open file is
+            evicted and remains readable.
+            """
             self._create_test_cache_partition_file(file_size=1)
+            self.assertEqual(file_object.read(), b' ')
 
         self.assertTrue(
-            self.test_cache_partition_files[0] in CachePartitionFile.objects.all()
+            self.test_cache_partition_files[0] not in CachePartitionFile.objects.all()
         )
         self.assertTrue(
-            self.test_cache_partition_files[1] not in CachePartitionFile.objects.all()
+            self.test_cache_partition_files[1] in CachePartitionFile.objects.all()
         )
         self.assertTrue(
             self.test_cache_partition_files[2] in CachePartitionFile.objects.all()
         )
+
+    def test_cache_eviction_policy_gdsf(self):
+        self._create_test_cache(
+            extra_data={
+                'eviction_policy': 'gdsf', 'maximum_size': 9
+            }
+        )
+
+        self._create_test_cache_partition()
+        self._create_test_cache_partition_file(file_size=1)
+        self._create_test_cache_partition_file(file_size=8)
+        self._create_test_cache_partition_file(file_size=1)
+
+        # The largest file was evicted even if it is newer.
+        self.assertEqual(
+            set(CachePartitionFile.objects.all()), {
+                self.test_cache_partition_files[0],
+                self.test_cache_partition_files[2]
+            }
+        )
+
+        self.test_cache.refresh_from_db()
+        self.assertEqual(self.test_cache.eviction_clock, 1 / 8)
+
+    def test_cache_eviction_policy_lru(self):
+        self._create_test_cache(
+            extra_data={
+                'eviction_policy': 'lru', 'maximum_size': 2
+            }
+        )
+
+        self._create_test_cache_partition()
+        self._create_test_cache_partition_file(file_size=1)
+        self._create_test_cache_partition_file(file_size=1)
+
+        for count in range(2):
+            with self.test_cache_partition_files[0].open():
+                """Do nothing"""
+
+        with self.test_cache_partition_files[1].open():
+            """Do nothing"""
+
+        self._create_test_cache_partition_file(file_size=1)
+
+        # More hits but accessed less recently.
+        self.assertTrue(
+            self.test_cache_partition_files[0] not in CachePartitionFile.objects.all()
+        )
+        self.assertTrue(
+            self.test_cache_partition_files[1] in CachePartitionFile.objects.all()
+        )
+
+    def test_cache_eviction_policy_tinylfu(self):
+        self._create_test_cache(
+            extra_data={
+                'eviction_policy': 'tinylfu', 'maximum_size': 3
+            }
+        )
+
+        self._create_test_cache_partition()
+        self._create_test_cache_partition_file(file_size=1)
+        self._create_test_cache_partition_file(file_size=1)
+
+        for count in range(30):
+            with self.test_cache_partition_files[0].open():
+                """Do nothing"""
+
+        self._create_test_cache_partition_file(file_size=1)
+        self._create_test_cache_partition_file(file_size=1)
+
+        # The newest file is in the window and was not evicted.
+        self.assertEqual(
+            set(CachePartitionFile.objects.all()), {
+                self.test_cache_partition_files[0],
+                self.test_cache_partition_files[2],
+                self.test_cache_partition_files[3]
+            }
+        )
+
+        # The hits were aged.
+        self.test_cache_partition_files[0].refresh_from_db()
+        self.assertEqual(self.test_cache_partition_files[0].hits, 15)
+
+    def test_cache_partition_file_purge_during_creation(self):
+        self._create_test_cache()
+        self._create_test_cache_partition()
+
+        with self.test_cache_partition.create_file(filename=TEST_CACHE_PARTITION_FILE_FILENAME) as file_object:
+            file_object.write(b'test')
+            # Files being created are not visible, the purge does not
+            # affect them.
+            self.test_cache_partition.purge()
+
+        self.assertEqual(self.test_cache_partition.files.count(), 1)
+        self.assertEqual(self.test_cache.get_total_size(), 4)
+
+    def test_cache_partition_file_publish(self):
+        self._create_test_cache()
+        self._create_test_cache_partition()
+
+        with self.test_cache_partition.create_file(filename=TEST_CACHE_PARTITION_FILE_FILENAME) as file_object:
+            file_object.write(b'test')
+
+            self.assertEqual(self.test_cache_partition.files.count(), 0)
+            self.assertFalse(
+                self.test_cache.storage.exists(
+                    name=self.test_cache_partition.get_full_filename(
+                        filename=TEST_CACHE_PARTITION_FILE_FILENAME
+                    )
+                )
+            )
+
+        self.assertEqual(
+            self.test_cache.storage.listdir(path='')[1], [
+                self.test_cache_partition.get_full_filename(
+                    filename=TEST_CACHE_PARTITION_FILE_FILENAME
+                )
+            ]
+        )
+
+        cache_partition_file = self.test_cache_partition.get_file(
+            filename=TEST_CACHE_PARTITION_FILE_FILENAME
+        )
+        self.assertEqual(cache_partition_file.file_size, 4)
+
+        with mock.patch('mayan.apps.lock_manager.backends.base.LockingBackend.get_backend') as mock_get_backend:
+            with cache_partition_file.open() as file_object:
+                self.assertEqual(file_object.read(), b'test')
+
+        self.assertFalse(mock_get_backend.called)
+
+    def test_cache_partition_file_queryset_purge(self):
+        self._create_test_cache()
+        self._create_test_cache_partition()
+        self._create_test_cache_partition_file(file_size=3)
+        test_cache_partition = self.test_cache_partition
+        self.test_cache_partition = self.test_cache.partitions.create(
+            name='test partition 2'
+        )
+        self._create_test_cache_partition_file(file_size=5)
+        self._create_test_cache_partition_file(file_size=7)
+
+        self.assertEqual(
+            CachePartitionFile.objects.filter(
+                partition__in=(test_cache_partition, self.test_cache_partition)
+            ).purge(), 3
+        )
+
+        self.assertEqual(CachePartitionFile.objects.count(), 0)
+        self.assertEqual(self.test_cache.get_total_size(), 0)
+        for cache_partition_file in self.test_cache_partition_files:
+            self.assertFalse(
+                self.test_cache.storage.exists(
+                    name=cache_partition_file.full_filename
+                )
+            )
+
+    def test_cache_total_size_counter(self):
+        self._create_test_cache()
+        self._create_test_cache_partition()
+        self._create_test_cache_partition_file(file_size=3)
+        self._create_test_cache_partition_file(file_size=5)
+
+        self.assertEqual(self.test_cache.get_total_size(), 8)
+
+        cache_partition_file_stale = CachePartitionFile.objects.get(
+            pk=self.test_cache_partition_files[0].pk
+        )
+
+        self.test_cache_partition_files[0].delete()
+        self.assertEqual(self.test_cache.get_total_size(), 5)
+
+        # Deleting an already deleted entry must not discount it again.
+        cache_partition_file_stale.delete()
+        self.assertEqual(self.test_cache.get_total_size(), 5)
+
+        self.test_cache.purge()
+        self.assertEqual(self.test_cache.get_total_size(), 0)
+
+    def test_cache_total_size_counter_stale_save(self):
+        self._create_test_cache()
+        self._create_test_cache_partition()
+        self._create_test_cache_partition_file(file_size=3)
+
+        self.test_cache.maximum_size = self.test_cache.maximum_size + 1
+        self.test_cache.save()
+
+        self.assertEqual(self.test_cache.get_total_size(), 3)
+
+    def test_cache_prune_batch(self):
+        self._create_test_cache(
+            extra_data={
+                'maximum_size': 4
+            }
+        )
+
+        self._create_test_cache_partition()
+        self._create_test_cache_partition_file(file_size=1)
+        self._create_test_cache_partition_file(file_size=1)
+        self._create_test_cache_partition_file(file_size=2)
+
+        self.test_cache.maximum_size = 3
+        self.test_cache.save()
+
+        # The two oldest files are deleted in a single batch.
+        self.assertEqual(
+            list(CachePartitionFile.objects.all()),
+            [self.test_cache_partition_files[2]]
+        )
+        self.assertEqual(self.test_cache.get_total_size(), 2)
+        self.assertFalse(
+            self.test_cache.storage.exists(
+                name=self.test_cache_partition_files[0].full_filename
+            )
+        )
+
+
+class CacheMemoryTierModelTestCase(CacheTestMixin, BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        setting_memory_tier_maximum_size.set(value=1024)
+        self._create_test_cache()
+        self._create_test_cache_partition()
+
+    def test_disabled(self):
+        setting_memory_tier_maximum_size.set(value=0)
+        self._create_test_cache_partition_file(file_size=100)
+
+        self.assertEqual(CacheMemoryTier.get_statistics()['count'], 0)
+
+    def test_file_create_write_through(self):
+        self._create_test_cache_partition_file(file_size=100)
+
+        self.assertEqual(
+            CacheMemoryTier.get_statistics(), {
+                'count': 1, 'size': 100
+            }
+        )
+
+        with self.assertNumQueries(0):
+            cache_partition_file = self.test_cache_partition.get_file(
+                filename=self.test_cache_partition_file.filename
+            )
+
+            with cache_partition_file.open() as file_object:
+                self.assertEqual(
+                    file_object.read(), b' ' * 100
+                )
+
+        self.assertEqual(cache_partition_file, self.test_cache_partition_file)
+
+        CachePartitionFileAccessBuffer.flush()
+        self.test_cache_partition_file.refresh_from_db()
+        self.assertEqual(self.test_cache_partition_file.hits, 1)
+
+    def test_file_open_read_through(self):
+        self._create_test_cache_partition_file(file_size=100)
+        CacheMemoryTier.clear()
+
+        with self.test_cache_partition_file.open() as file_object:
+            file_object.read()
+
+        self.assertEqual(CacheMemoryTier.get_statistics()['count'], 1)
+
+    def test_file_size_limit(self):
+        self._create_test_cache_partition_file(file_size=1025)
+
+        self.assertEqual(CacheMemoryTier.get_statistics()['count'], 0)
+
+    def test_file_delete_invalidation(self):
+        self._create_test_cache_partition_file(file_size=100)
+        self.test_cache_partition_file.delete()
+
+        self.assertEqual(CacheMemoryTier.get_statistics()['count'], 0)
+        with self.assertRaises(CachePartitionFile.DoesNotExist):
+            self.test_cache_partition.get_file(
+                filename=self.test_cache_partition_file.filename
+            )
+
+    def test_partition_purge_invalidation(self):
+        self._create_test_cache_partition_file(file_size=100)
+        self._create_test_cache_partition_file(file_size=100)
+
+        self.test_cache_partition.purge()
+
+        self.assertEqual(
+            CacheMemoryTier.get_statistics(), {'count': 0, 'size': 0}
+        )
+
+
+class CacheMetricModelTestCase(CacheTestMixin, BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self._create_test_cache()
+        self._create_test_cache_partition()
+
+    def test_evictions(self):
+        self._create_test_cache_partition_file(file_size=100)
+        self._create_test_cache_partition_file(file_size=100)
+        self._create_test_cache_partition_file(file_size=100)
+
+        self.test_cache_partition_files[0].delete()
+        self.test_cache.maximum_size = 150
+        self.test_cache.save()
+        self.test_cache_partition.purge()
+
+        metrics = self.test_cache.get_metrics()
+        for reason in (
+            EVICTION_REASON_DELETE, EVICTION_REASON_PRUNE,
+            EVICTION_REASON_PURGE
+        ):
+            self.assertEqual(metrics[(METRIC_EVICTIONS, reason)], 1)
+            self.assertEqual(
+                metrics[(METRIC_EVICTED_BYTES, reason)], 100
+            )
+        self.assertEqual(metrics[(METRIC_PRUNE_COUNT, '')], 1)
+
+    def test_hits_and_misses(self):
+        with self.assertRaises(CachePartitionFile.DoesNotExist):
+            self.test_cache_partition.get_file(
+                filename=TEST_CACHE_PARTITION_FILE_FILENAME
+            )
+
+        self._create_test_cache_partition_file(
+            filename=TEST_CACHE_PARTITION_FILE_FILENAME
+        )
+
+        with self.test_cache_partition.get_file(filename=TEST_CACHE_PARTITION_FILE_FILENAME).open():
+            """Record a hit."""
+
+        metrics = self.test_cache.get_metrics()
+        self.assertEqual(metrics[(METRIC_HITS, '')], 1)
+        self.assertEqual(metrics[(METRIC_MISSES, '')], 1)
+        self.assertEqual(
+            metrics[(METRIC_BYTES_SERVED, '')],
+            self.test_cache_partition_file.file_size
+        )
+        self.assertEqual(metrics[(METRIC_GENERATION_COUNT, '')], 1)
+        self.assertEqual(self.test_cache.metrics.count(), 5)
+
+    def test_flush_accumulates(self):
+        CacheMetrics.add(cache_id=self.test_cache.pk, name=METRIC_HITS)
+        CacheMetrics.flush()
+        CacheMetrics.add(cache_id=self.test_cache.pk, name=METRIC_HITS)
+        CacheMetrics.flush()
+
+        self.assertEqual(
+            self.test_cache.metrics.get(name=METRIC_HITS).value, 2
+        )
+
+    def test_flush_deleted_cache(self):
+        test_cache_id = self.test_cache.pk
+        CacheMetrics.add(cache_id=test_cache_id, name=METRIC_HITS)
+        Cache.objects.filter(pk=test_cache_id).delete()
+        CacheMetrics.flush()
+
+        self.assertFalse(
+            CacheMetric.objects.filter(cache_id=test_cache_id).exists()
+        )
+
+    def test_delete_discards_values(self):
+        CacheMetrics.add(cache_id=self.test_cache.pk, name=METRIC_HITS)
+        self.test_cache.delete()
+
+        self.assertEqual(CacheMetrics._values, {})
@@ -36,15 +36,20 @@ class FileCachingTaskTestCase(
 
         self.assertEqual(self.test_cache_partition.files.count(), 0)
 
+        # The partitions are purged in bulk, without their events.
         events = self._get_test_events()
-        self.assertEqual(events.count(), 2)
+        self.assertEqual(events.count(), 1)
 
         self.assertEqual(events[0].action_object, None)
-        self.assertEqual(events[0].actor, self.test_cache_partition)
-        self.assertEqual(events[0].target, self.test_cache_partition)
-        self.assertEqual(events[0].verb, event_cache_partition_purged.id)
+        self.assertEqual(events[0].actor, self.test_cache)
+        self.assertEqual(events[0].target, self.test_cache)
+        self.assertEqual(events[0].verb, event_cache_purged.id)
+
+    def test_task_cache_partition_file_access_flush(self):
+        with self.test_cache_partition_file.open():
+            """Do nothing"""
+
+        self._execute_task_cache_partition_file_access_flush()
 
-        self.assertEqual(events[1].action_object, None)
-        self.assertEqual(events[1].actor, self.test_cache)
-        self.assertEqual(events[1].target, self.test_cache)
-        self.assertEqual(events[1].verb, event_cache_purged.id)
+        self.test_cache_partition_file.refresh_from_db()
+        self.assertEqual(self.test_cache_partition_file.hits, 1)
@@ -1,6 +1,6 @@
 from mayan.apps.testing.tests.base import GenericViewTestCase
 
-from ..events import event_cache_partition_purged, event_cache_purged
+from ..events import event_cache_purged
 from ..permissions import (
     permission_cache_purge, permission_cache_view
 )
@@ -107,17 +107,12 @@ class CacheViewTestCase(
         self.assertNotEqual(cache_total_size, self.test_cache.get_total_size())
 
         events = self._get_test_events()
-        self.assertEqual(events.count(), 2)
+        self.assertEqual(events.count(), 1)
 
         self.assertEqual(events[0].action_object, None)
         self.assertEqual(events[0].actor, self._test_case_user)
-        self.assertEqual(events[0].target, self.test_cache_partition)
-        self.assertEqual(events[0].verb, event_cache_partition_purged.id)
-
-        self.assertEqual(events[1].action_object, None)
-        self.assertEqual(events[1].actor, self._test_case_user)
-        self.assertEqual(events[1].target, self.test_cache)
-        self.assertEqual(events[1].verb, event_cache_purged.id)
+        self.assertEqual(events[0].target, self.test_cache)
+        self.assertEqual(events[0].verb, event_cache_purged.id)
 
     def test_cache_multiple_purge_view_no_permission(self):
         self._create_test_cache()
@@ -155,14 +150,9 @@ class CacheViewTestCase(
         self.assertNotEqual(cache_total_size, self.test_cache.get_total_size())
 
         events = self._get_test_events()
-        self.assertEqual(events.count(), 2)
+        self.assertEqual(events.count(), 1)
 
         self.assertEqual(events[0].action_object, None)
         self.assertEqual(events[0].actor, self._test_case_user)
-        self.assertEqual(events[0].target, self.test_cache_partition)
-        self.assertEqual(events[0].verb, event_cache_partition_purged.id)
-
-        self.assertEqual(events[1].action_object, None)
-        self.assertEqual(events[1].actor, self._test_case_user)
-        self.assertEqual(events[1].target, self.test_cache)
-        self.assertEqual(events[1].verb, event_cache_purged.id)
+        self.assertEqual(events[0].target, self.test_cache)
+        self.assertEqual(events[0].verb, event_cache_purged.id)
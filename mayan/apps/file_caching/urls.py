@@ -1,5 +1,6 @@
 from django.conf.urls import url
 
+from .api_views import APICacheMetricListView
 from .views import (
     CacheDetailView, CacheListView, CachePartitionPurgeView, CachePurgeView
 )
@@ -25,3 +26,10 @@ urlpatterns = [
         name='cache_partitions_purge', view=CachePartitionPurgeView.as_view()
     ),
 ]
+
+api_urls = [
+    url(
+        regex=r'^caches/metrics/$', name='cache-metric-list',
+        view=APICacheMetricListView.as_view()
+    ),
+]
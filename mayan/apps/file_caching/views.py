@@ -31,6 +31,21 @@ class CacheDetailView(SingleObjectDetailView):
             {
                 'field': 'get_total_size_display',
             },
+            {
+                'field': 'get_hit_ratio_display',
+            },
+            {
+                'field': 'get_bytes_served_display',
+            },
+            {
+                'field': 'get_evictions_display',
+            },
+            {
+                'field': 'get_average_generation_time_display',
+            },
+            {
+                'field': 'get_average_prune_time_display',
+            },
         ]
     }
     model = Cache
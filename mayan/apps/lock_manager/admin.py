@@ -1,9 +1,52 @@
 from django.contrib import admin
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.translation import ugettext_lazy as _
 
-from .models import Lock
+from .backends.base import LockingBackend
+from .models import Lock, LockStatistic
 
 
 @admin.register(Lock)
 class LockAdmin(admin.ModelAdmin):
     date_hierarchy = 'creation_datetime'
-    list_display = ('name', 'creation_datetime', 'timeout')
+    list_display = ('name', 'owner', 'creation_datetime', 'timeout')
+
+
+@admin.register(LockStatistic)
+class LockStatisticAdmin(admin.ModelAdmin):
+    change_list_template = 'lock_manager/admin/lockstatistic_change_list.html'
+    list_display = (
+        'prefix', 'attempts', 'failures', 'get_failure_ratio',
+        'get_average_wait_time', 'hold_count', 'get_average_hold_time'
+    )
+    readonly_fields = (
+        'prefix', 'attempts', 'failures', 'wait_seconds', 'hold_count',
+        'hold_seconds'
+    )
+    search_fields = ('prefix',)
+
+    def get_urls(self):
+        return [
+            path(
+                route='held/', name='lock_manager_held_locks',
+                view=self.admin_site.admin_view(view=self.held_locks_view)
+            )
+        ] + super().get_urls()
+
+    def has_add_permission(self, request):
+        return False
+
+    def held_locks_view(self, request):
+        """
+        List the locks currently held in the configured backend.
+        """
+        context = dict(
+            self.admin_site.each_context(request=request),
+            held_locks=LockingBackend.get_backend().get_held_locks(),
+            opts=self.model._meta, title=_('Held locks')
+        )
+        return TemplateResponse(
+            context=context, request=request,
+            template='lock_manager/admin/held_locks.html'
+        )
@@ -1,8 +1,22 @@
+from contextlib import contextmanager
+import functools
 import logging
+import os
+import random
+import socket
+import time
+import uuid
 
 from django.utils.module_loading import import_string
 
-from ..settings import setting_backend, setting_default_lock_timeout
+from ..classes import LockStatistics
+from ..exceptions import LockError
+from ..settings import (
+    setting_backend, setting_default_lock_timeout,
+    setting_default_wait_timeout
+)
+
+from .literals import LOCK_WAIT_BACKOFF_INITIAL, LOCK_WAIT_BACKOFF_MAXIMUM
 
 logger = logging.getLogger(name=__name__)
 
@@ -10,9 +24,103 @@ logger = logging.getLogger(name=__name__)
 class LockingBackend:
     """
     Base class for the lock backends. Defines the base methods that each
-    subclass must define.
+    subclass must define. Backends that issue fencing tokens set the
+    `fencing_token` of their locks to a number that increases with each
+    acquisition.
     """
     _is_initialized = False
+    fencing_token = None
+
+    @classmethod
+    def _acquire_blocking(cls, function, names, wait_timeout):
+        """
+        Retry with an exponential backoff with jitter until `function`
+        acquires the locks or `wait_timeout` seconds have passed.
+        """
+        deadline = time.monotonic() + wait_timeout
+        delay = LOCK_WAIT_BACKOFF_INITIAL
+
+        with cls._get_lock_waiter(names=names) as wait:
+            while True:
+                try:
+                    return function()
+                except LockError:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise
+
+                    logger.debug('waiting for locks: %s', names)
+                    wait(
+                        timeout=min(
+                            remaining, random.uniform(delay / 2, delay)
+                        )
+                    )
+                    delay = min(delay * 2, LOCK_WAIT_BACKOFF_MAXIMUM)
+
+    @classmethod
+    def _acquire_locks(cls, names, timeout):
+        """
+        Optional class method for subclasses to overload with an atomic
+        version. Acquires the locks one by one and releases the ones
+        acquired if any fails.
+        """
+        locks = []
+
+        try:
+            for name in names:
+                locks.append(cls._acquire_lock(name=name, timeout=timeout))
+        except LockError:
+            for lock in locks:
+                lock.release()
+            raise
+
+        return LockSet(locks=locks)
+
+    @classmethod
+    def _acquire_measured(cls, function, names):
+        """
+        Call `function` and record the attempt, its outcome and the time
+        spent waiting in the lock statistics.
+        """
+        timestamp = time.monotonic()
+
+        try:
+            lock = function()
+        except LockError:
+            LockStatistics.acquired(
+                lock=None, names=names, success=False,
+                wait_seconds=time.monotonic() - timestamp
+            )
+            raise
+        else:
+            LockStatistics.acquired(
+                lock=lock, names=names, success=True,
+                wait_seconds=time.monotonic() - timestamp
+            )
+            return lock
+
+    @classmethod
+    @contextmanager
+    def _get_lock_waiter(cls, names):
+        """
+        Optional class method for subclasses to overload. Yields a function
+        that waits up to `timeout` seconds between the attempts to acquire
+        the locks `names`. Subclasses able to be notified of the release of
+        the locks can return earlier.
+        """
+        def wait(timeout):
+            time.sleep(timeout)
+
+        yield wait
+
+    @classmethod
+    def _get_held_locks(cls):
+        """
+        Optional class method for subclasses to overload. Returns an
+        iterable of dictionaries with the `name`, `owner`, `age` and
+        `expiration` of the locks currently held.
+        """
+        raise NotImplementedError
 
     @classmethod
     def _initialize(cls):
@@ -26,10 +134,102 @@ class LockingBackend:
         return import_string(dotted_path=setting_backend.value)
 
     @classmethod
-    def acquire_lock(cls, name, timeout=None):
+    def get_held_locks(cls):
+        """
+        Return the locks currently held by every process, sorted by name.
+        The `age` and the `expiration` are in seconds or None when the
+        backend does not know them or, for the expiration, for the locks
+        without timeout.
+        """
+        if not cls._is_initialized:
+            cls._initialize()
+            cls._is_initialized = True
+
+        return sorted(cls._get_held_locks(), key=lambda lock: lock['name'])
+
+    @staticmethod
+    def get_owner():
+        """
+        Identify the process acquiring the locks.
+        """
+        return '{}:{}'.format(socket.gethostname(), os.getpid())
+
+    @staticmethod
+    def get_token():
+        """
+        Unique value of each acquisition, made of the owner, the time of
+        the acquisition and an UUID.
+        """
+        return '{}:{}:{}'.format(
+            LockingBackend.get_owner(), time.time(), uuid.uuid4().hex
+        )
+
+    @staticmethod
+    def parse_token(token):
+        """
+        Return the owner and the time of the acquisition of a token.
+        """
+        owner, timestamp, unique = token.rsplit(':', 2)
+        return owner, float(timestamp)
+
+    @classmethod
+    def acquire_lock(
+        cls, name, timeout=None, blocking=False, wait_timeout=None,
+        statistics=True
+    ):
+        """
+        Raise LockError if the lock is held by someone else. With `blocking`
+        wait up to `wait_timeout` seconds for it to be released first.
+        Locks used as markers, whose acquisition failures are expected,
+        can be left out of the lock statistics with `statistics=False`.
+        """
         timeout = timeout or setting_default_lock_timeout.value
         logger.debug('acquiring lock: %s, timeout: %s', name, timeout)
-        return cls._acquire_lock(name=name, timeout=timeout)
+
+        if blocking:
+            function = functools.partial(
+                cls._acquire_blocking, function=functools.partial(
+                    cls._acquire_lock, name=name, timeout=timeout
+                ), names=(name,), wait_timeout=(
+                    wait_timeout or setting_default_wait_timeout.value
+                )
+            )
+        else:
+            function = functools.partial(
+                cls._acquire_lock, name=name, timeout=timeout
+            )
+
+        if not statistics:
+            return function()
+
+        return cls._acquire_measured(function=function, names=(name,))
+
+    @classmethod
+    def acquire_locks(cls, names, timeout=None, blocking=False, wait_timeout=None):
+        """
+        Acquire all the locks or none. Returns a single lock object that
+        releases all of them. The names are sorted so that callers of the
+        backends that acquire them one by one always do it in the same
+        order.
+        """
+        names = sorted(set(names))
+        timeout = timeout or setting_default_lock_timeout.value
+        logger.debug('acquiring locks: %s, timeout: %s', names, timeout)
+
+        if blocking:
+            function = functools.partial(
+                cls._acquire_blocking, function=functools.partial(
+                    cls._acquire_locks, names=names, timeout=timeout
+                ), names=names, wait_timeout=(
+                    wait_timeout or setting_default_wait_timeout.value
+                )
+            )
+        else:
+            function = functools.partial(
+                cls._acquire_locks, names=names, timeout=timeout
+            )
+
+        return cls._acquire_measured(function=function, names=names)
 
     @classmethod
     def purge_locks(cls):
@@ -49,4 +249,21 @@ class LockingBackend:
 
     def release(self):
         logger.debug('releasing lock: %s', self.name)
+        LockStatistics.released(lock=self)
         return self._release()
+
+
+class LockSet:
+    """
+    Locks acquired together by the backends without atomic multiple lock
+    acquisition.
+    """
+    def __init__(self, locks):
+        self.locks = locks
+        self.name = ', '.join(lock.name for lock in locks)
+
+    def release(self):
+        LockStatistics.released(lock=self)
+
+        for lock in reversed(self.locks):
+            lock.release()
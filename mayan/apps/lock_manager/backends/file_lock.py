@@ -1,116 +1,220 @@
+import errno
 import hashlib
 import logging
-import json
 import os
-import threading
+import shutil
 import time
-import uuid
 
 from django.conf import settings
 from django.core.files import locks
-from django.utils.encoding import force_bytes, force_text
+from django.utils.encoding import force_bytes
 
 from mayan.apps.storage.settings import setting_temporary_directory
 
 from ..exceptions import LockError
 
 from .base import LockingBackend
+from .literals import (
+    FILE_LOCK_DIRECTORY_SUFFIX, FILE_LOCK_EXPIRATION_NEVER,
+    FILE_LOCK_OPEN_ATTEMPTS, FILE_LOCK_SHARD_LENGTH
+)
 
-lock = threading.Lock()
 logger = logging.getLogger(name=__name__)
 
 
 class FileLock(LockingBackend):
+    """
+    One lock file per name, in a directory sharded by the hash of the name.
+    The file holds the token of the owner followed by the name of the lock
+    and its modification time is the expiration of the lease. `flock` only
+    guards the few operations on the file of a single name so unrelated
+    locks never contend. Released locks are deleted, the files of expired
+    locks left behind by terminated processes are deleted when acquired
+    again or by the stale lock cleanup.
+    """
     @classmethod
     def _acquire_lock(cls, name, timeout):
         instance = FileLock(name=name, timeout=timeout)
         return instance
 
+    @classmethod
+    def _get_lock_path(cls, name):
+        digest = hashlib.sha256(force_bytes(s=name)).hexdigest()
+        return os.path.join(
+            cls.lock_directory, digest[:FILE_LOCK_SHARD_LENGTH], digest
+        )
+
+    @classmethod
+    def _get_held_locks(cls):
+        # Read without `flock` to not delay the owners, files being
+        # written or deleted meanwhile are skipped.
+        for directory_path, directory_names, filenames in os.walk(cls.lock_directory):
+            for filename in filenames:
+                path = os.path.join(directory_path, filename)
+
+                try:
+                    with open(path) as file_object:
+                        content = file_object.read()
+                        expiration = os.fstat(file_object.fileno()).st_mtime
+                except FileNotFoundError:
+                    continue
+
+                token, separator, name = content.partition('\n')
+                if not separator or expiration < time.time():
+                    continue
+
+                owner, timestamp = cls.parse_token(token=token)
+
+                if expiration == FILE_LOCK_EXPIRATION_NEVER:
+                    expiration = None
+                else:
+                    expiration = expiration - time.time()
+
+                yield {
+                    'age': time.time() - timestamp, 'expiration': expiration,
+                    'name': name, 'owner': owner
+                }
+
     @classmethod
     def _initialize(cls):
-        cls.lock_file = os.path.join(
-            setting_temporary_directory.value, hashlib.sha256(
-                force_bytes(s=settings.SECRET_KEY)
-            ).hexdigest()
+        cls.lock_directory = os.path.join(
+            setting_temporary_directory.value, '{}{}'.format(
+                hashlib.sha256(
+                    force_bytes(s=settings.SECRET_KEY)
+                ).hexdigest(), FILE_LOCK_DIRECTORY_SUFFIX
+            )
+        )
+        os.makedirs(cls.lock_directory, exist_ok=True)
+        logger.debug('lock_directory: %s', cls.lock_directory)
+        cls._purge_stale_locks()
+
+    @classmethod
+    def _open_lock_file(cls, path, blocking=False, create=True):
+        """
+        Open and `flock` the lock file. Returns None if the file is busy
+        and not blocking or if it does not exist and not creating. Retries
+        if the file was deleted between the open and the `flock`, the lock
+        would otherwise be held on an orphaned file.
+        """
+        flags = os.O_RDWR
+        if create:
+            flags |= os.O_CREAT
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        for attempt in range(FILE_LOCK_OPEN_ATTEMPTS):
+            try:
+                file_object = os.fdopen(os.open(path, flags), mode='r+')
+            except FileNotFoundError:
+                return None
+
+            try:
+                if blocking:
+                    locks.lock(f=file_object, flags=locks.LOCK_EX)
+                else:
+                    locks.lock(f=file_object, flags=locks.LOCK_EX | locks.LOCK_NB)
+            except OSError as exception:
+                file_object.close()
+                if exception.errno in (errno.EACCES, errno.EAGAIN):
+                    return None
+                raise
+
+            try:
+                path_stat = os.stat(path)
+            except FileNotFoundError:
+                path_stat = None
+
+            if path_stat and path_stat.st_ino == os.fstat(file_object.fileno()).st_ino:
+                return file_object
+
+            locks.unlock(f=file_object)
+            file_object.close()
+
+            if not create:
+                return None
+
+        raise LockError(
+            'Unable to open the lock file "{}".'.format(path)
         )
-        open(file=cls.lock_file, mode='a').close()
-        logger.debug('lock_file: %s', cls.lock_file)
 
     @classmethod
     def _purge_locks(cls):
-        lock.acquire()
-        with open(file=cls.lock_file, mode='r+') as file_object:
-            locks.lock(f=file_object, flags=locks.LOCK_EX)
-            file_object.seek(0)
-            file_object.truncate()
-            lock.release()
-
-    def _get_lock_dictionary(self):
-        if self.timeout:
-            result = {
-                'expiration': time.time() + self.timeout,
-                'uuid': self.uuid
-            }
-        else:
-            result = {
-                'expiration': 0,
-                'uuid': self.uuid
-            }
-
-        return result
+        shutil.rmtree(cls.lock_directory, ignore_errors=True)
+        os.makedirs(cls.lock_directory, exist_ok=True)
+
+    @classmethod
+    def _purge_stale_locks(cls):
+        """
+        Delete the files of the expired locks. Busy files are skipped.
+        Returns the number of files deleted.
+        """
+        count = 0
+
+        for directory_path, directory_names, filenames in os.walk(cls.lock_directory):
+            for filename in filenames:
+                path = os.path.join(directory_path, filename)
+                file_object = cls._open_lock_file(path=path, create=False)
+                if file_object:
+                    try:
+                        if os.fstat(file_object.fileno()).st_mtime < time.time():
+                            os.unlink(path)
+                            count += 1
+                    finally:
+                        locks.unlock(f=file_object)
+                        file_object.close()
+
+        logger.debug('stale locks deleted: %d', count)
+        return count
 
     def _init(self, name, timeout):
         self.name = name
+        self.path = self.__class__._get_lock_path(name=name)
         self.timeout = timeout
-        self.uuid = force_text(s=uuid.uuid4())
+        self.token = self.__class__.get_token()
 
-        lock.acquire()
-        with open(file=self.__class__.lock_file, mode='r+') as file_object:
-            locks.lock(f=file_object, flags=locks.LOCK_EX)
+        # The `flock` is only held for a few operations by the other
+        # processes, wait for it. The lease decides if the lock is busy.
+        file_object = self.__class__._open_lock_file(
+            blocking=True, path=self.path
+        )
+        if not file_object:
+            # The lock directory was purged in the meantime.
+            raise LockError
 
-            data = file_object.read()
+        try:
+            owner = file_object.read()
+            if owner and os.fstat(file_object.fileno()).st_mtime >= time.time():
+                raise LockError
 
-            if data:
-                file_locks = json.loads(s=data)
-            else:
-                file_locks = {}
+            # Free or expired, acquire it.
+            file_object.seek(0)
+            file_object.truncate()
+            file_object.write('{}\n{}'.format(self.token, self.name))
+            file_object.flush()
 
-            if name in file_locks:
-                # Someone already got this lock, check to see if it is expired.
-                if file_locks[name]['expiration'] and time.time() > file_locks[name]['expiration']:
-                    # It expires and has expired, we re-acquired it.
-                    file_locks[name] = self._get_lock_dictionary()
-                else:
-                    lock.release()
-                    raise LockError
+            if self.timeout:
+                expiration = time.time() + self.timeout
             else:
-                file_locks[name] = self._get_lock_dictionary()
+                expiration = FILE_LOCK_EXPIRATION_NEVER
 
-            file_object.seek(0)
-            file_object.truncate()
-            file_object.write(json.dumps(obj=file_locks))
-            lock.release()
+            os.utime(self.path, times=(expiration, expiration))
+        finally:
+            locks.unlock(f=file_object)
+            file_object.close()
 
     def _release(self):
-        lock.acquire()
-        with open(file=self.__class__.lock_file, mode='r+') as file_object:
-            locks.lock(f=file_object, flags=locks.LOCK_EX)
-            try:
-                file_locks = json.loads(s=file_object.read())
-            except EOFError:
-                file_locks = {}
+        file_object = self.__class__._open_lock_file(
+            blocking=True, create=False, path=self.path
+        )
+        if not file_object:
+            # Lock expired and someone else released it.
+            return
 
-            if self.name in file_locks:
-                if file_locks[self.name]['uuid'] == self.uuid:
-                    file_locks.pop(self.name)
-                else:
-                    # Lock expired and someone else acquired it
-                    pass
+        try:
+            if file_object.read().partition('\n')[0] == self.token:
+                os.unlink(self.path)
             else:
-                # Lock expired and someone else released it
+                # Lock expired and someone else acquired it.
                 pass
-
-            file_object.seek(0)
-            file_object.truncate()
-            file_object.write(json.dumps(obj=file_locks))
-            lock.release()
+        finally:
+            locks.unlock(f=file_object)
+            file_object.close()
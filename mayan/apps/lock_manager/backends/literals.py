@@ -1,4 +1,32 @@
+FILE_LOCK_DIRECTORY_SUFFIX = '_locks'
+# Modification time of the file of the locks without timeout, 2038-01-19.
+FILE_LOCK_EXPIRATION_NEVER = 2 ** 31 - 1
+FILE_LOCK_OPEN_ATTEMPTS = 10
+FILE_LOCK_SHARD_LENGTH = 2
+
+LOCK_WAIT_BACKOFF_INITIAL = 0.05
+LOCK_WAIT_BACKOFF_MAXIMUM = 2
+
+# Identifies the lock connections in `pg_stat_activity`, limited to 63
+# characters by the server.
+POSTGRESQL_LOCK_APPLICATION_NAME_PREFIX = 'mayan_lock:'
+POSTGRESQL_LOCK_APPLICATION_NAME_LENGTH = 63
+# Hashed with the lock names to not collide with the advisory locks of
+# other applications.
+POSTGRESQL_LOCK_KEY_PREFIX = 'mayan_lock:'
+POSTGRESQL_LOCK_REAPER_INTERVAL_MAXIMUM = 5
+POSTGRESQL_LOCK_SCOPE_SESSION = 'session'
+POSTGRESQL_LOCK_SCOPE_TRANSACTION = 'transaction'
+POSTGRESQL_LOCK_UNKNOWN_NAME = 'advisory lock {}'
+
+# Outside of the lock name prefix so that purging the locks does not reset
+# the fencing tokens.
+REDIS_LOCK_FENCING_TOKEN_KEY = '_mayan_lock_fencing_token'
 REDIS_LOCK_NAME_PREFIX = '_mayan_lock:'
+REDIS_LOCK_RELEASE_CHANNEL_PREFIX = '_mayan_lock_release:'
+# Fraction of the timeout after which the watchdog renews a lease.
+REDIS_LOCK_RENEWAL_RATIO = 1 / 3
 REDIS_LOCK_VERSION_REQUIRED = (3, 3)
+REDIS_LOCK_WATCHDOG_INTERVAL_MAXIMUM = 5
 REDIS_SCAN_KEYS_COUNT = 5000
 REDIS_USE_CONNECTION_POOL = True
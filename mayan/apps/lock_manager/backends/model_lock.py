@@ -1,4 +1,7 @@
+import datetime
+
 from django.apps import apps
+from django.utils.timezone import now
 
 from .base import LockingBackend
 
@@ -9,10 +12,31 @@ class ModelLock(LockingBackend):
         Lock = apps.get_model(app_label='lock_manager', model_name='Lock')
         return ModelLock(
             model_instance=Lock.objects.acquire_lock(
-                name=name, timeout=timeout
+                name=name, owner=cls.get_owner(), timeout=timeout
             )
         )
 
+    @classmethod
+    def _get_held_locks(cls):
+        Lock = apps.get_model(app_label='lock_manager', model_name='Lock')
+
+        datetime_now = now()
+
+        for lock in Lock.objects.all():
+            expiration = (
+                lock.creation_datetime + datetime.timedelta(
+                    seconds=lock.timeout
+                ) - datetime_now
+            ).total_seconds()
+
+            if expiration > 0:
+                yield {
+                    'age': (
+                        datetime_now - lock.creation_datetime
+                    ).total_seconds(), 'expiration': expiration,
+                    'name': lock.name, 'owner': lock.owner
+                }
+
     @classmethod
     def _purge_locks(cls):
         Lock = apps.get_model(app_label='lock_manager', model_name='Lock')
@@ -0,0 +1,389 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import (
+    DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+)
+from django.utils.encoding import force_bytes
+
+from ..exceptions import LockError
+from ..settings import setting_backend_arguments
+
+from .base import LockingBackend
+from .literals import (
+    POSTGRESQL_LOCK_APPLICATION_NAME_LENGTH,
+    POSTGRESQL_LOCK_APPLICATION_NAME_PREFIX, POSTGRESQL_LOCK_KEY_PREFIX,
+    POSTGRESQL_LOCK_REAPER_INTERVAL_MAXIMUM, POSTGRESQL_LOCK_SCOPE_SESSION,
+    POSTGRESQL_LOCK_SCOPE_TRANSACTION, POSTGRESQL_LOCK_UNKNOWN_NAME
+)
+
+logger = logging.getLogger(name=__name__)
+
+# Advisory locks with a single bigint key are stored in `pg_locks` split in
+# two 32 bit halves with an `objsubid` of 1.
+SQL_HELD_LOCKS = '''
+SELECT
+    (locks.classid::bigint << 32) | locks.objid::bigint,
+    activity.application_name
+FROM pg_locks AS locks
+LEFT JOIN pg_stat_activity AS activity ON activity.pid = locks.pid
+WHERE
+    locks.locktype = 'advisory' AND locks.granted AND locks.objsubid = 1
+    AND locks.database = (
+        SELECT oid FROM pg_database WHERE datname = current_database()
+    )
+'''
+SQL_LOCK = '''
+SELECT key, pg_try_advisory_lock(key) FROM unnest(%s::bigint[]) AS key
+'''
+# Transaction locks are reentrant too, the ones already held by the
+# session are not requested again. CASE ensures the check is evaluated
+# before the request.
+SQL_LOCK_TRANSACTION = '''
+SELECT bool_and(
+    CASE WHEN EXISTS (
+        SELECT 1 FROM pg_locks AS locks
+        WHERE
+            locks.locktype = 'advisory' AND locks.objsubid = 1
+            AND locks.pid = pg_backend_pid()
+            AND (locks.classid::bigint << 32) | locks.objid::bigint = key
+    ) THEN false ELSE pg_try_advisory_xact_lock(key) END
+) FROM unnest(%s::bigint[]) AS key
+'''
+SQL_TERMINATE = '''
+SELECT pg_terminate_backend(pid) FROM pg_stat_activity
+WHERE
+    position(%s in application_name) = 1 AND pid <> pg_backend_pid()
+    AND datname = current_database()
+'''
+SQL_UNLOCK = '''
+SELECT pg_advisory_unlock(key) FROM unnest(%s::bigint[]) AS key
+'''
+SQL_UNLOCK_ALL = 'SELECT pg_advisory_unlock_all()'
+
+
+class PostgreSQLLock(LockingBackend):
+    """
+    PostgreSQL advisory locks keyed by a 64 bit hash of the lock names,
+    without writes to any table.
+
+    With the default `session` scope the locks are held by a connection
+    dedicated to the locks of the process and shared by its threads. As
+    advisory locks are reentrant per session the process also keeps track
+    of the locks it holds and releases them when their timeout expires to
+    emulate leases. The server releases the locks of a terminated process
+    as soon as its connection is closed.
+
+    With the `transaction` scope the locks requested inside a transaction
+    are taken by the connection of the transaction and are released when
+    the outermost transaction commits or rolls back, or when the
+    transaction is rolled back to a savepoint created before they were
+    requested. Committing a savepoint, as when a nested atomic block ends
+    without error, keeps them held. Releasing them explicitly does
+    nothing and they do not expire. Locks requested outside of a
+    transaction use the session scope.
+
+    Backend arguments: `database`, the alias of the database to use and
+    `scope`, either `session` or `transaction`.
+    """
+    _connection = None
+    _connection_lock = threading.RLock()
+    _connection_pid = None
+    _held_locks = {}
+    _inherited_connections = []
+    _reaper_event = threading.Event()
+    _reaper_thread = None
+
+    @classmethod
+    def _acquire_lock(cls, name, timeout):
+        return PostgreSQLLock(names=(name,), timeout=timeout)
+
+    @classmethod
+    def _acquire_locks(cls, names, timeout):
+        return PostgreSQLLock(names=names, timeout=timeout)
+
+    @classmethod
+    def _execute(cls, sql, params=None):
+        """
+        Run a query in the connection of the locks. Call with the
+        connection lock held. The locks of a lost connection are lost too,
+        they are forgotten and the connection is opened again by the next
+        query.
+        """
+        connection = cls._get_connection()
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+        except cls._database_error as exception:
+            if connection.closed:
+                logger.error(
+                    'Lost the connection of the locks; %s', exception
+                )
+                cls._connection = None
+                cls._held_locks = {}
+
+            raise LockError(
+                'Database error while running a lock query; {}'.format(
+                    exception
+                )
+            ) from exception
+
+    @classmethod
+    def _get_connection(cls):
+        if cls._connection_pid != os.getpid():
+            # Inherited from the parent process. Closing it, even implicitly
+            # when it is garbage collected, ends the session of the parent
+            # and releases its locks. A reference is kept for the lifetime
+            # of this process instead.
+            if cls._connection is not None:
+                cls._inherited_connections.append(cls._connection)
+
+            cls._connection = None
+            cls._held_locks = {}
+
+        if cls._connection is None:
+            database_connection = cls._get_database_connection()
+
+            parameters = database_connection.get_connection_params()
+            parameters['application_name'] = '{}{}'.format(
+                POSTGRESQL_LOCK_APPLICATION_NAME_PREFIX, cls.get_owner()
+            )[:POSTGRESQL_LOCK_APPLICATION_NAME_LENGTH]
+
+            cls._connection = database_connection.Database.connect(
+                **parameters
+            )
+            cls._connection.autocommit = True
+            cls._connection_pid = os.getpid()
+
+        return cls._connection
+
+    @staticmethod
+    def _get_database_alias():
+        return setting_backend_arguments.value.get(
+            'database', DEFAULT_DB_ALIAS
+        )
+
+    @classmethod
+    def _get_database_connection(cls):
+        return connections[cls._get_database_alias()]
+
+    @classmethod
+    def _get_held_locks(cls):
+        with cls._connection_lock:
+            rows = cls._execute(sql=SQL_HELD_LOCKS)
+            held_locks = dict(cls._held_locks)
+
+        for key, application_name in rows:
+            lock = held_locks.get(key)
+
+            if lock:
+                owner, timestamp = cls.parse_token(token=lock.token)
+
+                yield {
+                    'age': time.time() - timestamp,
+                    'expiration': lock._timestamp_expiration - time.monotonic(),
+                    'name': lock.names[lock.keys.index(key)], 'owner': owner
+                }
+            else:
+                # Held by another process or by a transaction, only the
+                # key is known.
+                application_name = application_name or ''
+                if application_name.startswith(POSTGRESQL_LOCK_APPLICATION_NAME_PREFIX):
+                    owner = application_name[
+                        len(POSTGRESQL_LOCK_APPLICATION_NAME_PREFIX):
+                    ]
+                else:
+                    owner = application_name
+
+                yield {
+                    'age': None, 'expiration': None,
+                    'name': POSTGRESQL_LOCK_UNKNOWN_NAME.format(key),
+                    'owner': owner
+                }
+
+    @staticmethod
+    def _get_key(name):
+        digest = hashlib.sha256(
+            force_bytes(
+                s='{}{}'.format(POSTGRESQL_LOCK_KEY_PREFIX, name)
+            )
+        ).digest()
+        return int.from_bytes(bytes=digest[:8], byteorder='big', signed=True)
+
+    @staticmethod
+    def _get_scope():
+        return setting_backend_arguments.value.get(
+            'scope', POSTGRESQL_LOCK_SCOPE_SESSION
+        )
+
+    @classmethod
+    def _initialize(cls):
+        database_connection = cls._get_database_connection()
+
+        if database_connection.vendor != 'postgresql':
+            raise ImproperlyConfigured(
+                'The PostgreSQL lock backend requires a PostgreSQL database, '
+                'the database "{}" is {}.'.format(
+                    cls._get_database_alias(), database_connection.vendor
+                )
+            )
+
+        if cls._get_scope() not in (POSTGRESQL_LOCK_SCOPE_SESSION, POSTGRESQL_LOCK_SCOPE_TRANSACTION):
+            raise ImproperlyConfigured(
+                'Unknown PostgreSQL lock scope "{}".'.format(cls._get_scope())
+            )
+
+        cls._database_error = database_connection.Database.Error
+
+    @classmethod
+    def _purge_locks(cls):
+        """
+        Release the locks of this process and close the lock connections
+        of the other processes to release theirs.
+        """
+        with cls._connection_lock:
+            cls._held_locks = {}
+            cls._execute(sql=SQL_UNLOCK_ALL)
+            cls._execute(
+                sql=SQL_TERMINATE,
+                params=(POSTGRESQL_LOCK_APPLICATION_NAME_PREFIX,)
+            )
+
+    @classmethod
+    def _reaper_release_expired(cls):
+        """
+        Release the locks with an expired lease and return when the next
+        one expires.
+        """
+        timestamp_next = time.monotonic() + POSTGRESQL_LOCK_REAPER_INTERVAL_MAXIMUM
+
+        with cls._connection_lock:
+            keys = []
+            for key, lock in list(cls._held_locks.items()):
+                if lock._timestamp_expiration <= time.monotonic():
+                    logger.debug('lock expired: %s', lock.name)
+                    del cls._held_locks[key]
+                    keys.append(key)
+                else:
+                    timestamp_next = min(
+                        timestamp_next, lock._timestamp_expiration
+                    )
+
+            if keys:
+                cls._execute(sql=SQL_UNLOCK, params=(keys,))
+
+        return timestamp_next
+
+    @classmethod
+    def _reaper_run(cls):
+        while True:
+            # Clear before releasing to not miss the locks added meanwhile.
+            cls._reaper_event.clear()
+
+            try:
+                timestamp_next = cls._reaper_release_expired()
+            except Exception as exception:
+                logger.error(
+                    'Unable to release the expired locks; %s', exception,
+                    exc_info=True
+                )
+                timestamp_next = time.monotonic() + POSTGRESQL_LOCK_REAPER_INTERVAL_MAXIMUM
+
+            cls._reaper_event.wait(
+                timeout=max(0, timestamp_next - time.monotonic())
+            )
+
+    @classmethod
+    def _reaper_start(cls):
+        # Threads do not survive a fork, start one per process.
+        with cls._connection_lock:
+            if not cls._reaper_thread or not cls._reaper_thread.is_alive():
+                cls._reaper_thread = threading.Thread(
+                    daemon=True, name='postgresql_lock_reaper',
+                    target=cls._reaper_run
+                )
+                cls._reaper_thread.start()
+
+        cls._reaper_event.set()
+
+    def _init(self, names, timeout):
+        self.keys = [self.__class__._get_key(name=name) for name in names]
+        self.name = ', '.join(names)
+        self.names = names
+        self.timeout = timeout
+        self.token = self.__class__.get_token()
+
+        database_connection = self.__class__._get_database_connection()
+
+        if self.__class__._get_scope() == POSTGRESQL_LOCK_SCOPE_TRANSACTION and database_connection.in_atomic_block:
+            self._init_transaction()
+        else:
+            self._init_session()
+
+    def _init_session(self):
+        self.is_transaction_scoped = False
+        self._timestamp_expiration = time.monotonic() + self.timeout
+
+        with self.__class__._connection_lock:
+            # Opens the connection and forgets the locks of the parent
+            # process before checking the locks held.
+            self.__class__._get_connection()
+
+            for key in self.keys:
+                if key in self.__class__._held_locks:
+                    raise LockError
+
+            rows = self.__class__._execute(sql=SQL_LOCK, params=(self.keys,))
+            keys_acquired = [key for key, acquired in rows if acquired]
+
+            if len(keys_acquired) < len(self.keys):
+                if keys_acquired:
+                    self.__class__._execute(
+                        sql=SQL_UNLOCK, params=(keys_acquired,)
+                    )
+                raise LockError
+
+            for key in self.keys:
+                self.__class__._held_locks[key] = self
+
+        self.__class__._reaper_start()
+
+    def _init_transaction(self):
+        self.is_transaction_scoped = True
+
+        try:
+            # Rolling back the savepoint releases the locks acquired if
+            # any of them fails.
+            with transaction.atomic(using=self.__class__._get_database_alias()):
+                with self.__class__._get_database_connection().cursor() as cursor:
+                    cursor.execute(SQL_LOCK_TRANSACTION, (self.keys,))
+                    if not cursor.fetchone()[0]:
+                        raise LockError
+        except DatabaseError as exception:
+            raise LockError(
+                'Database error while running a lock query; {}'.format(
+                    exception
+                )
+            ) from exception
+
+    def _release(self):
+        if self.is_transaction_scoped:
+            # Released by the end of the transaction.
+            return
+
+        with self.__class__._connection_lock:
+            keys = [
+                key for key in self.keys
+                if self.__class__._held_locks.get(key) is self
+            ]
+            for key in keys:
+                del self.__class__._held_locks[key]
+
+            if keys:
+                self.__class__._execute(sql=SQL_UNLOCK, params=(keys,))
@@ -1,3 +1,9 @@
+from contextlib import contextmanager
+import logging
+import threading
+import time
+import weakref
+
 import redis
 
 from django.utils.encoding import force_text
@@ -9,15 +15,139 @@ from ..settings import setting_backend_arguments
 
 from .base import LockingBackend
 from .literals import (
-    REDIS_LOCK_NAME_PREFIX, REDIS_LOCK_VERSION_REQUIRED,
+    REDIS_LOCK_FENCING_TOKEN_KEY, REDIS_LOCK_NAME_PREFIX,
+    REDIS_LOCK_RELEASE_CHANNEL_PREFIX, REDIS_LOCK_RENEWAL_RATIO,
+    REDIS_LOCK_VERSION_REQUIRED, REDIS_LOCK_WATCHDOG_INTERVAL_MAXIMUM,
     REDIS_SCAN_KEYS_COUNT, REDIS_USE_CONNECTION_POOL
 )
 
+logger = logging.getLogger(name=__name__)
+
+# KEYS: the lock keys followed by the fencing token counter key.
+# ARGV: the owner token and the timeout in milliseconds.
+SCRIPT_ACQUIRE = '''
+for index = 1, #KEYS - 1 do
+    if redis.call('exists', KEYS[index]) == 1 then
+        return 0
+    end
+end
+local fencing_token = redis.call('incr', KEYS[#KEYS])
+for index = 1, #KEYS - 1 do
+    redis.call('set', KEYS[index], ARGV[1], 'px', ARGV[2])
+end
+return fencing_token
+'''
+# KEYS: the lock keys.
+# ARGV: the owner token followed by the release channel of each key.
+SCRIPT_RELEASE = '''
+local count = 0
+for index = 1, #KEYS do
+    if redis.call('get', KEYS[index]) == ARGV[1] then
+        redis.call('del', KEYS[index])
+        redis.call('publish', ARGV[index + 1], 1)
+        count = count + 1
+    end
+end
+return count
+'''
+# KEYS: the lock keys.
+# ARGV: the owner token and the timeout in milliseconds.
+SCRIPT_RENEW = '''
+local count = 0
+for index = 1, #KEYS do
+    if redis.call('get', KEYS[index]) == ARGV[1] then
+        redis.call('pexpire', KEYS[index], ARGV[2])
+        count = count + 1
+    end
+end
+return count
+'''
+
 
 class RedisLock(LockingBackend):
+    """
+    Locks are keys holding the token of their owner, set and deleted with
+    Lua scripts so that several locks are acquired or released in a single
+    atomic call. Each acquisition increments a counter used as fencing
+    token. The leases of the locks held by a process are renewed by a
+    watchdog thread until they are released or their lock object is
+    garbage collected, timeouts only need to cover the detection of a
+    terminated process.
+    """
+    _held_locks = weakref.WeakSet()
+    _watchdog_event = threading.Event()
+    _watchdog_lock = threading.Lock()
+    _watchdog_thread = None
+
     @classmethod
     def _acquire_lock(cls, name, timeout):
-        return RedisLock(name=name, timeout=timeout)
+        return RedisLock(names=(name,), timeout=timeout)
+
+    @classmethod
+    def _acquire_locks(cls, names, timeout):
+        return RedisLock(names=names, timeout=timeout)
+
+    @classmethod
+    def _get_held_locks(cls):
+        server = cls.get_redis_connection()
+
+        for key in server.scan_iter(
+            count=REDIS_SCAN_KEYS_COUNT, match='{}*'.format(
+                REDIS_LOCK_NAME_PREFIX
+            )
+        ):
+            pipeline = server.pipeline()
+            pipeline.get(name=key)
+            pipeline.pttl(name=key)
+            token, expiration = pipeline.execute()
+
+            # Released or expired meanwhile.
+            if token is None:
+                continue
+
+            owner, timestamp = cls.parse_token(token=force_text(s=token))
+
+            if expiration < 0:
+                expiration = None
+            else:
+                expiration = expiration / 1000
+
+            yield {
+                'age': time.time() - timestamp, 'expiration': expiration,
+                'name': force_text(s=key)[len(REDIS_LOCK_NAME_PREFIX):],
+                'owner': owner
+            }
+
+    @staticmethod
+    def _get_key(name):
+        return '{}{}'.format(REDIS_LOCK_NAME_PREFIX, name)
+
+    @classmethod
+    @contextmanager
+    def _get_lock_waiter(cls, names):
+        """
+        Subscribe to the release notifications of the locks before the
+        first attempt so that no release is missed between an attempt and
+        the wait.
+        """
+        pubsub = cls.get_redis_connection().pubsub(
+            ignore_subscribe_messages=True
+        )
+        pubsub.subscribe(
+            *[cls._get_release_channel(name=name) for name in names]
+        )
+
+        def wait(timeout):
+            pubsub.get_message(timeout=timeout)
+
+        try:
+            yield wait
+        finally:
+            pubsub.close()
+
+    @staticmethod
+    def _get_release_channel(name):
+        return '{}{}'.format(REDIS_LOCK_RELEASE_CHANNEL_PREFIX, name)
 
     @classmethod
     def _initialize(cls):
@@ -25,16 +155,10 @@ class RedisLock(LockingBackend):
             redis_url = setting_backend_arguments.value.get('redis_url', None)
             cls._connection_pool = redis.ConnectionPool.from_url(url=redis_url)
 
-    @classmethod
-    def get_redis_connection(cls):
-        if REDIS_USE_CONNECTION_POOL:
-            server = redis.Redis(connection_pool=cls._connection_pool)
-        else:
-            redis_url = setting_backend_arguments.value.get('redis_url', None)
-            server = redis.from_url(url=redis_url)
-            # Force to initialize the connection.
-            server.client()
-        return server
+        server = cls.get_redis_connection()
+        cls._script_acquire = server.register_script(script=SCRIPT_ACQUIRE)
+        cls._script_release = server.register_script(script=SCRIPT_RELEASE)
+        cls._script_renew = server.register_script(script=SCRIPT_RENEW)
 
     @classmethod
     def _purge_locks(cls):
@@ -53,7 +177,73 @@ class RedisLock(LockingBackend):
             if cursor == 0:
                 break
 
-    def _init(self, name, timeout):
+    @classmethod
+    def _watchdog_add(cls, lock):
+        with cls._watchdog_lock:
+            cls._held_locks.add(lock)
+
+            # Threads do not survive a fork, start one per process.
+            if not cls._watchdog_thread or not cls._watchdog_thread.is_alive():
+                cls._watchdog_thread = threading.Thread(
+                    daemon=True, name='redis_lock_watchdog',
+                    target=cls._watchdog_run
+                )
+                cls._watchdog_thread.start()
+
+        cls._watchdog_event.set()
+
+    @classmethod
+    def _watchdog_renew(cls):
+        """
+        Renew the leases due and return when the next one is due. Holds no
+        reference to the locks afterwards so that abandoned locks can be
+        garbage collected.
+        """
+        timestamp_next = time.monotonic() + REDIS_LOCK_WATCHDOG_INTERVAL_MAXIMUM
+
+        with cls._watchdog_lock:
+            locks = list(cls._held_locks)
+
+        for lock in locks:
+            timestamp_renewal = lock._timestamp_renewal + lock.timeout * REDIS_LOCK_RENEWAL_RATIO
+
+            if timestamp_renewal <= time.monotonic():
+                try:
+                    lock.renew()
+                except Exception as exception:
+                    logger.error(
+                        'Unable to renew lock: %s; %s', lock.name,
+                        exception, exc_info=True
+                    )
+                timestamp_renewal = lock._timestamp_renewal + lock.timeout * REDIS_LOCK_RENEWAL_RATIO
+
+            timestamp_next = min(timestamp_next, timestamp_renewal)
+
+        return timestamp_next
+
+    @classmethod
+    def _watchdog_run(cls):
+        while True:
+            # Clear before renewing to not miss the locks added meanwhile.
+            cls._watchdog_event.clear()
+            timestamp_next = cls._watchdog_renew()
+
+            cls._watchdog_event.wait(
+                timeout=max(0, timestamp_next - time.monotonic())
+            )
+
+    @classmethod
+    def get_redis_connection(cls):
+        if REDIS_USE_CONNECTION_POOL:
+            server = redis.Redis(connection_pool=cls._connection_pool)
+        else:
+            redis_url = setting_backend_arguments.value.get('redis_url', None)
+            server = redis.from_url(url=redis_url)
+            # Force to initialize the connection.
+            server.client()
+        return server
+
+    def _init(self, names, timeout):
         if redis.VERSION < REDIS_LOCK_VERSION_REQUIRED:
             raise DependenciesException(
                 'The Redis lock backend requires the Redis Python client '
@@ -62,18 +252,49 @@ class RedisLock(LockingBackend):
                 )
             )
 
-        self.name = name
-        _redis_lock_instance = self.__class__.get_redis_connection().lock(
-            name='{}{}'.format(REDIS_LOCK_NAME_PREFIX, name),
-            timeout=timeout
+        self.keys = [self.__class__._get_key(name=name) for name in names]
+        self.name = ', '.join(names)
+        self.names = names
+        self.timeout = timeout
+        self.token = self.__class__.get_token()
+
+        fencing_token = self.__class__._script_acquire(
+            args=[self.token, int(self.timeout * 1000)],
+            client=self.__class__.get_redis_connection(),
+            keys=self.keys + [REDIS_LOCK_FENCING_TOKEN_KEY]
         )
-        if _redis_lock_instance.acquire(blocking=False):
-            self._redis_lock_instance = _redis_lock_instance
-        else:
+
+        if not fencing_token:
             raise LockError
 
+        self.fencing_token = fencing_token
+        self._timestamp_renewal = time.monotonic()
+        self.__class__._watchdog_add(lock=self)
+
     def _release(self):
-        try:
-            self._redis_lock_instance.release()
-        except redis.exceptions.LockNotOwnedError:
-            return
+        with self.__class__._watchdog_lock:
+            self.__class__._held_locks.discard(self)
+
+        # Also wakes up the processes waiting for these locks.
+        self.__class__._script_release(
+            args=[self.token] + [
+                self.__class__._get_release_channel(name=name)
+                for name in self.names
+            ], client=self.__class__.get_redis_connection(), keys=self.keys
+        )
+
+    def renew(self):
+        """
+        Extend the lease of the locks for another timeout. Locks that expired
+        and were acquired by someone else are not renewed anymore.
+        """
+        count = self.__class__._script_renew(
+            args=[self.token, int(self.timeout * 1000)],
+            client=self.__class__.get_redis_connection(), keys=self.keys
+        )
+        self._timestamp_renewal = time.monotonic()
+
+        if count < len(self.keys):
+            logger.warning('Lost the lease of lock: %s', self.name)
+            with self.__class__._watchdog_lock:
+                self.__class__._held_locks.discard(self)
@@ -0,0 +1,124 @@
+import logging
+import re
+import threading
+import time
+
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .literals import LOCK_NAME_PREFIX_REGEX, STATISTICS_FLUSH_INTERVAL
+
+logger = logging.getLogger(name=__name__)
+
+
+class LockStatistics:
+    """
+    Acquisition attempts, failures, wait and hold times of the locks of
+    this process, grouped by the prefix of the lock names. Accumulated in
+    memory and added to the `LockStatistic` totals every
+    STATISTICS_FLUSH_INTERVAL seconds, outside of the transactions of the
+    callers. Flushing is best effort, values that fail to be written are
+    discarded.
+    """
+    _lock = threading.Lock()
+    _timestamp_flush = time.monotonic()
+    _values = {}
+
+    @staticmethod
+    def get_prefix(name):
+        """
+        Return the leading words of the lock name, without the object
+        specific part, for example `indexing:indexing_template_node` for
+        `indexing:indexing_template_node_7`.
+        """
+        return re.match(
+            pattern=LOCK_NAME_PREFIX_REGEX, string=name
+        ).group(0).strip(' _-:./') or name
+
+    @classmethod
+    def _add(cls, names, **values):
+        with cls._lock:
+            for prefix in set(map(cls.get_prefix, names)):
+                totals = cls._values.setdefault(
+                    prefix, {
+                        'attempts': 0, 'failures': 0, 'hold_count': 0,
+                        'hold_seconds': 0, 'wait_seconds': 0
+                    }
+                )
+                for key, value in values.items():
+                    totals[key] += value
+
+            flush = time.monotonic() - cls._timestamp_flush >= STATISTICS_FLUSH_INTERVAL
+            if flush:
+                # Not scheduled again while the flush is postponed.
+                cls._timestamp_flush = time.monotonic()
+
+        if flush:
+            # Written after the transaction of the caller, if any, for the
+            # row locks of the totals not to be held until it ends.
+            transaction.on_commit(func=cls.flush)
+
+    @classmethod
+    def acquired(cls, lock, names, success, wait_seconds):
+        cls._add(
+            attempts=1, failures=int(not success), names=names,
+            wait_seconds=wait_seconds
+        )
+
+        if success:
+            lock._statistics_names = names
+            lock._statistics_timestamp = time.monotonic()
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._timestamp_flush = time.monotonic()
+            cls._values = {}
+
+    @classmethod
+    def flush(cls):
+        with cls._lock:
+            values = cls._values
+            cls._timestamp_flush = time.monotonic()
+            cls._values = {}
+
+        LockStatistic = apps.get_model(
+            app_label='lock_manager', model_name='LockStatistic'
+        )
+
+        for prefix, totals in values.items():
+            expressions = {
+                key: F(key) + value for key, value in totals.items()
+            }
+            queryset = LockStatistic.objects.filter(prefix=prefix)
+
+            # Savepoints keep a failure from breaking the transaction of
+            # the caller.
+            try:
+                try:
+                    with transaction.atomic():
+                        if not queryset.update(**expressions):
+                            LockStatistic.objects.create(
+                                prefix=prefix, **totals
+                            )
+                except IntegrityError:
+                    # Created by another process in the meantime.
+                    with transaction.atomic():
+                        queryset.update(**expressions)
+            except Exception as exception:
+                logger.error(
+                    'Unable to write the lock statistics of "%s"; %s',
+                    prefix, exception, exc_info=True
+                )
+
+    @classmethod
+    def released(cls, lock):
+        timestamp = getattr(lock, '_statistics_timestamp', None)
+
+        if timestamp is not None:
+            lock._statistics_timestamp = None
+            cls._add(
+                hold_count=1, hold_seconds=time.monotonic() - timestamp,
+                names=lock._statistics_names
+            )
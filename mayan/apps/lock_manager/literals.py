@@ -1,7 +1,13 @@
 DEFAULT_LOCK_MANAGER_BACKEND = 'mayan.apps.lock_manager.backends.file_lock.FileLock'
 DEFAULT_LOCK_MANAGER_BACKEND_ARGUMENTS = {}
 DEFAULT_LOCK_MANAGER_DEFAULT_LOCK_TIMEOUT = 30
+DEFAULT_LOCK_MANAGER_DEFAULT_WAIT_TIMEOUT = 10
+
+# Leading words of a lock name, up to the first one with a digit.
+LOCK_NAME_PREFIX_REGEX = r'^[\s\-_:./]*(?:[^\W\d_]+(?:[\s\-_:./]+|$))*'
 
 PURGE_LOCKS_COMMAND = 'purgelocks'
 
+STATISTICS_FLUSH_INTERVAL = 60
+
 TEST_LOCK_NAME = '_mayan_test_lock'
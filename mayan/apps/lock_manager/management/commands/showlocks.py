@@ -0,0 +1,51 @@
+from django.core import management
+
+from ...backends.base import LockingBackend
+from ...classes import LockStatistics
+from ...models import LockStatistic
+
+
+class Command(management.BaseCommand):
+    help = 'List the locks currently held, with their owner and age.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--statistics', action='store_true', dest='statistics',
+            help='List the acquisition statistics per lock name prefix '
+            'instead.'
+        )
+
+    def handle(self, *args, **options):
+        if options['statistics']:
+            LockStatistics.flush()
+
+            for lock_statistic in LockStatistic.objects.all():
+                self.stdout.write(
+                    '{prefix}\tattempts: {attempts}, failures: {failures}, '
+                    'average wait: {wait:.3f}s, releases: {hold_count}, '
+                    'average hold: {hold:.3f}s'.format(
+                        attempts=lock_statistic.attempts,
+                        failures=lock_statistic.failures,
+                        hold=lock_statistic.get_average_hold_time(),
+                        hold_count=lock_statistic.hold_count,
+                        prefix=lock_statistic.prefix,
+                        wait=lock_statistic.get_average_wait_time()
+                    )
+                )
+        else:
+            for lock in LockingBackend.get_backend().get_held_locks():
+                self.stdout.write(
+                    '{name}\towner: {owner}, age: {age}, '
+                    'expires in: {expiration}'.format(
+                        age=self.format_seconds(seconds=lock['age']),
+                        expiration=self.format_seconds(
+                            seconds=lock['expiration']
+                        ), name=lock['name'], owner=lock['owner'] or '-'
+                    )
+                )
+
+    def format_seconds(self, seconds):
+        if seconds is None:
+            return '-'
+        else:
+            return '{:.1f}s'.format(seconds)
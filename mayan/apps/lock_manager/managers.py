@@ -11,14 +11,14 @@ logger = logging.getLogger(name=__name__)
 
 
 class LockManager(models.Manager):
-    def acquire_lock(self, name, timeout=None):
+    def acquire_lock(self, name, owner='', timeout=None):
         """
         Attempts to acquire a lock. Return a LockError is the lock is already
         held by someone else or if is not possible to acquire the lock due to
         database or operational errors.
         """
         logger.debug('trying to acquire lock: %s', name)
-        lock = self.model(name=name, timeout=timeout)
+        lock = self.model(name=name, owner=owner, timeout=timeout)
 
         try:
             with transaction.atomic():
@@ -36,6 +36,8 @@ class LockManager(models.Manager):
 
             if now() > lock.creation_datetime + datetime.timedelta(seconds=lock.timeout):
                 logger.debug('reseting deleting stale lock: %s', name)
+                lock.creation_datetime = now()
+                lock.owner = owner
                 lock.timeout = timeout
                 logger.debug('trying to reacquire stale lock: %s', name)
                 lock.save()
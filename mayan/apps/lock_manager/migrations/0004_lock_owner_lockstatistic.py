@@ -0,0 +1,35 @@
+# Generated by Django 2.2.23 on 2026-10-19 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lock_manager', '0003_auto_20210130_0926'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LockStatistic',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(help_text='Leading part of the lock names, without the object specific part.', max_length=255, unique=True, verbose_name='Prefix')),
+                ('attempts', models.BigIntegerField(default=0, verbose_name='Attempts')),
+                ('failures', models.BigIntegerField(default=0, verbose_name='Failures')),
+                ('wait_seconds', models.FloatField(default=0, help_text='Total time spent acquiring the locks, including the failed attempts.', verbose_name='Wait time')),
+                ('hold_count', models.BigIntegerField(default=0, help_text='Number of locks released.', verbose_name='Releases')),
+                ('hold_seconds', models.FloatField(default=0, help_text='Total time the released locks were held.', verbose_name='Hold time')),
+            ],
+            options={
+                'verbose_name': 'Lock statistic',
+                'verbose_name_plural': 'Lock statistics',
+                'ordering': ('prefix',),
+            },
+        ),
+        migrations.AddField(
+            model_name='lock',
+            name='owner',
+            field=models.CharField(blank=True, help_text='Host name and process ID of the holder of the lock.', max_length=255, verbose_name='Owner'),
+        ),
+    ]
@@ -20,6 +20,11 @@ class Lock(models.Model):
     name = models.CharField(
         max_length=255, unique=True, verbose_name=_('Name')
     )
+    owner = models.CharField(
+        blank=True, help_text=_(
+            'Host name and process ID of the holder of the lock.'
+        ), max_length=255, verbose_name=_('Owner')
+    )
 
     objects = LockManager()
 
@@ -50,3 +55,68 @@ class Lock(models.Model):
             self.timeout = setting_default_lock_timeout.value
 
         super().save(*args, **kwargs)
+
+
+class LockStatistic(models.Model):
+    """
+    Totals of the lock acquisitions of all the processes, per lock name
+    prefix. Updated periodically by each process.
+    """
+    prefix = models.CharField(
+        help_text=_(
+            'Leading part of the lock names, without the object specific part.'
+        ), max_length=255, unique=True, verbose_name=_('Prefix')
+    )
+    attempts = models.BigIntegerField(
+        default=0, verbose_name=_('Attempts')
+    )
+    failures = models.BigIntegerField(
+        default=0, verbose_name=_('Failures')
+    )
+    wait_seconds = models.FloatField(
+        default=0, help_text=_(
+            'Total time spent acquiring the locks, including the failed '
+            'attempts.'
+        ), verbose_name=_('Wait time')
+    )
+    hold_count = models.BigIntegerField(
+        default=0, help_text=_('Number of locks released.'),
+        verbose_name=_('Releases')
+    )
+    hold_seconds = models.FloatField(
+        default=0, help_text=_(
+            'Total time the released locks were held.'
+        ), verbose_name=_('Hold time')
+    )
+
+    class Meta:
+        ordering = ('prefix',)
+        verbose_name = _('Lock statistic')
+        verbose_name_plural = _('Lock statistics')
+
+    def __str__(self):
+        return self.prefix
+
+    def get_average_hold_time(self):
+        if self.hold_count:
+            return self.hold_seconds / self.hold_count
+        else:
+            return 0
+
+    get_average_hold_time.short_description = _('Average hold time')
+
+    def get_average_wait_time(self):
+        if self.attempts:
+            return self.wait_seconds / self.attempts
+        else:
+            return 0
+
+    get_average_wait_time.short_description = _('Average wait time')
+
+    def get_failure_ratio(self):
+        if self.attempts:
+            return self.failures / self.attempts
+        else:
+            return 0
+
+    get_failure_ratio.short_description = _('Failure ratio')
@@ -4,7 +4,8 @@ from mayan.apps.smart_settings.classes import SettingNamespace
 
 from .literals import (
     DEFAULT_LOCK_MANAGER_BACKEND, DEFAULT_LOCK_MANAGER_BACKEND_ARGUMENTS,
-    DEFAULT_LOCK_MANAGER_DEFAULT_LOCK_TIMEOUT
+    DEFAULT_LOCK_MANAGER_DEFAULT_LOCK_TIMEOUT,
+    DEFAULT_LOCK_MANAGER_DEFAULT_WAIT_TIMEOUT
 )
 
 namespace = SettingNamespace(label=_('Lock manager'), name='lock_manager')
@@ -29,3 +30,11 @@ setting_default_lock_timeout = namespace.add_setting(
         'lock will be automatically released.'
     )
 )
+setting_default_wait_timeout = namespace.add_setting(
+    default=DEFAULT_LOCK_MANAGER_DEFAULT_WAIT_TIMEOUT,
+    global_name='LOCK_MANAGER_DEFAULT_WAIT_TIMEOUT', help_text=_(
+        'Default amount of time in seconds to wait for a resource lock held '
+        'by someone else to be released when requesting it in blocking '
+        'mode.'
+    )
+)
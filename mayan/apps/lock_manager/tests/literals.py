@@ -1,2 +1,4 @@
 TEST_LOCK_1 = 'test lock 1'
+TEST_LOCK_2 = 'test lock 2'
 TEST_LOCK_LONG_NAME = 'a' * 255
+TEST_LOCK_PREFIX = 'test lock'
@@ -1,12 +1,18 @@
+from io import StringIO
 import os
+import time
+
+import mock
 
 from django.core import management
 from django.utils.module_loading import import_string
 
+from ..classes import LockStatistics
 from ..exceptions import LockError
+from ..models import LockStatistic
 from ..settings import setting_default_lock_timeout
 
-from .literals import TEST_LOCK_1
+from .literals import TEST_LOCK_1, TEST_LOCK_2, TEST_LOCK_PREFIX
 
 
 class LockBackendManagementCommandTestCaseMixin:
@@ -26,6 +32,32 @@ class LockBackendManagementCommandTestCaseMixin:
         # Cleanup
         lock_2.release()
 
+    def test_showlocks_command(self):
+        lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+
+        os.environ['MAYAN_LOCK_MANAGER_BACKEND'] = self.backend_string
+        stdout = StringIO()
+        management.call_command(command_name='showlocks', stdout=stdout)
+
+        self.assertTrue(TEST_LOCK_1 in stdout.getvalue())
+        self.assertTrue(self.locking_backend.get_owner() in stdout.getvalue())
+
+        # Cleanup
+        lock_1.release()
+
+    def test_showlocks_command_statistics(self):
+        LockStatistics.clear()
+
+        lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+        lock_1.release()
+
+        stdout = StringIO()
+        management.call_command(
+            command_name='showlocks', statistics=True, stdout=stdout
+        )
+
+        self.assertTrue(TEST_LOCK_PREFIX in stdout.getvalue())
+
 
 class LockBackendTestMixin:
     def setUp(self):
@@ -34,6 +66,82 @@ class LockBackendTestMixin:
 
 
 class LockBackendTestCaseMixin:
+    def test_acquire_locks(self):
+        lock_1 = self.locking_backend.acquire_locks(
+            names=(TEST_LOCK_1, TEST_LOCK_2)
+        )
+
+        with self.assertRaises(expected_exception=LockError):
+            self.locking_backend.acquire_lock(name=TEST_LOCK_2)
+
+        lock_1.release()
+
+        lock_2 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+        lock_3 = self.locking_backend.acquire_lock(name=TEST_LOCK_2)
+
+        # Cleanup
+        lock_2.release()
+        lock_3.release()
+
+    def test_acquire_locks_all_or_none(self):
+        lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_2)
+
+        with self.assertRaises(expected_exception=LockError):
+            self.locking_backend.acquire_locks(
+                names=(TEST_LOCK_1, TEST_LOCK_2)
+            )
+
+        # The lock acquired before the failure was released.
+        lock_2 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+
+        # Cleanup
+        lock_1.release()
+        lock_2.release()
+
+    def test_blocking_acquire_after_expiration(self):
+        self.locking_backend.acquire_lock(name=TEST_LOCK_1, timeout=1)
+
+        lock_2 = self.locking_backend.acquire_lock(
+            blocking=True, name=TEST_LOCK_1, wait_timeout=5
+        )
+
+        # Cleanup
+        lock_2.release()
+
+    def test_blocking_acquire_wait_timeout(self):
+        lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+
+        time_start = time.monotonic()
+        with self.assertRaises(expected_exception=LockError):
+            self.locking_backend.acquire_lock(
+                blocking=True, name=TEST_LOCK_1, wait_timeout=0.3
+            )
+        self.assertGreaterEqual(time.monotonic() - time_start, 0.3)
+
+        # Cleanup
+        lock_1.release()
+
+    def test_get_held_locks(self):
+        lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_1, timeout=30)
+        lock_2 = self.locking_backend.acquire_lock(name=TEST_LOCK_2, timeout=30)
+        lock_2.release()
+
+        held_locks = [
+            lock for lock in self.locking_backend.get_held_locks()
+            if lock['name'] in (TEST_LOCK_1, TEST_LOCK_2)
+        ]
+
+        self.assertEqual(len(held_locks), 1)
+        self.assertEqual(held_locks[0]['name'], TEST_LOCK_1)
+        self.assertEqual(
+            held_locks[0]['owner'], self.locking_backend.get_owner()
+        )
+        self.assertGreaterEqual(held_locks[0]['age'], 0)
+        self.assertLessEqual(held_locks[0]['expiration'], 30)
+
+        # Cleanup
+        lock_1.release()
+
     def test_exclusive(self):
         lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
         with self.assertRaises(expected_exception=LockError):
@@ -50,6 +158,57 @@ class LockBackendTestCaseMixin:
         # Cleanup
         lock_2.release()
 
+    def test_statistics(self):
+        LockStatistics.clear()
+
+        lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+        with self.assertRaises(expected_exception=LockError):
+            self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+        lock_1.release()
+
+        lock_2 = self.locking_backend.acquire_locks(
+            names=(TEST_LOCK_1, TEST_LOCK_2)
+        )
+        lock_2.release()
+
+        LockStatistics.flush()
+
+        lock_statistic = LockStatistic.objects.get(prefix=TEST_LOCK_PREFIX)
+        self.assertEqual(lock_statistic.attempts, 3)
+        self.assertEqual(lock_statistic.failures, 1)
+        self.assertEqual(lock_statistic.hold_count, 2)
+        self.assertGreaterEqual(lock_statistic.hold_seconds, 0)
+
+    @mock.patch('mayan.apps.lock_manager.classes.STATISTICS_FLUSH_INTERVAL', 0)
+    def test_statistics_flush_after_transaction(self):
+        LockStatistics.clear()
+
+        lock = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+        lock.release()
+
+        # The test case transaction is not committed.
+        self.assertFalse(
+            LockStatistic.objects.filter(prefix=TEST_LOCK_PREFIX).exists()
+        )
+
+    def test_statistics_disabled(self):
+        LockStatistics.clear()
+
+        lock_1 = self.locking_backend.acquire_lock(
+            name=TEST_LOCK_1, statistics=False
+        )
+        with self.assertRaises(expected_exception=LockError):
+            self.locking_backend.acquire_lock(
+                name=TEST_LOCK_1, statistics=False
+            )
+        lock_1.release()
+
+        LockStatistics.flush()
+
+        self.assertFalse(
+            LockStatistic.objects.filter(prefix=TEST_LOCK_PREFIX).exists()
+        )
+
     def test_timeout_expired(self):
         self.locking_backend.acquire_lock(name=TEST_LOCK_1, timeout=1)
 
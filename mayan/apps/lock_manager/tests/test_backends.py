@@ -1,20 +1,94 @@
-from unittest import skip
+import multiprocessing
+import os
+import threading
+from unittest import skip, skipUnless
 
+from django.core.files import locks
+from django.db import connection, transaction
 from django.test import override_settings
 
 from mayan.apps.testing.tests.base import BaseTestCase
 
+from ..backends.literals import POSTGRESQL_LOCK_UNKNOWN_NAME
+from ..exceptions import LockError
+from ..settings import setting_backend_arguments
+
+from .literals import TEST_LOCK_1, TEST_LOCK_2, TEST_LOCK_LONG_NAME
 from .mixins import (
     LockBackendTestCaseMixin, LockBackendTestMixin, DefaultTimeoutTestMixin
 )
 
 
+def _acquire_file_lock(name):
+    from ..backends.file_lock import FileLock
+
+    try:
+        FileLock.acquire_lock(name=name, timeout=30)
+    except LockError:
+        return False
+    else:
+        return True
+
+
 class FileLockBackendTestCase(
     LockBackendTestMixin, LockBackendTestCaseMixin, DefaultTimeoutTestMixin,
     BaseTestCase
 ):
     backend_string = 'mayan.apps.lock_manager.backends.file_lock.FileLock'
 
+    def test_concurrent_processes(self):
+        with multiprocessing.get_context('fork').Pool(processes=4) as pool:
+            results = pool.map(
+                _acquire_file_lock, ['test concurrent lock'] * 8
+            )
+
+        self.assertEqual(results.count(True), 1)
+
+        self.locking_backend.purge_locks()
+
+    def test_file_briefly_busy(self):
+        file_object = self.locking_backend._open_lock_file(
+            path=self.locking_backend._get_lock_path(name=TEST_LOCK_1)
+        )
+
+        def unlock():
+            locks.unlock(f=file_object)
+            file_object.close()
+
+        timer = threading.Timer(interval=0.2, function=unlock)
+        timer.start()
+
+        try:
+            lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+        finally:
+            timer.join()
+
+        lock_1.release()
+
+    def test_long_name(self):
+        lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_LONG_NAME)
+        lock_1.release()
+
+    def test_release_deletes_file(self):
+        lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+        self.assertTrue(os.path.exists(lock_1.path))
+
+        lock_1.release()
+        self.assertFalse(os.path.exists(lock_1.path))
+
+    def test_stale_lock_purge(self):
+        lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_1, timeout=1)
+        lock_2 = self.locking_backend.acquire_lock(name=TEST_LOCK_2, timeout=30)
+
+        self._test_delay(seconds=1.01)
+
+        self.assertEqual(self.locking_backend._purge_stale_locks(), 1)
+        self.assertFalse(os.path.exists(lock_1.path))
+        self.assertTrue(os.path.exists(lock_2.path))
+
+        # Cleanup
+        lock_2.release()
+
 
 class ModelLockBackendTestCase(
     LockBackendTestMixin, LockBackendTestCaseMixin, DefaultTimeoutTestMixin,
@@ -23,6 +97,60 @@ class ModelLockBackendTestCase(
     backend_string = 'mayan.apps.lock_manager.backends.model_lock.ModelLock'
 
 
+@skipUnless(
+    condition=connection.vendor == 'postgresql',
+    reason='Requires a PostgreSQL database.'
+)
+class PostgreSQLLockBackendTestCase(
+    LockBackendTestMixin, LockBackendTestCaseMixin, DefaultTimeoutTestMixin,
+    BaseTestCase
+):
+    backend_string = 'mayan.apps.lock_manager.backends.postgresql_lock.PostgreSQLLock'
+
+    def test_lease_expiration_releases_lock(self):
+        self.locking_backend.acquire_lock(name=TEST_LOCK_1, timeout=1)
+
+        self._test_delay(seconds=2)
+
+        # Released by the server, not only forgotten by the process.
+        names = [
+            lock['name'] for lock in self.locking_backend.get_held_locks()
+        ]
+        self.assertFalse(TEST_LOCK_1 in names)
+        self.assertFalse(
+            POSTGRESQL_LOCK_UNKNOWN_NAME.format(
+                self.locking_backend._get_key(name=TEST_LOCK_1)
+            ) in names
+        )
+
+    def test_transaction_scope(self):
+        setting_backend_arguments.set(value={'scope': 'transaction'})
+
+        with transaction.atomic():
+            lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+            self.assertTrue(lock_1.is_transaction_scoped)
+
+            with self.assertRaises(expected_exception=LockError):
+                self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+
+            # Held until the end of the transaction.
+            lock_1.release()
+            with self.assertRaises(expected_exception=LockError):
+                self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+
+            transaction.set_rollback(rollback=True)
+
+        lock_2 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+
+        # Session scoped locks wait for the transaction scoped ones.
+        setting_backend_arguments.set(value={'scope': 'session'})
+        with self.assertRaises(expected_exception=LockError):
+            self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+
+        # Cleanup
+        lock_2.release()
+
+
 @skip('Skip until a Mock Redis server class is added.')
 @override_settings(
     LOCK_MANAGER_BACKEND_ARGUMENTS={'redis_url': 'redis://127.0.0.1:6379/0'}
@@ -32,3 +160,25 @@ class RedisLockBackendTestCase(
     BaseTestCase
 ):
     backend_string = 'mayan.apps.lock_manager.backends.redis_lock.RedisLock'
+
+    def test_fencing_token(self):
+        lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+        lock_1.release()
+        lock_2 = self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+
+        self.assertGreater(lock_2.fencing_token, lock_1.fencing_token)
+
+        # Cleanup
+        lock_2.release()
+
+    def test_lease_renewal(self):
+        lock_1 = self.locking_backend.acquire_lock(name=TEST_LOCK_1, timeout=1)
+
+        self._test_delay(seconds=2)
+
+        # Still held by lock_1, the watchdog renewed the lease.
+        with self.assertRaises(expected_exception=LockError):
+            self.locking_backend.acquire_lock(name=TEST_LOCK_1)
+
+        # Cleanup
+        lock_1.release()
@@ -1,5 +1,6 @@
-from unittest import skip
+from unittest import skip, skipUnless
 
+from django.db import connection
 from django.test import override_settings
 
 from mayan.apps.testing.tests.base import BaseTestCase
@@ -23,6 +24,17 @@ class ModelLockBackendManagementCommandTestCase(
     backend_string = 'mayan.apps.lock_manager.backends.model_lock.ModelLock'
 
 
+@skipUnless(
+    condition=connection.vendor == 'postgresql',
+    reason='Requires a PostgreSQL database.'
+)
+class PostgreSQLLockBackendManagementCommandTestCase(
+    LockBackendTestMixin, LockBackendManagementCommandTestCaseMixin,
+    BaseTestCase
+):
+    backend_string = 'mayan.apps.lock_manager.backends.postgresql_lock.PostgreSQLLock'
+
+
 @skip('Skip until a Mock Redis server class is added.')
 @override_settings(
     LOCK_MANAGER_BACKEND_ARGUMENTS={'redis_url': 'redis://127.0.0.1:6379/0'}
@@ -1,6 +1,11 @@
+import base64
+import binascii
+from io import BytesIO
+
 from django.conf import settings
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.translation import ugettext_lazy as _
 
 from rest_framework import status
 from rest_framework.generics import get_object_or_404 as rest_get_object_or_404
@@ -9,27 +14,177 @@ from rest_framework.response import Response
 from mayan.apps.acls.models import AccessControlList
 from mayan.apps.documents.models.document_models import DocumentType
 from mayan.apps.documents.permissions import permission_document_create
+from mayan.apps.lock_manager.exceptions import LockError
 from mayan.apps.permissions.classes import Permission
 from mayan.apps.rest_api import generics
-from mayan.apps.storage.classes import DefinedStorage
+from mayan.apps.rest_api.api_view_mixins import ExternalObjectAPIViewMixin
 from mayan.apps.storage.models import SharedUploadedFile
 
-from .literals import STAGING_FILE_IMAGE_TASK_TIMEOUT, STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE
-from .models import StagingFolderSource
+from .exceptions import (
+    ResumableUploadChecksumError, ResumableUploadError,
+    ResumableUploadOffsetError
+)
+from .literals import (
+    RESUMABLE_UPLOAD_CHECKSUM_ALGORITHM, RESUMABLE_UPLOAD_HEADER_CHECKSUM,
+    RESUMABLE_UPLOAD_HEADER_OFFSET, RESUMABLE_UPLOAD_STATUS_CHECKSUM_MISMATCH,
+    SOURCE_UNCOMPRESS_CHOICE_ASK, SOURCE_UNCOMPRESS_CHOICE_Y,
+    STAGING_FILE_IMAGE_TASK_TIMEOUT
+)
+from .models import StagingFolderSource, WebFormSource
 from .permissions import (
     permission_sources_setup_create, permission_sources_setup_delete,
     permission_sources_setup_edit, permission_sources_setup_view,
     permission_staging_file_delete
 )
 from .serializers import (
-    StagingFolderFileSerializer, StagingFolderFileUploadSerializer,
-    StagingFolderSerializer
+    ResumableUploadSerializer, StagingFolderFileSerializer,
+    StagingFolderFileUploadSerializer, StagingFolderSerializer
 )
 from .tasks import (
     task_generate_staging_file_image, task_source_handle_upload
 )
 
 
+class APIResumableUploadFinalizeView(
+    ExternalObjectAPIViewMixin, generics.ObjectActionAPIView
+):
+    """
+    post: Finish the selected resumable upload and process the uploaded file.
+    """
+    external_object_pk_url_kwarg = 'source_id'
+    external_object_queryset = WebFormSource.objects.filter(enabled=True)
+    lookup_url_kwarg = 'resumable_upload_id'
+
+    def get_queryset(self):
+        return self.external_object.resumable_uploads.filter(
+            user=self.request.user
+        )
+
+    def view_action(self, request, *args, **kwargs):
+        try:
+            self.get_object().finalize()
+        except ResumableUploadError as exception:
+            return Response(
+                data={'detail': str(exception)},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response(status=status.HTTP_202_ACCEPTED)
+
+
+class APIResumableUploadListView(
+    ExternalObjectAPIViewMixin, generics.ListCreateAPIView
+):
+    """
+    get: Returns a list of the resumable uploads of the current user for the selected source.
+    post: Start a new resumable upload.
+    """
+    external_object_pk_url_kwarg = 'source_id'
+    external_object_queryset = WebFormSource.objects.filter(enabled=True)
+    serializer_class = ResumableUploadSerializer
+
+    def get_queryset(self):
+        return self.external_object.resumable_uploads.filter(
+            user=self.request.user
+        )
+
+    def perform_create(self, serializer):
+        queryset = AccessControlList.objects.restrict_queryset(
+            queryset=DocumentType.objects.all(),
+            permission=permission_document_create,
+            user=self.request.user
+        )
+
+        serializer.validated_data['document_type'] = rest_get_object_or_404(
+            queryset=queryset,
+            pk=serializer.validated_data['document_type_id']
+        )
+
+        if self.external_object.uncompress != SOURCE_UNCOMPRESS_CHOICE_ASK:
+            serializer.validated_data['expand'] = self.external_object.uncompress == SOURCE_UNCOMPRESS_CHOICE_Y
+
+        serializer.validated_data['source'] = self.external_object
+        serializer.validated_data['user'] = self.request.user
+        super().perform_create(serializer=serializer)
+
+
+class APIResumableUploadView(
+    ExternalObjectAPIViewMixin, generics.RetrieveDestroyAPIView
+):
+    """
+    delete: Cancel the selected resumable upload.
+    get: Return the details of the selected resumable upload.
+    patch: Append a chunk to the selected resumable upload. The request body is the chunk content. The Upload-Offset header must match the current offset of the upload. The optional Upload-Checksum header, in the format "sha256 <Base64 digest>", is used to verify the chunk.
+    """
+    external_object_pk_url_kwarg = 'source_id'
+    external_object_queryset = WebFormSource.objects.filter(enabled=True)
+    lookup_url_kwarg = 'resumable_upload_id'
+    serializer_class = ResumableUploadSerializer
+
+    def get_queryset(self):
+        return self.external_object.resumable_uploads.filter(
+            user=self.request.user
+        )
+
+    def get_upload_checksum(self):
+        header = self.request.META.get(RESUMABLE_UPLOAD_HEADER_CHECKSUM)
+
+        if header is None:
+            return None
+
+        try:
+            algorithm, digest = header.split()
+            if algorithm.lower() != RESUMABLE_UPLOAD_CHECKSUM_ALGORITHM:
+                raise ValueError
+            return base64.b64decode(s=digest, validate=True)
+        except (binascii.Error, ValueError):
+            raise ResumableUploadError(
+                _('Invalid Upload-Checksum header.')
+            )
+
+    def patch(self, request, *args, **kwargs):
+        resumable_upload = self.get_object()
+
+        try:
+            offset = int(request.META[RESUMABLE_UPLOAD_HEADER_OFFSET])
+        except (KeyError, ValueError):
+            return Response(
+                data={'detail': _('Missing or invalid Upload-Offset header.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            offset = resumable_upload.append(
+                checksum=self.get_upload_checksum(),
+                file_object=request.stream or BytesIO(), offset=offset
+            )
+        except ResumableUploadChecksumError as exception:
+            return Response(
+                data={'detail': str(exception)},
+                status=RESUMABLE_UPLOAD_STATUS_CHECKSUM_MISMATCH
+            )
+        except (LockError, ResumableUploadOffsetError):
+            return Response(
+                data={'detail': _('Upload offset conflict.')},
+                headers={'Upload-Offset': str(resumable_upload.get_offset())},
+                status=status.HTTP_409_CONFLICT
+            )
+        except ResumableUploadError as exception:
+            return Response(
+                data={'detail': str(exception)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            headers={'Upload-Offset': str(offset)},
+            status=status.HTTP_204_NO_CONTENT
+        )
+
+    def perform_destroy(self, instance):
+        # Deleting the shared uploaded file deletes the resumable upload.
+        instance.shared_uploaded_file.delete()
+
+
 class APIStagingSourceFileView(generics.RetrieveDestroyAPIView):
     """
     get: Details of the selected staging file.
@@ -111,11 +266,17 @@ class APIStagingSourceFileImageView(generics.RetrieveAPIView):
             kwargs['disable_sync_subtasks'] = False
 
         cache_filename = task.get(**kwargs)
-        storage_staging_file_image_cache = DefinedStorage.get(
-            name=STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE
-        ).get_storage_instance()
 
-        with storage_staging_file_image_cache.open(name=cache_filename) as file_object:
+        staging_folder = get_object_or_404(
+            klass=StagingFolderSource, pk=self.kwargs['staging_folder_pk']
+        )
+        staging_file = staging_folder.get_file(
+            encoded_filename=self.kwargs['encoded_filename']
+        )
+        cache_file = staging_file.cache_partition.get_file(
+            filename=cache_filename
+        )
+        with cache_file.open() as file_object:
             response = HttpResponse(file_object.read(), content_type='image')
             return response
 
@@ -150,6 +311,9 @@ class APIStagingSourceFileUploadView(generics.GenericAPIView):
         shared_uploaded_file = SharedUploadedFile.objects.create(
             file=staging_file_object.file
         )
+        staging_folder.clean_up_upload_file(
+            upload_file_object=staging_file_object
+        )
 
         task_source_handle_upload.apply_async(
             kwargs={
@@ -1,5 +1,5 @@
 from django.apps import apps
-from django.db.models.signals import pre_delete
+from django.db.models.signals import post_migrate, pre_delete
 from django.utils.translation import ugettext_lazy as _
 
 from mayan.apps.common.apps import MayanAppConfig
@@ -21,6 +21,7 @@ from .classes import DocumentCreateWizardStep, StagingFile
 from .handlers import (
     handler_copy_transformations_to_file,
     handler_create_default_document_source,
+    handler_create_staging_file_image_cache,
     handler_delete_interval_source_periodic_task,
     handler_initialize_periodic_tasks
 )
@@ -160,6 +161,10 @@ class SourcesApp(MayanAppConfig):
             )
         )
 
+        post_migrate.connect(
+            dispatch_uid='sources_handler_create_staging_file_image_cache',
+            receiver=handler_create_staging_file_image_cache,
+        )
         pre_delete.connect(
             receiver=handler_delete_interval_source_periodic_task,
             sender=DocumentType,
@@ -1,4 +1,5 @@
 import base64
+import hashlib
 import logging
 import os
 import time
@@ -6,18 +7,23 @@ from urllib.parse import quote_plus, unquote_plus
 
 from furl import furl
 
+from django.apps import apps
 from django.core.files import File
-from django.core.files.base import ContentFile
 from django.urls import reverse
-from django.utils.encoding import force_text
+from django.utils.encoding import force_bytes, force_text
 from django.utils.functional import cached_property
 
 from mayan.apps.common.class_mixins import AppsModuleLoaderMixin
 from mayan.apps.converter.classes import ConverterBase
-from mayan.apps.converter.transformations import TransformationResize
-from mayan.apps.storage.classes import DefinedStorage
+from mayan.apps.converter.transformations import (
+    BaseTransformation, TransformationResize
+)
+from mayan.apps.lock_manager.backends.base import LockingBackend
 
-from .literals import STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE
+from .literals import (
+    STAGING_FILE_IMAGE_LOCK_NAME, STAGING_FILE_IMAGE_TASK_TIMEOUT,
+    STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE
+)
 
 logger = logging.getLogger(name=__name__)
 
@@ -145,33 +151,90 @@ class StagingFile:
             ), name=self.filename
         )
 
-    @property
-    def cache_filename(self):
-        return '{}{}'.format(self.staging_folder.pk, self.encoded_filename)
+    @cached_property
+    def cache(self):
+        Cache = apps.get_model(app_label='file_caching', model_name='Cache')
+        return Cache.objects.get(
+            defined_storage_name=STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE
+        )
+
+    @cached_property
+    def cache_partition(self):
+        partition, created = self.cache.partitions.get_or_create(
+            name=self.cache_partition_name
+        )
+        return partition
+
+    @cached_property
+    def cache_partition_name(self):
+        return '{}-{}'.format(
+            self.staging_folder.pk, hashlib.sha256(
+                force_bytes(s=self.get_full_path())
+            ).hexdigest()
+        )
+
+    def cache_purge(self):
+        """
+        Delete all the cached images of the staging file. Filter instead of
+        using the `cache_partition` property to avoid creating an empty
+        partition just to delete it.
+        """
+        queryset = self.cache.partitions.filter(
+            name=self.cache_partition_name
+        )
+        for partition in queryset:
+            partition.delete()
 
     def delete(self):
-        self.storage.delete(self.cache_filename)
+        self.cache_purge()
         os.unlink(self.get_full_path())
 
     def generate_image(self, *args, **kwargs):
-        transformation_list = self.get_combined_transformation_list(*args, **kwargs)
+        CachePartitionFile = apps.get_model(
+            app_label='file_caching', model_name='CachePartitionFile'
+        )
+
+        transformation_list = self.get_combined_transformation_list(
+            *args, **kwargs
+        )
+        combined_cache_filename = self.get_combined_cache_filename(
+            _transformation_list=transformation_list
+        )
 
-        # Check is transformed image is available
-        logger.debug('transformations cache filename: %s', self.cache_filename)
+        logger.debug(
+            'transformations cache filename: %s', combined_cache_filename
+        )
 
-        if self.storage.exists(self.cache_filename):
-            logger.debug(
-                'staging file cache file "%s" found', self.cache_filename
-            )
-        else:
-            logger.debug(
-                'staging file cache file "%s" not found', self.cache_filename
-            )
-            image = self.get_image(transformations=transformation_list)
-            with self.storage.open(name=self.cache_filename, mode='wb+') as file_object:
-                file_object.write(image.getvalue())
+        lock = LockingBackend.get_backend().acquire_lock(
+            name=STAGING_FILE_IMAGE_LOCK_NAME.format(
+                self.cache_partition_name, combined_cache_filename
+            ), timeout=STAGING_FILE_IMAGE_TASK_TIMEOUT
+        )
 
-        return self.cache_filename
+        # Second try block to release the lock even on fatal errors inside
+        # the block.
+        try:
+            try:
+                self.cache_partition.get_file(
+                    filename=combined_cache_filename
+                )
+            except CachePartitionFile.DoesNotExist:
+                logger.debug(
+                    'staging file cache file "%s" not found',
+                    combined_cache_filename
+                )
+                image = self.get_image(transformations=transformation_list)
+                with self.cache_partition.create_file(filename=combined_cache_filename) as file_object:
+                    file_object.write(image.getvalue())
+            else:
+                logger.debug(
+                    'staging file cache file "%s" found',
+                    combined_cache_filename
+                )
+
+            return combined_cache_filename
+        finally:
+            lock.release()
 
     def get_api_image_url(self, *args, **kwargs):
         final_url = furl()
@@ -185,6 +248,29 @@ class StagingFile:
 
         return final_url.tostr()
 
+    def get_combined_cache_filename(self, _transformation_list=None, *args, **kwargs):
+        """
+        The cache filename is keyed to the size and modification time of
+        the staging file. If the file is replaced or edited in place the
+        previous cached images stop matching and are eventually pruned.
+        """
+        transformation_list = _transformation_list or self.get_combined_transformation_list(
+            *args, **kwargs
+        )
+        stat_result = os.stat(self.get_full_path())
+
+        if transformation_list:
+            transformation_hash = BaseTransformation.combine(
+                transformations=transformation_list
+            )
+        else:
+            transformation_hash = 'base_image'
+
+        return '{}-{}-{}'.format(
+            stat_result.st_size, stat_result.st_mtime_ns,
+            transformation_hash
+        )
+
     def get_combined_transformation_list(self, *args, **kwargs):
         """
         Return a list of transformation containing the server side
@@ -220,44 +306,12 @@ class StagingFile:
         return os.path.join(self.staging_folder.folder_path, self.filename)
 
     def get_image(self, transformations=None):
-        cache_filename = self.cache_filename
-        file_object = None
-
-        try:
-            file_object = open(file=self.get_full_path(), mode='rb')
+        with open(file=self.get_full_path(), mode='rb') as file_object:
             converter = ConverterBase.get_converter_class()(
                 file_object=file_object
             )
 
-            page_image = converter.get_page()
-
-            # Since open "wb+" doesn't create files, check if the file
-            # exists, if not then create it
-            if not self.storage.exists(cache_filename):
-                self.storage.save(name=cache_filename, content=ContentFile(content=''))
-
-            with self.storage.open(name=cache_filename, mode='wb+') as file_object:
-                file_object.write(page_image.getvalue())
-        except Exception as exception:
-            # Cleanup in case of error
-            logger.error(
-                'Error creating staging file cache "%s"; %s',
-                cache_filename, exception, exc_info=True
-            )
-            self.storage.delete(cache_filename)
-            if file_object:
-                file_object.close()
-            raise
-
-        for transformation in transformations:
-            converter.transform(transformation=transformation)
+            for transformation in transformations or ():
+                converter.transform(transformation=transformation)
 
-        result = converter.get_page()
-        file_object.close()
-        return result
-
-    @cached_property
-    def storage(self):
-        return DefinedStorage.get(
-            name=STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE
-        ).get_storage_instance()
+            return converter.get_page()
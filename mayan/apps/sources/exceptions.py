@@ -1,2 +1,14 @@
 class SourceException(Exception):
     """Base sources warning"""
+
+
+class ResumableUploadError(SourceException):
+    """Base resumable upload exception"""
+
+
+class ResumableUploadChecksumError(ResumableUploadError):
+    """The checksum of an uploaded chunk does not match its content"""
+
+
+class ResumableUploadOffsetError(ResumableUploadError):
+    """The offset of an uploaded chunk does not match the upload offset"""
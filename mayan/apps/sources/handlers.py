@@ -3,7 +3,10 @@ from django.utils.translation import ugettext_lazy as _
 
 from mayan.apps.converter.layers import layer_saved_transformations
 
-from .literals import SOURCE_UNCOMPRESS_CHOICE_ASK
+from .literals import (
+    SOURCE_UNCOMPRESS_CHOICE_ASK, STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE
+)
+from .settings import setting_staging_file_image_cache_maximum_size
 
 
 def handler_copy_transformations_to_file(sender, instance, **kwargs):
@@ -23,6 +26,15 @@ def handler_create_default_document_source(sender, **kwargs):
         )
 
 
+def handler_create_staging_file_image_cache(sender, **kwargs):
+    Cache = apps.get_model(app_label='file_caching', model_name='Cache')
+    Cache.objects.update_or_create(
+        defaults={
+            'maximum_size': setting_staging_file_image_cache_maximum_size.value,
+        }, defined_storage_name=STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE,
+    )
+
+
 def handler_delete_interval_source_periodic_task(sender, instance, **kwargs):
     for interval_source in instance.interval_sources.all():
         interval_source._delete_periodic_task()
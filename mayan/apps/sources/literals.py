@@ -13,11 +13,24 @@ DEFAULT_SOURCE_LOCK_EXPIRE = 600
 DEFAULT_SOURCE_TASK_RETRY_DELAY = 10
 
 DEFAULT_SOURCES_SCANIMAGE_PATH = '/usr/bin/scanimage'
+DEFAULT_SOURCES_STAGING_FILE_CACHE_MAXIMUM_SIZE = 100 * 2 ** 20  # 100 Megabytes
 DEFAULT_SOURCES_STAGING_FILE_CACHE_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
 DEFAULT_SOURCES_STAGING_FILE_CACHE_STORAGE_BACKEND_ARGUMENTS = {
     'location': os.path.join(settings.MEDIA_ROOT, 'staging_file_cache')
 }
 
+RESUMABLE_UPLOAD_CHECKSUM_ALGORITHM = 'sha256'
+RESUMABLE_UPLOAD_CHUNK_READ_SIZE = 64 * 1024  # 64K
+RESUMABLE_UPLOAD_CONTENT_TYPE = 'application/offset+octet-stream'
+RESUMABLE_UPLOAD_HEADER_CHECKSUM = 'HTTP_UPLOAD_CHECKSUM'
+RESUMABLE_UPLOAD_HEADER_OFFSET = 'HTTP_UPLOAD_OFFSET'
+RESUMABLE_UPLOAD_LOCK_NAME = 'sources_resumable_upload_{}'
+RESUMABLE_UPLOAD_LOCK_TIMEOUT = 600
+RESUMABLE_UPLOAD_STATUS_CHECKSUM_MISMATCH = 460
+
+STAGING_FILE_IMAGE_PENDING_LOCK_NAME = 'sources_staging_file_image_pending_{}'
+STAGING_FILE_IMAGE_PENDING_LOCK_TIMEOUT = 120
+
 SCANNER_SOURCE_FLATBED = 'flatbed'
 SCANNER_SOURCE_ADF = 'Automatic Document Feeder'
 
@@ -74,5 +87,6 @@ SOURCE_CHOICES = (
     (SOURCE_CHOICE_EMAIL_POP3, _('POP3 email')),
     (SOURCE_CHOICE_EMAIL_IMAP, _('IMAP email')),
 )
+STAGING_FILE_IMAGE_LOCK_NAME = 'sources_staging_file_generate_image_{}_{}'
 STAGING_FILE_IMAGE_TASK_TIMEOUT = 120
 STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE = 'sources__staging_file_image_cache'
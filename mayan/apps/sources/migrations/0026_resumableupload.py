@@ -0,0 +1,37 @@
+# Generated by Django 2.2.23 on 2026-10-19 08:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0007_auto_20210218_0708'),
+        ('documents', '0075_delete_duplicateddocumentold'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('sources', '0025_delete_sourcelog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumableUpload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('length', models.BigIntegerField(help_text='Total size in bytes of the file being uploaded.', verbose_name='Length')),
+                ('expand', models.BooleanField(default=False, help_text="Upload a compressed file's contained files as individual documents.", verbose_name='Expand compressed files')),
+                ('label', models.CharField(blank=True, max_length=255, verbose_name='Label')),
+                ('datetime', models.DateTimeField(auto_now_add=True, verbose_name='Date time')),
+                ('document_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumable_uploads', to='documents.DocumentType', verbose_name='Document type')),
+                ('shared_uploaded_file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resumable_upload', to='storage.SharedUploadedFile', verbose_name='Shared uploaded file')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumable_uploads', to='sources.WebFormSource', verbose_name='Source')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumable_uploads', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Resumable upload',
+                'verbose_name_plural': 'Resumable uploads',
+                'ordering': ('datetime',),
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from .base import *  # NOQA
+from .resumable_upload_models import *  # NOQA
 from .email_sources import *  # NOQA
 from .scanner_sources import *  # NOQA
 from .staging_folder_sources import *  # NOQA
@@ -0,0 +1,213 @@
+import hashlib
+import logging
+import shutil
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+from mayan.apps.documents.models import Document, DocumentFile, DocumentType
+from mayan.apps.lock_manager.backends.base import LockingBackend
+from mayan.apps.storage.classes import DefinedStorage
+from mayan.apps.storage.literals import STORAGE_NAME_SHARED_UPLOADED_FILE
+from mayan.apps.storage.models import SharedUploadedFile
+from mayan.apps.storage.utils import TemporaryFile
+
+from ..exceptions import (
+    ResumableUploadChecksumError, ResumableUploadError,
+    ResumableUploadOffsetError
+)
+from ..literals import (
+    RESUMABLE_UPLOAD_CHECKSUM_ALGORITHM, RESUMABLE_UPLOAD_CHUNK_READ_SIZE,
+    RESUMABLE_UPLOAD_LOCK_NAME, RESUMABLE_UPLOAD_LOCK_TIMEOUT
+)
+
+from .webform_sources import WebFormSource
+
+__all__ = ('ResumableUpload',)
+logger = logging.getLogger(name=__name__)
+
+
+class ResumableUpload(models.Model):
+    """
+    Track a file uploaded in chunks over several requests. Chunks are
+    appended to a shared uploaded file which is handed to the source upload
+    task, without further copies, when the upload is finalized. The offset
+    of the upload is the size of the shared uploaded file, chunks interrupted
+    midway are resumed from the last byte written.
+    """
+    source = models.ForeignKey(
+        on_delete=models.CASCADE, related_name='resumable_uploads',
+        to=WebFormSource, verbose_name=_('Source')
+    )
+    document_type = models.ForeignKey(
+        on_delete=models.CASCADE, related_name='resumable_uploads',
+        to=DocumentType, verbose_name=_('Document type')
+    )
+    user = models.ForeignKey(
+        on_delete=models.CASCADE, related_name='resumable_uploads',
+        to=settings.AUTH_USER_MODEL, verbose_name=_('User')
+    )
+    shared_uploaded_file = models.OneToOneField(
+        on_delete=models.CASCADE, related_name='resumable_upload',
+        to=SharedUploadedFile, verbose_name=_('Shared uploaded file')
+    )
+    length = models.BigIntegerField(
+        help_text=_('Total size in bytes of the file being uploaded.'),
+        verbose_name=_('Length')
+    )
+    expand = models.BooleanField(
+        default=False, help_text=_(
+            'Upload a compressed file\'s contained files as individual '
+            'documents.'
+        ), verbose_name=_('Expand compressed files')
+    )
+    label = models.CharField(
+        blank=True, max_length=255, verbose_name=_('Label')
+    )
+    datetime = models.DateTimeField(
+        auto_now_add=True, verbose_name=_('Date time')
+    )
+
+    class Meta:
+        ordering = ('datetime',)
+        verbose_name = _('Resumable upload')
+        verbose_name_plural = _('Resumable uploads')
+
+    @staticmethod
+    def check_storage():
+        """
+        Raise ResumableUploadError if the storage of the shared uploaded
+        files is not able to append chunks to a stored file. Only plain
+        filesystem storages are, passthrough storages like the encrypted
+        or compressed ones transform the file as a whole.
+        """
+        storage = DefinedStorage.get(
+            name=STORAGE_NAME_SHARED_UPLOADED_FILE
+        ).get_storage_instance()
+
+        if not isinstance(storage, FileSystemStorage):
+            raise ResumableUploadError(
+                'Resumable uploads require a filesystem storage for the '
+                'shared uploaded files, "{}" is not supported.'.format(
+                    type(storage).__name__
+                )
+            )
+
+    def __str__(self):
+        return str(self.shared_uploaded_file)
+
+    def append(self, file_object, offset, checksum=None):
+        """
+        Append a chunk to the upload. The chunk is verified against the
+        optional checksum digest before being written. Returns the new
+        offset of the upload.
+        """
+        ResumableUpload.check_storage()
+
+        lock = LockingBackend.get_backend().acquire_lock(
+            name=RESUMABLE_UPLOAD_LOCK_NAME.format(self.pk),
+            timeout=RESUMABLE_UPLOAD_LOCK_TIMEOUT
+        )
+
+        try:
+            upload_offset = self.get_offset()
+
+            if offset != upload_offset:
+                raise ResumableUploadOffsetError(
+                    'Chunk offset {} does not match the upload offset '
+                    '{}.'.format(offset, upload_offset)
+                )
+
+            hash_object = hashlib.new(name=RESUMABLE_UPLOAD_CHECKSUM_ALGORITHM)
+
+            with TemporaryFile() as temporary_file_object:
+                chunk_size = 0
+
+                while True:
+                    data = file_object.read(RESUMABLE_UPLOAD_CHUNK_READ_SIZE)
+                    if not data:
+                        break
+
+                    chunk_size += len(data)
+
+                    if upload_offset + chunk_size > self.length:
+                        raise ResumableUploadError(
+                            'Chunk exceeds the upload length of {}.'.format(
+                                self.length
+                            )
+                        )
+
+                    hash_object.update(data)
+                    temporary_file_object.write(data)
+
+                if checksum is not None and hash_object.digest() != checksum:
+                    raise ResumableUploadChecksumError(
+                        'Chunk checksum mismatch.'
+                    )
+
+                temporary_file_object.seek(0)
+
+                with self.shared_uploaded_file.open(mode='ab') as shared_file_object:
+                    shutil.copyfileobj(
+                        fsrc=temporary_file_object, fdst=shared_file_object
+                    )
+
+            return upload_offset + chunk_size
+        finally:
+            lock.release()
+
+    def finalize(self, querystring=None):
+        """
+        Hand the completed file to the source upload task. The resumable
+        upload is deleted, the shared uploaded file is deleted by the task.
+        """
+        # Avoid circular import.
+        from ..tasks import task_source_handle_upload
+
+        if self.get_offset() != self.length:
+            raise ResumableUploadOffsetError(
+                'Upload is incomplete, {} of {} bytes received.'.format(
+                    self.get_offset(), self.length
+                )
+            )
+
+        Document.execute_pre_create_hooks(
+            kwargs={
+                'document_type': self.document_type,
+                'user': self.user
+            }
+        )
+
+        DocumentFile.execute_pre_create_hooks(
+            kwargs={
+                'document_type': self.document_type,
+                'shared_uploaded_file': self.shared_uploaded_file,
+                'user': self.user
+            }
+        )
+
+        kwargs = {
+            'document_type_id': self.document_type.pk,
+            'expand': self.expand,
+            'querystring': querystring,
+            'shared_uploaded_file_id': self.shared_uploaded_file.pk,
+            'source_id': self.source.pk,
+            'user_id': self.user.pk
+        }
+
+        if self.label:
+            kwargs['label'] = self.label
+
+        self.delete()
+
+        task_source_handle_upload.apply_async(kwargs=kwargs)
+
+    def get_offset(self):
+        """
+        Return the number of bytes received so far.
+        """
+        return self.shared_uploaded_file.file.storage.size(
+            name=self.shared_uploaded_file.file.name
+        )
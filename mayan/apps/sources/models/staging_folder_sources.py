@@ -1,12 +1,19 @@
 import logging
 import os
 
-from django.db import models
+from django.apps import apps
+from django.db import models, transaction
 from django.utils.translation import ugettext_lazy as _
 
+from mayan.apps.lock_manager.backends.base import LockingBackend
+from mayan.apps.lock_manager.exceptions import LockError
+
 from ..classes import SourceUploadedFile, StagingFile
 from ..literals import (
-    SOURCE_CHOICE_STAGING, SOURCE_INTERACTIVE_UNCOMPRESS_CHOICES
+    SOURCE_CHOICE_STAGING, SOURCE_INTERACTIVE_UNCOMPRESS_CHOICES,
+    STAGING_FILE_IMAGE_PENDING_LOCK_NAME,
+    STAGING_FILE_IMAGE_PENDING_LOCK_TIMEOUT,
+    STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE
 )
 
 from .base import InteractiveSource
@@ -68,6 +75,9 @@ class StagingFolderSource(InteractiveSource):
         verbose_name_plural = _('Staging folders')
 
     def clean_up_upload_file(self, upload_file_object):
+        # The preview images are no longer needed once the file is uploaded.
+        upload_file_object.extra_data.cache_purge()
+
         if self.delete_after_upload:
             try:
                 upload_file_object.extra_data.delete()
@@ -83,8 +93,9 @@ class StagingFolderSource(InteractiveSource):
 
     def get_files(self):
         try:
-            for entry in sorted([os.path.normcase(f) for f in os.listdir(self.folder_path) if os.path.isfile(os.path.join(self.folder_path, f))]):
-                yield self.get_file(filename=entry)
+            staging_files = [
+                self.get_file(filename=entry) for entry in sorted([os.path.normcase(f) for f in os.listdir(self.folder_path) if os.path.isfile(os.path.join(self.folder_path, f))])
+            ]
         except OSError as exception:
             logger.error(
                 'Unable get list of staging files from source: %s; %s',
@@ -92,10 +103,100 @@ class StagingFolderSource(InteractiveSource):
             )
             raise
 
+        self.generate_file_images(staging_files=staging_files)
+
+        for staging_file in staging_files:
+            yield staging_file
+
+    def generate_file_images(self, staging_files):
+        """
+        Queue the background generation of the preview images of the
+        staging files that don't have one cached yet nor one pending from
+        a previous listing.
+        """
+        CachePartitionFile = apps.get_model(
+            app_label='file_caching', model_name='CachePartitionFile'
+        )
+
+        cache_keys = {}
+        for staging_file in staging_files:
+            try:
+                cache_keys[staging_file.encoded_filename] = (
+                    staging_file.cache_partition_name,
+                    staging_file.get_combined_cache_filename()
+                )
+            except FileNotFoundError:
+                """The file was removed after the folder was listed."""
+
+        cached_keys = set(
+            CachePartitionFile.objects.filter(
+                partition__cache__defined_storage_name=STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE,
+                partition__name__in=[
+                    cache_key[0] for cache_key in cache_keys.values()
+                ]
+            ).values_list('partition__name', 'filename')
+        )
+
+        uncached_keys = {
+            encoded_filename: cache_key for encoded_filename, cache_key in cache_keys.items() if cache_key not in cached_keys
+        }
+
+        if not uncached_keys:
+            return
+
+        # Avoid circular import.
+        from ..tasks import task_generate_staging_folder_file_images
+
+        def queue_task(encoded_filenames):
+            task_generate_staging_folder_file_images.apply_async(
+                kwargs={
+                    'encoded_filenames': encoded_filenames,
+                    'staging_folder_pk': self.pk
+                }
+            )
+
+        def queue_task_pending():
+            encoded_filenames = []
+            locking_backend = LockingBackend.get_backend()
+
+            for encoded_filename, cache_key in uncached_keys.items():
+                # The pending locks expire on their own, the task reads
+                # the files when it runs.
+                try:
+                    locking_backend.acquire_lock(
+                        name=STAGING_FILE_IMAGE_PENDING_LOCK_NAME.format(
+                            cache_key[0]
+                        ), statistics=False,
+                        timeout=STAGING_FILE_IMAGE_PENDING_LOCK_TIMEOUT
+                    )
+                except LockError:
+                    """Queued by a previous listing."""
+                else:
+                    encoded_filenames.append(encoded_filename)
+
+            if encoded_filenames:
+                queue_task(encoded_filenames=encoded_filenames)
+
+        if task_generate_staging_folder_file_images.app.conf.task_always_eager:
+            # The images are cached by the time the listing is done.
+            queue_task(encoded_filenames=list(uncached_keys))
+        else:
+            # Acquired after the transaction of the caller, if any, for the
+            # backends with transaction scoped locks to hold the pending
+            # locks in the session scope, until they expire.
+            transaction.on_commit(func=queue_task_pending)
+
     def get_upload_file_object(self, form_data):
         staging_file = self.get_file(
             encoded_filename=form_data['staging_file_id']
         )
+        file_object = staging_file.as_file()
+
+        if self.delete_after_upload:
+            # The file is deleted after the upload, allow linking it into the
+            # storage instead of copying it.
+            file_object._storage_link = True
+
         return SourceUploadedFile(
-            source=self, file=staging_file.as_file(), extra_data=staging_file
+            source=self, file=file_object, extra_data=staging_file
         )
@@ -67,6 +67,12 @@ class WatchFolderSource(IntervalBaseModel):
                         if exception.errno != errno.EAGAIN:
                             raise
                     else:
+                        if not test and not entry.is_symlink():
+                            # The file is deleted after the upload, allow
+                            # linking it into the storage instead of copying
+                            # it.
+                            file_object._storage_link = True
+
                         self.handle_upload(
                             file_object=file_object,
                             expand=(self.uncompress == SOURCE_UNCOMPRESS_CHOICE_Y),
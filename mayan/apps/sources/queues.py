@@ -25,6 +25,10 @@ queue_sources_periodic.add_task_type(
     dotted_path='mayan.apps.sources.tasks.task_check_interval_source'
 )
 
+queue_sources.add_task_type(
+    label=_('Generate staging folder file images'),
+    dotted_path='mayan.apps.sources.tasks.task_generate_staging_folder_file_images'
+)
 queue_sources.add_task_type(
     label=_('Handle upload'),
     dotted_path='mayan.apps.sources.tasks.task_source_handle_upload'
@@ -6,12 +6,71 @@ from rest_framework import serializers
 from rest_framework.reverse import reverse
 
 from mayan.apps.documents.models.document_models import DocumentType
+from mayan.apps.storage.models import SharedUploadedFile
 
-from .models import StagingFolderSource, WebFormSource
+from .exceptions import ResumableUploadError
+from .models import ResumableUpload, StagingFolderSource, WebFormSource
 
 logger = logging.getLogger(name=__name__)
 
 
+class ResumableUploadSerializer(serializers.ModelSerializer):
+    document_type_id = serializers.IntegerField(
+        help_text=_('Document type ID for the new document.'),
+        write_only=True
+    )
+    filename = serializers.CharField(
+        help_text=_('Name of the file being uploaded.'), max_length=255,
+        write_only=True
+    )
+    finalize_url = serializers.SerializerMethodField()
+    offset = serializers.SerializerMethodField()
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        extra_kwargs = {
+            'length': {'min_value': 0}
+        }
+        fields = (
+            'datetime', 'document_type_id', 'expand', 'filename',
+            'finalize_url', 'id', 'label', 'length', 'offset', 'url'
+        )
+        model = ResumableUpload
+        read_only_fields = ('datetime', 'id')
+
+    def create(self, validated_data):
+        validated_data.pop('document_type_id')
+        validated_data['shared_uploaded_file'] = SharedUploadedFile.objects.create(
+            filename=validated_data.pop('filename')
+        )
+        return super().create(validated_data=validated_data)
+
+    def get_finalize_url(self, obj):
+        return reverse(
+            viewname='rest_api:resumableupload-finalize', kwargs={
+                'source_id': obj.source_id, 'resumable_upload_id': obj.pk
+            }, request=self.context.get('request')
+        )
+
+    def get_offset(self, obj):
+        return obj.get_offset()
+
+    def get_url(self, obj):
+        return reverse(
+            viewname='rest_api:resumableupload-detail', kwargs={
+                'source_id': obj.source_id, 'resumable_upload_id': obj.pk
+            }, request=self.context.get('request')
+        )
+
+    def validate(self, attrs):
+        try:
+            ResumableUpload.check_storage()
+        except ResumableUploadError as exception:
+            raise serializers.ValidationError(str(exception))
+
+        return attrs
+
+
 class StagingFolderFileUploadSerializer(serializers.Serializer):
     document_type = serializers.PrimaryKeyRelatedField(
         label=_('Document type'), many=False,
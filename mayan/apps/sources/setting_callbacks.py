@@ -0,0 +1,12 @@
+from django.apps import apps
+
+from .literals import STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE
+
+
+def callback_update_staging_file_image_cache_size(setting):
+    Cache = apps.get_model(app_label='file_caching', model_name='Cache')
+    cache = Cache.objects.get(
+        defined_storage_name=STORAGE_NAME_SOURCE_STAGING_FOLDER_FILE
+    )
+    cache.maximum_size = setting.value
+    cache.save()
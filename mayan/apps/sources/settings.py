@@ -5,9 +5,11 @@ from mayan.apps.smart_settings.classes import SettingNamespace
 
 from .literals import (
     DEFAULT_SOURCES_SCANIMAGE_PATH,
+    DEFAULT_SOURCES_STAGING_FILE_CACHE_MAXIMUM_SIZE,
     DEFAULT_SOURCES_STAGING_FILE_CACHE_STORAGE_BACKEND,
     DEFAULT_SOURCES_STAGING_FILE_CACHE_STORAGE_BACKEND_ARGUMENTS
 )
+from .setting_callbacks import callback_update_staging_file_image_cache_size
 from .setting_migrations import SourcesSettingMigration
 
 namespace = SettingNamespace(
@@ -21,6 +23,14 @@ setting_scanimage_path = namespace.add_setting(
         'File path to the scanimage program used to control image scanners.'
     ), is_path=True
 )
+setting_staging_file_image_cache_maximum_size = namespace.add_setting(
+    global_name='SOURCES_STAGING_FILE_CACHE_MAXIMUM_SIZE',
+    default=DEFAULT_SOURCES_STAGING_FILE_CACHE_MAXIMUM_SIZE, help_text=_(
+        'The threshold at which the SOURCES_STAGING_FILE_CACHE_STORAGE_BACKEND '
+        'will start deleting the oldest staging file preview images. '
+        'Specify the size in bytes.'
+    ), post_edit_function=callback_update_staging_file_image_cache_size
+)
 setting_staging_file_image_cache_storage = namespace.add_setting(
     global_name='SOURCES_STAGING_FILE_CACHE_STORAGE_BACKEND',
     default=DEFAULT_SOURCES_STAGING_FILE_CACHE_STORAGE_BACKEND, help_text=_(
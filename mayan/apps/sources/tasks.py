@@ -53,15 +53,54 @@ def task_check_interval_source(source_id, test=False):
             lock.release()
 
 
-@app.task()
-def task_generate_staging_file_image(staging_folder_pk, encoded_filename, *args, **kwargs):
+@app.task(bind=True, default_retry_delay=DEFAULT_SOURCE_TASK_RETRY_DELAY)
+def task_generate_staging_file_image(self, staging_folder_pk, encoded_filename, *args, **kwargs):
     StagingFolderSource = apps.get_model(
         app_label='sources', model_name='StagingFolderSource'
     )
     staging_folder = StagingFolderSource.objects.get(pk=staging_folder_pk)
     staging_file = staging_folder.get_file(encoded_filename=encoded_filename)
 
-    return staging_file.generate_image(*args, **kwargs)
+    try:
+        return staging_file.generate_image(*args, **kwargs)
+    except LockError as exception:
+        logger.warning(
+            'LockError during attempt to generate staging file image for '
+            'staging folder id: %d, file: %s. Retrying.',
+            staging_folder_pk, staging_file
+        )
+        raise self.retry(exc=exception)
+
+
+@app.task(ignore_result=True)
+def task_generate_staging_folder_file_images(staging_folder_pk, encoded_filenames):
+    StagingFolderSource = apps.get_model(
+        app_label='sources', model_name='StagingFolderSource'
+    )
+    staging_folder = StagingFolderSource.objects.get(pk=staging_folder_pk)
+
+    for encoded_filename in encoded_filenames:
+        staging_file = staging_folder.get_file(
+            encoded_filename=encoded_filename
+        )
+        try:
+            staging_file.generate_image()
+        except FileNotFoundError:
+            logger.debug(
+                'Staging file "%s" removed before its image could be '
+                'generated.', staging_file
+            )
+        except LockError:
+            logger.debug(
+                'Image of staging file "%s" is already being generated.',
+                staging_file
+            )
+        except Exception as exception:
+            logger.error(
+                'Error generating image of staging file "%s" from '
+                'staging folder id: %d; %s', staging_file, staging_folder_pk,
+                exception, exc_info=True
+            )
 
 
 @app.task(bind=True, default_retry_delay=DEFAULT_SOURCE_TASK_RETRY_DELAY, ignore_result=True)
@@ -1,12 +1,22 @@
+import base64
+import hashlib
 import shutil
 
 from mayan.apps.documents.literals import DOCUMENT_FILE_ACTION_PAGES_NEW
 from mayan.apps.documents.tests.literals import (
-    TEST_DOCUMENT_DESCRIPTION, TEST_SMALL_DOCUMENT_PATH
+    TEST_DOCUMENT_DESCRIPTION, TEST_SMALL_DOCUMENT_FILENAME,
+    TEST_SMALL_DOCUMENT_PATH
+)
+from mayan.apps.file_caching.classes import (
+    CacheMemoryTier, CacheMetrics, CachePartitionFileAccessBuffer
 )
 from mayan.apps.storage.utils import fs_cleanup, mkdtemp
 
-from ..literals import SOURCE_CHOICE_WEB_FORM, SOURCE_UNCOMPRESS_CHOICE_Y
+from ..literals import (
+    RESUMABLE_UPLOAD_CONTENT_TYPE, SOURCE_CHOICE_WEB_FORM,
+    SOURCE_UNCOMPRESS_CHOICE_Y
+)
+from ..models.resumable_upload_models import ResumableUpload
 from ..models.staging_folder_sources import StagingFolderSource
 from ..models.watch_folder_sources import WatchFolderSource
 from ..models.webform_sources import WebFormSource
@@ -165,6 +175,12 @@ class StagingFolderTestMixin:
     def setUp(self):
         super().setUp()
         self.test_staging_folders = []
+        # The staging file previews are cached, the counters and accesses
+        # kept in memory by previous tests could reference deleted caches
+        # and files.
+        CacheMemoryTier.clear()
+        CacheMetrics.clear()
+        CachePartitionFileAccessBuffer.clear()
 
     def tearDown(self):
         for test_staging_folder in self.test_staging_folders:
@@ -202,6 +218,71 @@ class StagingFolderViewTestMixin:
         )
 
 
+class ResumableUploadAPIViewTestMixin:
+    def _get_test_document_content(self):
+        with open(file=TEST_SMALL_DOCUMENT_PATH, mode='rb') as file_object:
+            return file_object.read()
+
+    def _request_test_resumable_upload_create_api_view(self):
+        content = self._get_test_document_content()
+
+        response = self.post(
+            viewname='rest_api:resumableupload-list', kwargs={
+                'source_id': self.test_source.pk
+            }, data={
+                'document_type_id': self.test_document_type.pk,
+                'filename': TEST_SMALL_DOCUMENT_FILENAME,
+                'length': len(content)
+            }
+        )
+
+        if 'id' in response.data:
+            self.test_resumable_upload = ResumableUpload.objects.get(
+                pk=response.data['id']
+            )
+
+        return response
+
+    def _request_test_resumable_upload_chunk_api_view(
+        self, data, offset, checksum=None
+    ):
+        headers = {
+            'content_type': RESUMABLE_UPLOAD_CONTENT_TYPE,
+            'HTTP_UPLOAD_OFFSET': str(offset)
+        }
+
+        if checksum is None:
+            checksum = hashlib.sha256(data).digest()
+
+        if checksum:
+            headers['HTTP_UPLOAD_CHECKSUM'] = 'sha256 {}'.format(
+                base64.b64encode(checksum).decode()
+            )
+
+        return self.patch(
+            viewname='rest_api:resumableupload-detail', kwargs={
+                'source_id': self.test_source.pk,
+                'resumable_upload_id': self.test_resumable_upload.pk
+            }, data=data, headers=headers
+        )
+
+    def _request_test_resumable_upload_delete_api_view(self):
+        return self.delete(
+            viewname='rest_api:resumableupload-detail', kwargs={
+                'source_id': self.test_source.pk,
+                'resumable_upload_id': self.test_resumable_upload.pk
+            }
+        )
+
+    def _request_test_resumable_upload_finalize_api_view(self):
+        return self.post(
+            viewname='rest_api:resumableupload-finalize', kwargs={
+                'source_id': self.test_source.pk,
+                'resumable_upload_id': self.test_resumable_upload.pk
+            }
+        )
+
+
 class SourceTestMixin:
     auto_create_test_source = True
 
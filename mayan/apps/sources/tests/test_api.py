@@ -2,9 +2,15 @@ from rest_framework import status
 
 from mayan.apps.documents.models.document_models import Document
 from mayan.apps.documents.permissions import permission_document_create
+from mayan.apps.documents.tests.literals import TEST_SMALL_DOCUMENT_CHECKSUM
 from mayan.apps.documents.tests.mixins.document_mixins import DocumentTestMixin
 from mayan.apps.rest_api.tests.base import BaseAPITestCase
+from mayan.apps.storage.classes import DefinedStorage
+from mayan.apps.storage.literals import STORAGE_NAME_SHARED_UPLOADED_FILE
+from mayan.apps.storage.models import SharedUploadedFile
 
+from ..literals import RESUMABLE_UPLOAD_STATUS_CHECKSUM_MISMATCH
+from ..models.resumable_upload_models import ResumableUpload
 from ..models.staging_folder_sources import StagingFolderSource
 from ..permissions import (
     permission_sources_setup_create, permission_sources_setup_delete,
@@ -13,11 +19,175 @@ from ..permissions import (
 )
 
 from .mixins import (
+    ResumableUploadAPIViewTestMixin, SourceTestMixin,
     StagingFolderAPIViewTestMixin, StagingFolderFileAPIViewTestMixin,
     StagingFolderTestMixin
 )
 
 
+class ResumableUploadAPIViewTestCase(
+    DocumentTestMixin, ResumableUploadAPIViewTestMixin, SourceTestMixin,
+    BaseAPITestCase
+):
+    auto_upload_test_document = False
+
+    def test_resumable_upload_create_api_view_no_permission(self):
+        resumable_upload_count = ResumableUpload.objects.count()
+
+        response = self._request_test_resumable_upload_create_api_view()
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.assertEqual(
+            ResumableUpload.objects.count(), resumable_upload_count
+        )
+
+    def test_resumable_upload_create_api_view_with_access(self):
+        self.grant_access(
+            obj=self.test_document_type, permission=permission_document_create
+        )
+        resumable_upload_count = ResumableUpload.objects.count()
+
+        response = self._request_test_resumable_upload_create_api_view()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['offset'], 0)
+
+        self.assertEqual(
+            ResumableUpload.objects.count(), resumable_upload_count + 1
+        )
+
+    def test_resumable_upload_create_api_view_passthrough_storage(self):
+        self.grant_access(
+            obj=self.test_document_type, permission=permission_document_create
+        )
+        resumable_upload_count = ResumableUpload.objects.count()
+
+        defined_storage = DefinedStorage.get(
+            name=STORAGE_NAME_SHARED_UPLOADED_FILE
+        )
+        dotted_path = defined_storage.dotted_path
+        kwargs = defined_storage.kwargs
+        defined_storage.dotted_path = 'mayan.apps.storage.backends.compressedstorage.ZipCompressedPassthroughStorage'
+        defined_storage.kwargs = {
+            'next_storage_backend': dotted_path,
+            'next_storage_backend_arguments': kwargs
+        }
+
+        try:
+            response = self._request_test_resumable_upload_create_api_view()
+        finally:
+            defined_storage.dotted_path = dotted_path
+            defined_storage.kwargs = kwargs
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(
+            ResumableUpload.objects.count(), resumable_upload_count
+        )
+
+    def test_resumable_upload_chunk_api_view(self):
+        self.grant_access(
+            obj=self.test_document_type, permission=permission_document_create
+        )
+        self._request_test_resumable_upload_create_api_view()
+
+        content = self._get_test_document_content()
+        chunk_size = len(content) // 2
+
+        response = self._request_test_resumable_upload_chunk_api_view(
+            data=content[:chunk_size], offset=0
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response['Upload-Offset'], str(chunk_size))
+
+        response = self._request_test_resumable_upload_chunk_api_view(
+            data=content[chunk_size:], offset=chunk_size
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response['Upload-Offset'], str(len(content)))
+
+        with self.test_resumable_upload.shared_uploaded_file.open(mode='rb') as file_object:
+            self.assertEqual(file_object.read(), content)
+
+    def test_resumable_upload_chunk_api_view_checksum_mismatch(self):
+        self.grant_access(
+            obj=self.test_document_type, permission=permission_document_create
+        )
+        self._request_test_resumable_upload_create_api_view()
+
+        content = self._get_test_document_content()
+
+        response = self._request_test_resumable_upload_chunk_api_view(
+            checksum=b'invalid', data=content, offset=0
+        )
+        self.assertEqual(
+            response.status_code, RESUMABLE_UPLOAD_STATUS_CHECKSUM_MISMATCH
+        )
+        self.assertEqual(self.test_resumable_upload.get_offset(), 0)
+
+    def test_resumable_upload_chunk_api_view_offset_conflict(self):
+        self.grant_access(
+            obj=self.test_document_type, permission=permission_document_create
+        )
+        self._request_test_resumable_upload_create_api_view()
+
+        content = self._get_test_document_content()
+
+        response = self._request_test_resumable_upload_chunk_api_view(
+            data=content, offset=1
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Upload-Offset'], '0')
+        self.assertEqual(self.test_resumable_upload.get_offset(), 0)
+
+    def test_resumable_upload_delete_api_view(self):
+        self.grant_access(
+            obj=self.test_document_type, permission=permission_document_create
+        )
+        self._request_test_resumable_upload_create_api_view()
+        shared_uploaded_file_count = SharedUploadedFile.objects.count()
+
+        response = self._request_test_resumable_upload_delete_api_view()
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertEqual(ResumableUpload.objects.count(), 0)
+        self.assertEqual(
+            SharedUploadedFile.objects.count(), shared_uploaded_file_count - 1
+        )
+
+    def test_resumable_upload_finalize_api_view(self):
+        self.grant_access(
+            obj=self.test_document_type, permission=permission_document_create
+        )
+        self._request_test_resumable_upload_create_api_view()
+        self._request_test_resumable_upload_chunk_api_view(
+            data=self._get_test_document_content(), offset=0
+        )
+        document_count = Document.objects.count()
+
+        response = self._request_test_resumable_upload_finalize_api_view()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        self.assertEqual(ResumableUpload.objects.count(), 0)
+        self.assertEqual(Document.objects.count(), document_count + 1)
+        self.assertEqual(
+            Document.objects.first().file_latest.checksum,
+            TEST_SMALL_DOCUMENT_CHECKSUM
+        )
+
+    def test_resumable_upload_finalize_api_view_incomplete(self):
+        self.grant_access(
+            obj=self.test_document_type, permission=permission_document_create
+        )
+        self._request_test_resumable_upload_create_api_view()
+        document_count = Document.objects.count()
+
+        response = self._request_test_resumable_upload_finalize_api_view()
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        self.assertEqual(ResumableUpload.objects.count(), 1)
+        self.assertEqual(Document.objects.count(), document_count)
+
+
 class StagingFolderAPIViewTestCase(
     StagingFolderAPIViewTestMixin, StagingFolderTestMixin, BaseAPITestCase
 ):
@@ -1,6 +1,8 @@
 import os
 import shutil
 
+import mock
+
 from mayan.apps.documents.tests.literals import TEST_NON_ASCII_DOCUMENT_PATH
 from mayan.apps.storage.utils import mkdtemp
 from mayan.apps.testing.tests.base import BaseTestCase
@@ -60,3 +62,20 @@ class StagingFileTestCase(BaseTestCase):
         )
 
         self.assertNotEqual(self.test_staging_files[0].generate_image(), '')
+
+    def test_staging_file_generate_image_cached(self):
+        self.test_staging_files.append(
+            StagingFile(
+                staging_folder=self.test_staging_folder,
+                filename=self.test_filename
+            )
+        )
+
+        cache_filename = self.test_staging_files[0].generate_image()
+
+        with mock.patch.object(StagingFile, 'get_image') as mock_get_image:
+            self.assertEqual(
+                self.test_staging_files[0].generate_image(), cache_filename
+            )
+
+        mock_get_image.assert_not_called()
@@ -1,5 +1,6 @@
 import fcntl
 from multiprocessing import Process
+import os
 from pathlib import Path
 import shutil
 
@@ -13,17 +14,22 @@ from django_celery_beat.models import IntervalSchedule, PeriodicTask
 from mayan.apps.common.serialization import yaml_dump
 from mayan.apps.documents.models import Document
 from mayan.apps.documents.storages import storage_document_files
-from mayan.apps.documents.tests.base import GenericDocumentTestCase
+from mayan.apps.documents.tests.base import (
+    GenericDocumentTestCase, GenericTransactionDocumentTestCase
+)
 from mayan.apps.documents.tests.literals import (
     TEST_COMPRESSED_DOCUMENT_PATH, TEST_NON_ASCII_DOCUMENT_FILENAME,
     TEST_NON_ASCII_DOCUMENT_PATH, TEST_NON_ASCII_COMPRESSED_DOCUMENT_PATH,
     TEST_SMALL_DOCUMENT_FILENAME, TEST_SMALL_DOCUMENT_PATH
 )
+from mayan.apps.file_caching.models import CachePartitionFile
 from mayan.apps.metadata.models import MetadataType
 
+from ..classes import SourceUploadedFile
 from ..literals import SOURCE_UNCOMPRESS_CHOICE_Y
 from ..models.email_sources import EmailBaseModel, IMAPEmail, POP3Email
 from ..models.scanner_sources import SaneScanner
+from ..tasks import task_generate_staging_folder_file_images
 
 from .literals import (
     TEST_EMAIL_ATTACHMENT_AND_INLINE, TEST_EMAIL_BASE64_FILENAME,
@@ -32,7 +38,9 @@ from .literals import (
     TEST_EMAIL_NO_CONTENT_TYPE_STRING, TEST_EMAIL_ZERO_LENGTH_ATTACHMENT,
     TEST_WATCHFOLDER_SUBFOLDER
 )
-from .mixins import SourceTestMixin, WatchFolderTestMixin
+from .mixins import (
+    SourceTestMixin, StagingFolderTestMixin, WatchFolderTestMixin
+)
 from .mocks import MockIMAPServer, MockPOP3Mailbox
 
 
@@ -360,9 +368,121 @@ class SANESourceTestCase(GenericDocumentTestCase):
         self.assertTrue(file_object.size > 0)
 
 
+class StagingFolderTestCase(StagingFolderTestMixin, GenericDocumentTestCase):
+    auto_upload_test_document = False
+
+    def setUp(self):
+        super().setUp()
+        self._create_test_staging_folder()
+
+    def _get_test_staging_file_cache_file_count(self):
+        return CachePartitionFile.objects.filter(
+            partition__name=self.test_staging_folder_file.cache_partition_name
+        ).count()
+
+    def test_staging_file_delete_image_cache_purge(self):
+        self._copy_test_document()
+
+        self.test_staging_folder_file.delete()
+
+        self.assertEqual(self._get_test_staging_file_cache_file_count(), 0)
+
+    def test_staging_file_listing_image_generation(self):
+        self._copy_test_document()
+
+        self.assertEqual(self._get_test_staging_file_cache_file_count(), 1)
+
+    def test_staging_file_listing_cached_image(self):
+        self._copy_test_document()
+
+        with mock.patch.object(task_generate_staging_folder_file_images, 'apply_async') as mock_apply_async:
+            list(self.test_staging_folder.get_files())
+
+        mock_apply_async.assert_not_called()
+
+    def test_staging_file_modified_image_cache_filename(self):
+        self._copy_test_document()
+
+        cache_filename = self.test_staging_folder_file.get_combined_cache_filename()
+
+        path = self.test_staging_folder_file.get_full_path()
+        stat_result = os.stat(path)
+        os.utime(
+            path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10 ** 9)
+        )
+
+        self.assertNotEqual(
+            self.test_staging_folder_file.get_combined_cache_filename(),
+            cache_filename
+        )
+
+    def test_staging_file_upload_image_cache_purge(self):
+        self._copy_test_document()
+        self.test_staging_folder.delete_after_upload = False
+
+        self.test_staging_folder.clean_up_upload_file(
+            upload_file_object=SourceUploadedFile(
+                source=self.test_staging_folder, file=None,
+                extra_data=self.test_staging_folder_file
+            )
+        )
+
+        self.assertTrue(
+            os.path.exists(self.test_staging_folder_file.get_full_path())
+        )
+        self.assertEqual(self._get_test_staging_file_cache_file_count(), 0)
+
+
+class StagingFolderTransactionTestCase(
+    StagingFolderTestMixin, GenericTransactionDocumentTestCase
+):
+    auto_upload_test_document = False
+
+    def setUp(self):
+        super().setUp()
+        self._create_test_staging_folder()
+
+    def test_staging_file_listing_pending_image(self):
+        shutil.copy(
+            src=TEST_SMALL_DOCUMENT_PATH,
+            dst=self.test_staging_folder.folder_path
+        )
+
+        with mock.patch('mayan.apps.sources.tasks.task_generate_staging_folder_file_images') as mock_task:
+            mock_task.app.conf.task_always_eager = False
+
+            list(self.test_staging_folder.get_files())
+            list(self.test_staging_folder.get_files())
+
+        self.assertEqual(mock_task.apply_async.call_count, 1)
+
+
 class WatchFolderTestCase(WatchFolderTestMixin, GenericDocumentTestCase):
     auto_upload_test_document = False
 
+    def test_local_file_link(self):
+        self._create_test_watchfolder()
+
+        shutil.copy(src=TEST_SMALL_DOCUMENT_PATH, dst=self.temporary_directory)
+        test_file_stat = Path(
+            self.temporary_directory, TEST_SMALL_DOCUMENT_FILENAME
+        ).stat()
+        self.test_watch_folder.check_source()
+
+        document_file = Document.objects.first().file_latest
+        document_file_stat = os.stat(
+            document_file.file.storage.path(name=document_file.file.name)
+        )
+
+        if document_file_stat.st_dev != test_file_stat.st_dev:
+            self.skipTest(
+                reason='Storage and watch folder are in different '
+                'filesystems.'
+            )
+
+        self.assertEqual(document_file_stat.st_ino, test_file_stat.st_ino)
+        self.assertEqual(document_file.size, 17436)
+
     def test_subfolder_support_disabled(self):
         self._create_test_watchfolder()
 
@@ -1,7 +1,8 @@
 from django.conf.urls import url
 
 from .api_views import (
-    APIStagingSourceFileView, APIStagingSourceFileImageView,
+    APIResumableUploadFinalizeView, APIResumableUploadListView,
+    APIResumableUploadView, APIStagingSourceFileView, APIStagingSourceFileImageView,
     APIStagingSourceFileUploadView, APIStagingSourceListView,
     APIStagingSourceView
 )
@@ -70,6 +71,20 @@ urlpatterns = [
 ]
 
 api_urls = [
+    url(
+        regex=r'^sources/(?P<source_id>[0-9]+)/resumable_uploads/$',
+        name='resumableupload-list',
+        view=APIResumableUploadListView.as_view()
+    ),
+    url(
+        regex=r'^sources/(?P<source_id>[0-9]+)/resumable_uploads/(?P<resumable_upload_id>[0-9]+)/$',
+        name='resumableupload-detail', view=APIResumableUploadView.as_view()
+    ),
+    url(
+        regex=r'^sources/(?P<source_id>[0-9]+)/resumable_uploads/(?P<resumable_upload_id>[0-9]+)/finalize/$',
+        name='resumableupload-finalize',
+        view=APIResumableUploadFinalizeView.as_view()
+    ),
     url(
         regex=r'^staging_folders/file/(?P<staging_folder_pk>[0-9]+)/(?P<encoded_filename>.+)/image/$',
         name='stagingfolderfile-image',
@@ -0,0 +1,265 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+
+from django.core.files.base import File
+from django.utils.encoding import force_bytes
+
+from ..classes import PassthroughStorage
+from ..settings import setting_temporary_directory
+
+from .literals import (
+    LOCAL_CACHE_CHUNK_SIZE, LOCAL_CACHE_DIRECTORY_NAME,
+    LOCAL_CACHE_MAXIMUM_SIZE, LOCAL_CACHE_TEMPORARY_FILE_MAXIMUM_AGE
+)
+
+logger = logging.getLogger(name=__name__)
+
+# Estimated size of each cache location used by this process. Storage
+# instances are short lived and the estimate must outlive them.
+cache_sizes = {}
+cache_sizes_lock = threading.Lock()
+
+
+class LocalCachePassthroughStorage(PassthroughStorage):
+    """
+    Keep a size bounded copy of the recently opened files of the next
+    storage in a local directory. Meant to be placed in front of remote or
+    slow storages. Only reads are cached, writes and deletes are sent to
+    the next storage and invalidate the local copy.
+
+    Arguments:
+    cache_location: Directory of the cached files. Can be shared by
+    multiple processes.
+    cache_maximum_size: Size in bytes after which the least recently used
+    files are evicted.
+    cache_validate_size: Compare the size reported by the next storage with
+    the size it had when the file was cached on every open.
+    cache_verify_checksum: Compare the checksum of the cached file with the
+    checksum calculated when it was fetched on every open.
+    """
+    def __init__(self, *args, **kwargs):
+        self.cache_location = Path(
+            kwargs.pop('cache_location', None) or os.path.join(
+                setting_temporary_directory.value,
+                LOCAL_CACHE_DIRECTORY_NAME
+            )
+        )
+        self.cache_maximum_size = kwargs.pop(
+            'cache_maximum_size', LOCAL_CACHE_MAXIMUM_SIZE
+        )
+        self.cache_validate_size = kwargs.pop('cache_validate_size', True)
+        self.cache_verify_checksum = kwargs.pop(
+            'cache_verify_checksum', False
+        )
+        super().__init__(*args, **kwargs)
+        self.cache_location.mkdir(exist_ok=True, parents=True)
+
+    def _cache_fetch(self, name, path_entry):
+        logger.debug('Cache miss for: %s', name)
+
+        hash_object = hashlib.sha256()
+        size = 0
+        # Size of the stored file which differs from the content size when
+        # the next storage is a passthrough storage.
+        source_size = self.next_storage_backend.size(name=name)
+
+        with self.next_storage_backend.open(name=name, mode='rb') as source_file_object:
+            with tempfile.NamedTemporaryFile(dir=path_entry.parent, delete=False, suffix='.tmp') as file_object:
+                try:
+                    while True:
+                        chunk = source_file_object.read(
+                            LOCAL_CACHE_CHUNK_SIZE
+                        )
+                        if chunk:
+                            hash_object.update(chunk)
+                            file_object.write(chunk)
+                            size += len(chunk)
+                        else:
+                            break
+                except Exception:
+                    os.unlink(file_object.name)
+                    raise
+
+        os.replace(src=file_object.name, dst=path_entry)
+        self._cache_metadata_path(path_entry=path_entry).write_text(
+            data=json.dumps(
+                obj={
+                    'checksum': hash_object.hexdigest(), 'name': name,
+                    'size': size, 'source_size': source_size
+                }
+            )
+        )
+
+        return size
+
+    def _cache_invalidate(self, name):
+        path_entry = self._cache_path(name=name)
+
+        for path in self._cache_entry_paths(path_entry=path_entry):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                """Not cached."""
+
+    def _cache_entry_paths(self, path_entry):
+        # Metadata first, it is what makes an entry valid.
+        return (
+            self._cache_metadata_path(path_entry=path_entry), path_entry,
+            path_entry.with_suffix('.lock')
+        )
+
+    def _cache_is_valid(self, name, path_entry):
+        try:
+            metadata = json.loads(
+                self._cache_metadata_path(path_entry=path_entry).read_text()
+            )
+            size = path_entry.stat().st_size
+        except (FileNotFoundError, ValueError):
+            return False
+
+        if metadata['name'] != name or metadata['size'] != size:
+            return False
+
+        if self.cache_validate_size and self.next_storage_backend.size(name=name) != metadata['source_size']:
+            return False
+
+        if self.cache_verify_checksum:
+            hash_object = hashlib.sha256()
+            with path_entry.open(mode='rb') as file_object:
+                while True:
+                    chunk = file_object.read(LOCAL_CACHE_CHUNK_SIZE)
+                    if chunk:
+                        hash_object.update(chunk)
+                    else:
+                        break
+
+            if hash_object.hexdigest() != metadata['checksum']:
+                logger.warning('Cached copy of "%s" is corrupted.', name)
+                return False
+
+        return True
+
+    def _cache_metadata_path(self, path_entry):
+        return path_entry.with_suffix('.json')
+
+    def _cache_open(self, name, mode):
+        path_entry = self._cache_path(name=name)
+        path_entry.parent.mkdir(exist_ok=True)
+        size = 0
+
+        # The lock file coalesces concurrent fetches of the same file from
+        # threads and processes sharing the cache location.
+        with path_entry.with_suffix('.lock').open(mode='a') as lock_file_object:
+            fcntl.flock(lock_file_object, fcntl.LOCK_EX)
+            try:
+                if self._cache_is_valid(name=name, path_entry=path_entry):
+                    logger.debug('Cache hit for: %s', name)
+                    # Update the modification time, used as the recency
+                    # of the entry for the least recently used eviction.
+                    os.utime(path=path_entry)
+                else:
+                    size = self._cache_fetch(
+                        name=name, path_entry=path_entry
+                    )
+
+                file_object = path_entry.open(mode=mode)
+            finally:
+                fcntl.flock(lock_file_object, fcntl.LOCK_UN)
+
+        # Evict after opening, an open file remains readable after being
+        # evicted.
+        if size:
+            self._cache_size_update(amount=size)
+
+        return File(file=file_object, name=name)
+
+    def _cache_path(self, name):
+        key = hashlib.sha256(force_bytes(s=name)).hexdigest()
+        return self.cache_location / key[:2] / key
+
+    def _cache_prune(self):
+        entries = []
+        total_size = 0
+        timestamp_expired = time.time() - LOCAL_CACHE_TEMPORARY_FILE_MAXIMUM_AGE
+
+        for path in self.cache_location.glob('*/*'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+
+            if path.suffix == '':
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+            elif path.suffix == '.tmp' and stat.st_mtime < timestamp_expired:
+                # Left behind by an interrupted fetch.
+                path.unlink()
+
+        entries.sort()
+
+        for mtime, size, path_entry in entries:
+            if total_size <= self.cache_maximum_size:
+                break
+
+            logger.debug('Evicting cached file: %s', path_entry)
+            for path in self._cache_entry_paths(path_entry=path_entry):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    """Evicted by another process."""
+
+            total_size -= size
+
+        return total_size
+
+    def _cache_size_update(self, amount):
+        with cache_sizes_lock:
+            location = str(self.cache_location)
+            total_size = cache_sizes.get(location)
+
+            if total_size is None or total_size + amount > self.cache_maximum_size:
+                # The estimate does not include the files added by other
+                # processes, calculate the real size before evicting.
+                cache_sizes[location] = self._cache_prune()
+            else:
+                cache_sizes[location] = total_size + amount
+
+    def delete(self, name):
+        self._cache_invalidate(name=name)
+        return super().delete(name=name)
+
+    def open(self, name, mode='rb', _direct=False):
+        if _direct or 'r' not in mode or '+' in mode:
+            if 'r' not in mode or '+' in mode:
+                self._cache_invalidate(name=name)
+
+            next_kwargs = {'mode': mode, 'name': name}
+            if issubclass(self.next_storage_class, PassthroughStorage):
+                next_kwargs['_direct'] = _direct
+
+            return self._call_backend_method(
+                method_name='open', kwargs=next_kwargs
+            )
+        else:
+            return self._cache_open(name=name, mode=mode)
+
+    def save(self, name, content, max_length=None, _direct=False):
+        next_kwargs = {
+            'content': content, 'max_length': max_length, 'name': name
+        }
+        if issubclass(self.next_storage_class, PassthroughStorage):
+            next_kwargs['_direct'] = _direct
+
+        name = self._call_backend_method(
+            method_name='save', kwargs=next_kwargs
+        )
+        self._cache_invalidate(name=name)
+
+        return name
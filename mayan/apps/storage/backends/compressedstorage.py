@@ -1,3 +1,7 @@
+import bisect
+import io
+import struct
+import time
 import zipfile
 
 try:
@@ -7,50 +11,90 @@ except ImportError:
     COMPRESSION = zipfile.ZIP_STORED
 
 from django.core.files.base import ContentFile
-from django.utils.encoding import force_text
+from django.utils.encoding import force_bytes
 
 from ..classes import BufferedFile, PassthroughStorage
+from ..exceptions import CompressionFileError
 
-from .literals import ZIP_CHUNK_SIZE, ZIP_MEMBER_FILENAME
+from .literals import (
+    ZIP_CHUNK_SIZE, ZIP_MEMBER_FILENAME, ZSTANDARD_CHUNK_SIZE,
+    ZSTANDARD_FRAME_SIZE, ZSTANDARD_LEVEL, ZSTANDARD_SEEKABLE_MAGIC,
+    ZSTANDARD_SEEK_TABLE_FOOTER_FORMAT, ZSTANDARD_SKIPPABLE_FRAME_MAGIC
+)
+
+ZSTANDARD_SEEK_TABLE_FOOTER_SIZE = struct.calcsize(
+    ZSTANDARD_SEEK_TABLE_FOOTER_FORMAT
+)
 
 
 class BufferedZipFile(BufferedFile):
+    """
+    Zip member file wrapper that works as a stream. Reads decompress the
+    member on demand instead of buffering it whole. Seeking is supported,
+    seeking backwards restarts the decompression from the start of the
+    member. Writes are compressed as they arrive.
+    """
     def __init__(self, *args, **kwargs):
         self.member_name = kwargs.pop('member_name')
         super().__init__(*args, **kwargs)
-        self.binary_mode = 'b' in self.mode
 
         if 'r' in self.mode:
-            zip_mode = 'r'
-        else:
-            zip_mode = 'w'
-
-        self.zip_container_file_object = zipfile.ZipFile(
-            file=self.file_object, mode=zip_mode
-        )
-        self.zip_file_object = self.zip_container_file_object.open(
-            name=self.member_name, mode=zip_mode
-        )
-
-    def _get_file_object_chunk(self):
-        chunk = self.zip_file_object.read(ZIP_CHUNK_SIZE)
+            self.zip_container_file_object = zipfile.ZipFile(
+                file=self.file_object, mode='r'
+            )
+            self.zip_file_object = self.zip_container_file_object.open(
+                name=self.member_name, mode='r'
+            )
 
-        if chunk:
             if self.binary_mode:
-                return chunk
+                self.file = self.zip_file_object
             else:
-                return force_text(s=chunk)
+                self.file = io.TextIOWrapper(
+                    buffer=self.zip_file_object, encoding='utf-8'
+                )
+        else:
+            self.zip_container_file_object = zipfile.ZipFile(
+                compression=COMPRESSION, file=self.file_object, mode='w'
+            )
+
+            zip_info = zipfile.ZipInfo(
+                date_time=time.localtime(time.time())[:6],
+                filename=self.member_name
+            )
+            zip_info.compress_type = COMPRESSION
+            zip_info.create_system = 0
+            zip_info.external_attr = 0o600 << 16
+
+            # The final size is unknown while streaming, always allow the
+            # member to grow past the 2 GB limit.
+            self.zip_file_object = self.zip_container_file_object.open(
+                force_zip64=True, mode='w', name=zip_info
+            )
+            self.file = self.zip_file_object
 
     def close(self):
+        self.file.close()
         self.zip_file_object.close()
         self.zip_container_file_object.close()
         self.file_object.close()
 
+    def read(self, size=None):
+        if size is None:
+            size = -1
+
+        return self.file.read(size)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.file.seek(offset, whence)
+
+    def seekable(self):
+        return self.file.seekable()
+
     def tell(self):
-        return self.zip_file_object.tell()
+        return self.file.tell()
 
     def write(self, data):
-        return self.zip_file_object.write(data)
+        return self.zip_file_object.write(force_bytes(s=data))
 
 
 class ZipCompressedPassthroughStorage(PassthroughStorage):
@@ -67,8 +111,13 @@ class ZipCompressedPassthroughStorage(PassthroughStorage):
                 method_name='open', kwargs=next_kwargs
             )
         else:
-            # Next storage mode is always 'rb+' when reading the zip file
-            next_kwargs['mode'] = 'rb+'
+            if 'r' in mode:
+                next_kwargs['mode'] = 'rb'
+            else:
+                # Truncate the previous content. ZipFile writes from the
+                # current position and leftover data would corrupt the
+                # archive.
+                next_kwargs['mode'] = 'wb'
 
             storage_file = self._call_backend_method(
                 method_name='open', kwargs=next_kwargs
@@ -100,16 +149,361 @@ class ZipCompressedPassthroughStorage(PassthroughStorage):
                     }
                 )
 
-            with self._call_backend_method(
+            storage_file = self._call_backend_method(
                 method_name='open', kwargs={
                     'name': name, 'mode': 'wb'
                 }
-            ) as file_object:
-                # From Python: ZipFile requires mode 'r', 'w', 'x', or 'a'
-                with zipfile.ZipFile(file=file_object, mode='w', compression=COMPRESSION) as zip_file_object:
-                    zip_file_object.writestr(ZIP_MEMBER_FILENAME, content.read())
+            )
+
+            with BufferedZipFile(file_object=storage_file, member_name=ZIP_MEMBER_FILENAME, mode='wb') as file_object:
+                while True:
+                    chunk = content.read(ZIP_CHUNK_SIZE)
+
+                    if chunk:
+                        file_object.write(chunk)
+                    else:
+                        break
+
+            return name
+
+
+class ZstandardSeekableReader(io.RawIOBase):
+    """
+    Random access reader of the zstd seekable format: independent frames
+    followed by a seek table in a skippable frame. Only the frame that
+    holds the current position is decompressed.
+    """
+    def __init__(self, file_object, decompressor):
+        super().__init__()
+        self.decompressor = decompressor
+        self.file_object = file_object
+
+        try:
+            self.file_object.seek(
+                -ZSTANDARD_SEEK_TABLE_FOOTER_SIZE, io.SEEK_END
+            )
+            frame_count, descriptor, magic = struct.unpack(
+                ZSTANDARD_SEEK_TABLE_FOOTER_FORMAT,
+                self.file_object.read(ZSTANDARD_SEEK_TABLE_FOOTER_SIZE)
+            )
+        except (OSError, struct.error) as exception:
+            raise CompressionFileError(
+                'File is not in the zstd seekable format.'
+            ) from exception
+
+        if magic != ZSTANDARD_SEEKABLE_MAGIC:
+            raise CompressionFileError(
+                'File is not in the zstd seekable format.'
+            )
+
+        # Bit 7 of the descriptor flags the presence of per frame
+        # checksums in the seek table.
+        entry_size = 12 if descriptor & 0x80 else 8
+
+        self.file_object.seek(
+            -(ZSTANDARD_SEEK_TABLE_FOOTER_SIZE + frame_count * entry_size),
+            io.SEEK_END
+        )
+        seek_table = self.file_object.read(frame_count * entry_size)
+
+        self.frames = []
+        self.frame_offsets = []
+        compressed_offset = 0
+        self.size = 0
+
+        for index in range(frame_count):
+            compressed_size, decompressed_size = struct.unpack_from(
+                '<II', seek_table, index * entry_size
+            )
+            self.frames.append((compressed_offset, compressed_size))
+            self.frame_offsets.append(self.size)
+            compressed_offset += compressed_size
+            self.size += decompressed_size
+
+        self.frame_data = None
+        self.frame_index = None
+        self.position = 0
+
+    def _get_frame_data(self, frame_index):
+        import zstandard
+
+        if frame_index != self.frame_index:
+            compressed_offset, compressed_size = self.frames[frame_index]
+            self.file_object.seek(compressed_offset)
+
+            try:
+                self.frame_data = self.decompressor.decompress(
+                    self.file_object.read(compressed_size)
+                )
+            except zstandard.ZstdError as exception:
+                self.frame_index = None
+                raise CompressionFileError(
+                    'Unable to decompress frame {}.'.format(frame_index)
+                ) from exception
+
+            self.frame_index = frame_index
+
+        return self.frame_data
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.position >= self.size:
+            return 0
+
+        frame_index = bisect.bisect_right(
+            self.frame_offsets, self.position
+        ) - 1
+        offset = self.position - self.frame_offsets[frame_index]
+        data = self._get_frame_data(frame_index=frame_index)[
+            offset:offset + len(buffer)
+        ]
+        buffer[:len(data)] = data
+        self.position += len(data)
+
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError('Invalid whence value: {}'.format(whence))
+
+        if position < 0:
+            raise ValueError('Negative seek position {}'.format(position))
+
+        self.position = position
+        return self.position
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+
+class ZstandardSeekableWriter(io.RawIOBase):
+    """
+    Streaming writer of the zstd seekable format. Each `frame_size` block
+    of content is compressed as an independent frame. The seek table is
+    written when the writer is closed. The result can also be decompressed
+    by the regular zstd tools.
+    """
+    def __init__(self, file_object, compressor, frame_size):
+        super().__init__()
+        self.buffer = bytearray()
+        self.compressor = compressor
+        self.file_object = file_object
+        self.frame_size = frame_size
+        self.frames = []
+
+    def _write_frame(self, data):
+        compressed_data = self.compressor.compress(bytes(data))
+        self.file_object.write(compressed_data)
+        self.frames.append((len(compressed_data), len(data)))
+
+    def _write_seek_table(self):
+        seek_table = b''.join(
+            struct.pack('<II', compressed_size, decompressed_size)
+            for compressed_size, decompressed_size in self.frames
+        ) + struct.pack(
+            ZSTANDARD_SEEK_TABLE_FOOTER_FORMAT, len(self.frames), 0,
+            ZSTANDARD_SEEKABLE_MAGIC
+        )
+
+        self.file_object.write(
+            struct.pack(
+                '<II', ZSTANDARD_SKIPPABLE_FRAME_MAGIC, len(seek_table)
+            )
+        )
+        self.file_object.write(seek_table)
+
+    def close(self):
+        if not self.closed:
+            try:
+                if self.buffer:
+                    self._write_frame(data=self.buffer)
+
+                self._write_seek_table()
+            finally:
+                super().close()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer.extend(data)
+
+        while len(self.buffer) >= self.frame_size:
+            self._write_frame(data=self.buffer[:self.frame_size])
+            del self.buffer[:self.frame_size]
+
+        return len(data)
+
+
+class BufferedZstandardFile(BufferedFile):
+    def __init__(self, *args, **kwargs):
+        # Imported here for the other compressed storages to work without
+        # the optional dependency.
+        import zstandard
+
+        self.dictionary = kwargs.pop('dictionary')
+        self.frame_size = kwargs.pop('frame_size')
+        self.level = kwargs.pop('level')
+        super().__init__(*args, **kwargs)
+
+        # `zstandard` rejects `dict_data=None`, pass it only when a
+        # dictionary is configured.
+        dictionary_kwargs = {}
+        if self.dictionary is not None:
+            dictionary_kwargs['dict_data'] = self.dictionary
+
+        if 'r' in self.mode:
+            self.file = io.BufferedReader(
+                buffer_size=ZSTANDARD_CHUNK_SIZE,
+                raw=ZstandardSeekableReader(
+                    decompressor=zstandard.ZstdDecompressor(
+                        **dictionary_kwargs
+                    ), file_object=self.file_object
+                )
+            )
+
+            if not self.binary_mode:
+                self.file = io.TextIOWrapper(
+                    buffer=self.file, encoding='utf-8'
+                )
+        else:
+            self.file = ZstandardSeekableWriter(
+                compressor=zstandard.ZstdCompressor(
+                    level=self.level, write_checksum=True,
+                    **dictionary_kwargs
+                ), file_object=self.file_object, frame_size=self.frame_size
+            )
+
+    def close(self):
+        try:
+            self.file.close()
+        finally:
+            self.file_object.close()
+
+    def read(self, size=None):
+        if size is None:
+            size = -1
+
+        return self.file.read(size)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.file.seek(offset, whence)
+
+    def seekable(self):
+        return self.file.seekable()
+
+    def tell(self):
+        return self.file.tell()
+
+    def write(self, data):
+        return self.file.write(force_bytes(s=data))
+
+
+class ZstandardCompressedPassthroughStorage(PassthroughStorage):
+    """
+    Compress files with zstd in the seekable format.
+
+    Arguments:
+    dictionary_path: Path of a dictionary trained with `zstd --train` from
+    sample files. Improves the compression of small files. Files must be
+    read with the same dictionary they were written with.
+    frame_size: Size of the content blocks compressed independently. The
+    maximum amount of content decompressed by a seek.
+    level: Compression level, from 1 to 22.
+    """
+    def __init__(self, *args, **kwargs):
+        dictionary_path = kwargs.pop('dictionary_path', None)
+        self.frame_size = kwargs.pop('frame_size', ZSTANDARD_FRAME_SIZE)
+        self.level = kwargs.pop('level', ZSTANDARD_LEVEL)
+        super().__init__(*args, **kwargs)
+
+        if dictionary_path:
+            import zstandard
+
+            with open(file=dictionary_path, mode='rb') as file_object:
+                self.dictionary = zstandard.ZstdCompressionDict(
+                    data=file_object.read()
+                )
+        else:
+            self.dictionary = None
+
+    def _get_buffered_file(self, file_object, mode):
+        return BufferedZstandardFile(
+            dictionary=self.dictionary, file_object=file_object,
+            frame_size=self.frame_size, level=self.level, mode=mode
+        )
+
+    def open(self, name, mode='rb', _direct=False):
+        next_kwargs = {'name': name}
+
+        if _direct:
+            next_kwargs['mode'] = mode
+
+            if issubclass(self.next_storage_class, PassthroughStorage):
+                next_kwargs.update({'_direct': _direct})
+
+            return self._call_backend_method(
+                method_name='open', kwargs=next_kwargs
+            )
+        else:
+            if 'r' in mode:
+                next_kwargs['mode'] = 'rb'
+            else:
+                next_kwargs['mode'] = 'wb'
+
+            storage_file = self._call_backend_method(
+                method_name='open', kwargs=next_kwargs
+            )
+
+            return self._get_buffered_file(
+                file_object=storage_file, mode=mode
+            )
+
+    def save(self, name, content, max_length=None, _direct=False):
+        next_kwargs = {'max_length': max_length, 'name': name}
+        if _direct:
+            next_kwargs['content'] = content
+
+            if issubclass(self.next_storage_class, PassthroughStorage):
+                next_kwargs.update({'_direct': _direct})
+
+            return self._call_backend_method(
+                method_name='save', kwargs=next_kwargs
+            )
+        else:
+            if not self._call_backend_method(
+                method_name='exists', kwargs={'name': name}
+            ):
+                name = self._call_backend_method(
+                    method_name='save', kwargs={
+                        'content': ContentFile(content=''), 'name': name
+                    }
+                )
+
+            storage_file = self._call_backend_method(
+                method_name='open', kwargs={
+                    'name': name, 'mode': 'wb'
+                }
+            )
+
+            with self._get_buffered_file(file_object=storage_file, mode='wb') as file_object:
+                while True:
+                    chunk = content.read(ZSTANDARD_CHUNK_SIZE)
 
-                    for file in zip_file_object.filelist:
-                        file.create_system = 0
+                    if chunk:
+                        file_object.write(chunk)
+                    else:
+                        break
 
             return name
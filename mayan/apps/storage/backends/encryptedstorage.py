@@ -1,86 +1,310 @@
+import io
+import struct
+
 from Crypto.Cipher import AES
-from Crypto.Hash import SHA256
+from Crypto.Hash import HMAC, SHA256
 from Crypto.Protocol.KDF import PBKDF2
-from Crypto.Util.Padding import pad, unpad
+from Crypto.Random import get_random_bytes
+from Crypto.Util.Padding import unpad
 
 from django.conf import settings
 from django.core.files.base import ContentFile
-from django.utils.encoding import force_text
+from django.utils.encoding import force_bytes
 
 from ..classes import BufferedFile, PassthroughStorage
+from ..exceptions import EncryptedFileError
 
 from .literals import (
-    ENCRYPTION_FILE_CHUNK_SIZE, ENCRYPTION_KEY_DERIVATION_ITERATIONS,
-    ENCRYPTION_KEY_SIZE
+    ENCRYPTION_FILE_CHUNK_SIZE, ENCRYPTION_FORMAT_MAGIC,
+    ENCRYPTION_FORMAT_VERSION, ENCRYPTION_KEY_DERIVATION_ITERATIONS,
+    ENCRYPTION_KEY_SIZE, ENCRYPTION_SALT_SIZE, ENCRYPTION_SEGMENT_SIZE,
+    ENCRYPTION_TAG_SIZE
 )
 
+# Magic, format version, segment size, file key salt.
+ENCRYPTION_HEADER_FORMAT = '>{}sBI{}s'.format(
+    len(ENCRYPTION_FORMAT_MAGIC), ENCRYPTION_SALT_SIZE
+)
+ENCRYPTION_HEADER_SIZE = struct.calcsize(ENCRYPTION_HEADER_FORMAT)
+
+
+class EncryptedSegmentMixin:
+    """
+    Segmented format: a header followed by fixed size segments of content,
+    each encrypted and authenticated independently with AES-GCM using a key
+    unique to the file. The segment index is the nonce and the header plus
+    a final segment flag are the associated data. This detects reordered,
+    truncated or modified segments.
+    """
+    def _get_cipher(self, segment_index, final):
+        cipher = AES.new(
+            key=self.file_key, mac_len=ENCRYPTION_TAG_SIZE,
+            mode=AES.MODE_GCM, nonce=segment_index.to_bytes(
+                length=12, byteorder='big'
+            )
+        )
+        cipher.update(self.header + (b'\x01' if final else b'\x00'))
+        return cipher
+
+    def _set_file_key(self, key, salt):
+        self.file_key = HMAC.new(
+            digestmod=SHA256, key=key, msg=salt
+        ).digest()
+
+
+class EncryptedSegmentReader(EncryptedSegmentMixin, io.RawIOBase):
+    """
+    Random access reader of the segmented format. Only the segment that
+    holds the current position is read and decrypted, making seeks O(1).
+    """
+    def __init__(self, file_object, key):
+        super().__init__()
+        self.file_object = file_object
+        self.header = self.file_object.read(ENCRYPTION_HEADER_SIZE)
+
+        try:
+            magic, version, self.segment_size, salt = struct.unpack(
+                ENCRYPTION_HEADER_FORMAT, self.header
+            )
+        except struct.error as exception:
+            raise EncryptedFileError(
+                'Encrypted file header is truncated.'
+            ) from exception
 
-class BufferedEncryptedFile(BufferedFile):
-    def __init__(self, *args, **kwargs):
-        self.key = kwargs.pop('key')
+        if magic != ENCRYPTION_FORMAT_MAGIC or version != ENCRYPTION_FORMAT_VERSION:
+            raise EncryptedFileError('Unknown encrypted file format.')
 
-        super().__init__(*args, **kwargs)
+        self._set_file_key(key=key, salt=salt)
 
-        self.initial_vector = self.file_object.read(16)
-        self.cipher = AES.new(
-            key=self.key, mode=AES.MODE_CBC, iv=self.initial_vector
+        self.file_object.seek(0, io.SEEK_END)
+        encrypted_size = self.file_object.tell() - ENCRYPTION_HEADER_SIZE
+
+        self.segment_count, remainder = divmod(
+            encrypted_size, self.segment_size + ENCRYPTION_TAG_SIZE
         )
-        self.binary_mode = 'b' in self.mode
-        self.position = 0
+        if remainder:
+            if remainder < ENCRYPTION_TAG_SIZE:
+                raise EncryptedFileError('Encrypted file is truncated.')
+
+            self.segment_count += 1
+            self.size = (
+                (self.segment_count - 1) * self.segment_size
+            ) + remainder - ENCRYPTION_TAG_SIZE
+        else:
+            if not self.segment_count:
+                raise EncryptedFileError('Encrypted file is truncated.')
 
-    def _get_file_object_chunk(self):
-        chunk = self.file_object.read(ENCRYPTION_FILE_CHUNK_SIZE)
+            self.size = self.segment_count * self.segment_size
 
-        if chunk:
-            data = unpad(
-                padded_data=self.cipher.decrypt(chunk),
-                block_size=AES.block_size
+        self.position = 0
+        self.segment_data = None
+        self.segment_index = None
+
+    def _get_segment_data(self, segment_index):
+        if segment_index != self.segment_index:
+            self.file_object.seek(
+                ENCRYPTION_HEADER_SIZE + segment_index * (
+                    self.segment_size + ENCRYPTION_TAG_SIZE
+                )
+            )
+            data = self.file_object.read(
+                self.segment_size + ENCRYPTION_TAG_SIZE
             )
 
-            if self.binary_mode:
-                return data
-            else:
-                return force_text(s=data)
+            cipher = self._get_cipher(
+                final=segment_index == self.segment_count - 1,
+                segment_index=segment_index
+            )
 
-    def seek(self, pos, whence=0):
-        if whence == 0:
-            self.position = pos
-            self.file_object.seek(pos, whence)
+            try:
+                self.segment_data = cipher.decrypt_and_verify(
+                    ciphertext=data[:-ENCRYPTION_TAG_SIZE],
+                    received_mac_tag=data[-ENCRYPTION_TAG_SIZE:]
+                )
+            except ValueError as exception:
+                self.segment_index = None
+                raise EncryptedFileError(
+                    'Encrypted file segment {} failed authentication.'.format(
+                        segment_index
+                    )
+                ) from exception
+
+            self.segment_index = segment_index
+
+        return self.segment_data
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.position >= self.size:
+            return 0
+
+        segment_index, offset = divmod(self.position, self.segment_size)
+        data = self._get_segment_data(segment_index=segment_index)[
+            offset:offset + len(buffer)
+        ]
+        buffer[:len(data)] = data
+        self.position += len(data)
+
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError('Invalid whence value: {}'.format(whence))
+
+        if position < 0:
+            raise ValueError('Negative seek position {}'.format(position))
+
+        self.position = position
+        return self.position
 
-        if whence == 2:
-            raise AttributeError('Only whence 0 is supported.')
+    def seekable(self):
+        return True
 
     def tell(self):
         return self.position
 
-    def write(self, data):
-        if self.position == 0:
-            self.cipher = AES.new(key=self.key, mode=AES.MODE_CBC)
-            self.file_object.write(self.cipher.iv)
 
-        content = ContentFile(content=data)
+class EncryptedSegmentWriter(EncryptedSegmentMixin, io.RawIOBase):
+    """
+    Streaming writer of the segmented format. Content is buffered up to a
+    segment. The last segment is written when the writer is closed.
+    """
+    def __init__(self, file_object, key, segment_size=ENCRYPTION_SEGMENT_SIZE):
+        super().__init__()
+        self.buffer = bytearray()
+        self.file_object = file_object
+        self.segment_index = 0
+        self.segment_size = segment_size
+
+        salt = get_random_bytes(ENCRYPTION_SALT_SIZE)
+        self.header = struct.pack(
+            ENCRYPTION_HEADER_FORMAT, ENCRYPTION_FORMAT_MAGIC,
+            ENCRYPTION_FORMAT_VERSION, self.segment_size, salt
+        )
+        self._set_file_key(key=key, salt=salt)
+        self.file_object.write(self.header)
 
-        count = 0
-        while True:
-            chunk = content.read(ENCRYPTION_FILE_CHUNK_SIZE)
+    def _write_segment(self, data, final):
+        cipher = self._get_cipher(
+            final=final, segment_index=self.segment_index
+        )
+        ciphertext, tag = cipher.encrypt_and_digest(plaintext=bytes(data))
+        self.file_object.write(ciphertext)
+        self.file_object.write(tag)
+        self.segment_index += 1
 
+    def close(self):
+        if not self.closed:
             try:
-                chunk = chunk.encode('utf-8')
-            except AttributeError:
-                """Already a byte string"""
-
-            count = count + len(chunk)
-            if chunk:
-                chunk = pad(
-                    data_to_pad=chunk, block_size=AES.block_size
+                self._write_segment(data=self.buffer, final=True)
+            finally:
+                super().close()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer.extend(data)
+
+        # Keep at least one byte buffered, only the close method knows
+        # which segment is the final one.
+        while len(self.buffer) > self.segment_size:
+            self._write_segment(
+                data=self.buffer[:self.segment_size], final=False
+            )
+            del self.buffer[:self.segment_size]
+
+        return len(data)
+
+
+class BufferedEncryptedFile(BufferedFile):
+    def __init__(self, *args, **kwargs):
+        self.key = kwargs.pop('key')
+        super().__init__(*args, **kwargs)
+
+        if 'r' in self.mode:
+            self.file = io.BufferedReader(
+                buffer_size=ENCRYPTION_SEGMENT_SIZE,
+                raw=EncryptedSegmentReader(
+                    file_object=self.file_object, key=self.key
                 )
-            else:
-                break
+            )
+
+            if 'b' not in self.mode:
+                self.file = io.TextIOWrapper(
+                    buffer=self.file, encoding='utf-8'
+                )
+        else:
+            self.file = EncryptedSegmentWriter(
+                file_object=self.file_object, key=self.key
+            )
 
-            self.file_object.write(self.cipher.encrypt(chunk))
+    def close(self):
+        try:
+            self.file.close()
+        finally:
+            self.file_object.close()
 
-        self.position = self.position + count
-        return count
+    def read(self, size=None):
+        if size is None:
+            size = -1
+
+        return self.file.read(size)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.file.seek(offset, whence)
+
+    def seekable(self):
+        return self.file.seekable()
+
+    def tell(self):
+        return self.file.tell()
+
+    def write(self, data):
+        return self.file.write(force_bytes(s=data))
+
+
+class BufferedEncryptedCBCFile(BufferedFile):
+    """
+    Read only support for the previous format: a single AES-CBC stream with
+    each ENCRYPTION_FILE_CHUNK_SIZE block of content padded individually.
+    The content can only be decrypted sequentially and is buffered. Use the
+    `storage_process` command with the `--reprocess` argument to convert
+    the files to the segmented format.
+    """
+    def __init__(self, *args, **kwargs):
+        self.key = kwargs.pop('key')
+        super().__init__(*args, **kwargs)
+        self.initial_vector = self.file_object.read(AES.block_size)
+        self.cipher = AES.new(
+            key=self.key, mode=AES.MODE_CBC, iv=self.initial_vector
+        )
+
+    def _get_file_object_chunk(self):
+        # Padding always adds at least one byte, a full content chunk is
+        # stored as ENCRYPTION_FILE_CHUNK_SIZE plus one block.
+        chunk = self.file_object.read(
+            ENCRYPTION_FILE_CHUNK_SIZE + AES.block_size
+        )
+
+        if chunk:
+            return unpad(
+                padded_data=self.cipher.decrypt(chunk),
+                block_size=AES.block_size
+            )
+
+    def write(self, data):
+        raise io.UnsupportedOperation(
+            'The previous encryption format is read only.'
+        )
 
 
 class EncryptedPassthroughStorage(PassthroughStorage):
@@ -108,13 +332,28 @@ class EncryptedPassthroughStorage(PassthroughStorage):
                 method_name='open', kwargs=next_kwargs
             )
         else:
-            # Mode is always 'rb' when reading the encrypted file
-            next_kwargs['mode'] = 'rb+'
-            storage_file = self._call_backend_method(
-                method_name='open', kwargs=next_kwargs
-            )
-            return BufferedEncryptedFile(
-                file_object=storage_file, key=self.key, mode=mode,
+            if 'r' in mode:
+                next_kwargs['mode'] = 'rb'
+                storage_file = self._call_backend_method(
+                    method_name='open', kwargs=next_kwargs
+                )
+
+                magic = storage_file.read(len(ENCRYPTION_FORMAT_MAGIC))
+                storage_file.seek(0)
+
+                if magic == ENCRYPTION_FORMAT_MAGIC:
+                    file_class = BufferedEncryptedFile
+                else:
+                    file_class = BufferedEncryptedCBCFile
+            else:
+                next_kwargs['mode'] = 'wb'
+                storage_file = self._call_backend_method(
+                    method_name='open', kwargs=next_kwargs
+                )
+                file_class = BufferedEncryptedFile
+
+            return file_class(
+                file_object=storage_file, key=self.key, mode=mode
             )
 
     def save(self, name, content, max_length=None, _direct=False):
@@ -129,7 +368,6 @@ class EncryptedPassthroughStorage(PassthroughStorage):
                 method_name='save', kwargs=next_kwargs
             )
         else:
-            cipher = AES.new(key=self.key, mode=AES.MODE_CBC)
             if not self._call_backend_method(
                 method_name='exists', kwargs={'name': name}
             ):
@@ -139,28 +377,19 @@ class EncryptedPassthroughStorage(PassthroughStorage):
                     }
                 )
 
-            with self._call_backend_method(
+            storage_file = self._call_backend_method(
                 method_name='open', kwargs={
                     'name': name, 'mode': 'wb'
                 }
-            ) as file_object:
-                file_object.write(cipher.iv)
+            )
 
+            with BufferedEncryptedFile(file_object=storage_file, key=self.key, mode='wb') as file_object:
                 while True:
-                    chunk = content.read(ENCRYPTION_FILE_CHUNK_SIZE)
-
-                    try:
-                        chunk = chunk.encode('utf-8')
-                    except AttributeError:
-                        """Already a byte string"""
+                    chunk = content.read(ENCRYPTION_SEGMENT_SIZE)
 
                     if chunk:
-                        chunk = pad(
-                            data_to_pad=chunk, block_size=AES.block_size
-                        )
+                        file_object.write(chunk)
                     else:
                         break
 
-                    file_object.write(cipher.encrypt(chunk))
-
             return name
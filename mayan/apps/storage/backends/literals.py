@@ -1,6 +1,24 @@
 ENCRYPTION_FILE_CHUNK_SIZE = 64 * 1024  # 64K
+ENCRYPTION_FORMAT_MAGIC = b'MAYANENC'
+ENCRYPTION_FORMAT_VERSION = 1
 ENCRYPTION_KEY_DERIVATION_ITERATIONS = 100000
 ENCRYPTION_KEY_SIZE = 32
+ENCRYPTION_SALT_SIZE = 16
+ENCRYPTION_SEGMENT_SIZE = 64 * 1024  # 64K
+ENCRYPTION_TAG_SIZE = 16
+
+LOCAL_CACHE_CHUNK_SIZE = 64 * 1024  # 64K
+LOCAL_CACHE_DIRECTORY_NAME = 'mayan_storage_cache'
+LOCAL_CACHE_MAXIMUM_SIZE = 2 ** 30  # 1GB
+LOCAL_CACHE_TEMPORARY_FILE_MAXIMUM_AGE = 60 * 60  # 1 hour
 
 ZIP_CHUNK_SIZE = 64 * 1024  # 64K
 ZIP_MEMBER_FILENAME = 'mayan_file'
+
+ZSTANDARD_CHUNK_SIZE = 64 * 1024  # 64K
+ZSTANDARD_FRAME_SIZE = 2 ** 20  # 1MB
+ZSTANDARD_LEVEL = 3
+# Seekable format of the zstd contrib directory.
+ZSTANDARD_SEEKABLE_MAGIC = 0x8F92EAB1
+ZSTANDARD_SEEK_TABLE_FOOTER_FORMAT = '<IBI'
+ZSTANDARD_SKIPPABLE_FRAME_MAGIC = 0x184D2A5E
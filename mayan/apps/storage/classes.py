@@ -1,30 +1,83 @@
+import codecs
+import io
 import logging
-from io import BytesIO, StringIO
+import tempfile
 
 from django.core.files.base import File
 from django.core.files.storage import Storage
 from django.utils.deconstruct import deconstructible
+from django.utils.encoding import force_bytes
 from django.utils.module_loading import import_string
 from django.utils.translation import ugettext_lazy as _
 
 from mayan.apps.common.class_mixins import AppsModuleLoaderMixin
 
-from .literals import DEFAULT_STORAGE_BACKEND
+from .literals import BUFFERED_FILE_CHUNK_SIZE, DEFAULT_STORAGE_BACKEND
+from .settings import (
+    setting_buffered_file_maximum_memory_size, setting_temporary_directory
+)
 
 logger = logging.getLogger(name=__name__)
 
 
 class BufferedFile(File):
-    def __init__(self, file_object, mode, name=None):
+    """
+    Wrapper for streams that can only be read sequentially, like the output
+    of a decompressor or of a decryptor. The content returned by the
+    `_get_file_object_chunk` method is kept in memory up to the
+    STORAGE_BUFFERED_FILE_MAXIMUM_MEMORY_SIZE setting and in a temporary
+    file beyond that. Positions are byte offsets of the content and any
+    position can be seeked to.
+    """
+    def __init__(self, file_object, mode, name=None, maximum_memory_size=None):
+        self.binary_mode = 'b' in mode
         self.file_object = file_object
+        self.maximum_memory_size = maximum_memory_size or setting_buffered_file_maximum_memory_size.value
         self.mode = mode
-        if 'b' in mode:
-            self.stream = BytesIO()
-        else:
-            self.stream = StringIO()
-
         self.name = name
+        self.position = 0
+        self.spilled = False
+        self.stream = io.BytesIO()
         self.stream_size = 0
+        self._reset_decoder()
+
+    def _fill(self, size=None):
+        """
+        Buffer chunks of the underlying stream until `size` bytes are
+        buffered or the stream ends.
+        """
+        if size is None or size > self.stream_size:
+            self.stream.seek(0, io.SEEK_END)
+
+            try:
+                while size is None or size > self.stream_size:
+                    chunk = self._get_file_object_chunk()
+                    if not chunk:
+                        break
+
+                    chunk = force_bytes(s=chunk)
+                    self.stream.write(chunk)
+                    self.stream_size += len(chunk)
+
+                    if not self.spilled and self.stream_size > self.maximum_memory_size:
+                        self._spill()
+            finally:
+                self.stream.seek(self.position)
+
+    def _get_file_object_chunk(self):
+        return self.file_object.read(BUFFERED_FILE_CHUNK_SIZE)
+
+    def _reset_decoder(self):
+        self.decoder = codecs.getincrementaldecoder(encoding='utf-8')()
+
+    def _spill(self):
+        spill_file = tempfile.TemporaryFile(
+            dir=setting_temporary_directory.value
+        )
+        spill_file.write(self.stream.getbuffer())
+        self.stream.close()
+        self.stream = spill_file
+        self.spilled = True
 
     def close(self):
         self.file_object.close()
@@ -33,30 +86,60 @@ class BufferedFile(File):
     def flush(self):
         return self.file_object.flush()
 
+    def get_statistics(self):
+        """
+        Return the amount of content buffered in memory and in the
+        temporary file.
+        """
+        return {
+            'buffered_size': self.stream_size,
+            'maximum_memory_size': self.maximum_memory_size,
+            'memory_size': 0 if self.spilled else self.stream_size,
+            'spilled': self.spilled,
+            'spilled_size': self.stream_size if self.spilled else 0
+        }
+
     def read(self, size=None):
-        if size is None:
-            size = -1
-
-        if size == -1 or size > self.stream_size:
-            while True:
-                position = self.stream.tell()
-                chunk = self._get_file_object_chunk()
-                if chunk:
-                    self.stream_size += len(chunk)
-                    self.stream.write(chunk)
-                    self.stream.seek(position)
-                    if self.stream_size >= size and size != -1:
-                        break
-                else:
-                    break
+        if size is None or size < 0:
+            self._fill()
+            data = self.stream.read()
+        else:
+            self._fill(size=self.position + size)
+            data = self.stream.read(size)
+
+        self.position += len(data)
 
-        if size:
-            read_size = min(size, self.stream_size)
-            self.stream_size -= read_size
+        if self.binary_mode:
+            return data
         else:
-            read_size = None
+            return self.decoder.decode(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            self._fill()
+            position = self.stream_size + offset
+        else:
+            raise ValueError('Invalid whence value: {}'.format(whence))
+
+        if position < 0:
+            raise ValueError('Negative seek position {}'.format(position))
+
+        self._fill(size=position)
+        self.position = position
+        self.stream.seek(self.position)
+        self._reset_decoder()
+
+        return self.position
+
+    def seekable(self):
+        return True
 
-        return self.stream.read(read_size)
+    def tell(self):
+        return self.position
 
 
 class DefinedStorage(AppsModuleLoaderMixin):
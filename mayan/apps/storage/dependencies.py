@@ -6,3 +6,6 @@ PythonDependency(
 PythonDependency(
     module=__name__, name='pycryptodome', version_string='==3.9.7'
 )
+PythonDependency(
+    module=__name__, name='zstandard', version_string='==0.15.2'
+)
@@ -4,7 +4,20 @@ class CompressionFileError(Exception):
     """
 
 
+class EncryptedFileError(Exception):
+    """
+    The encrypted file is corrupted, was tampered with or has an unknown
+    format
+    """
+
+
 class NoMIMETypeMatch(CompressionFileError):
     """
     There is no decompressor registered for the specified MIME type
     """
+
+
+class StorageProcessVerificationError(Exception):
+    """
+    The content of a processed file does not match the original file
+    """
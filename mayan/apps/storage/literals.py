@@ -3,7 +3,9 @@ import tempfile
 
 from django.conf import settings
 
+BUFFERED_FILE_CHUNK_SIZE = 64 * 1024
 DEFAULT_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
+DEFAULT_STORAGE_BUFFERED_FILE_MAXIMUM_MEMORY_SIZE = 10 * 2 ** 20
 DEFAULT_STORAGE_DOWNLOAD_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 DEFAULT_STORAGE_DOWNLOAD_FILE_STORAGE_ARGUMENTS = {
     'location': os.path.join(settings.MEDIA_ROOT, 'download_files')
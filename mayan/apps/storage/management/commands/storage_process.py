@@ -1,4 +1,7 @@
+import dbm
+
 from django.core import management
+from django.core.management.base import CommandError
 from django.utils.translation import ugettext_lazy as _
 
 from ...utils import PassthroughStorageProcessor
@@ -16,16 +19,32 @@ class Command(management.BaseCommand):
         parser.add_argument(
             '--log', action='store', dest='log_file',
             help=_(
-                'Path of the database (.dbm) file that will be created/read '
-                'to keep track of items processed.'
-            ),
-            required=True,
+                'Path of a database (.dbm) file used by previous versions '
+                'to keep track of the items processed. Its items are '
+                'imported as processed to resume an interrupted process.'
+            )
         )
         parser.add_argument(
             '--model', action='store', dest='model_name',
             help=_('Process a specific model.'),
             required=True,
         )
+        parser.add_argument(
+            '--name', action='store', dest='name',
+            help=_(
+                'Name used to keep track of the items processed. An '
+                'interrupted process resumes when executed again with the '
+                'same name. Defaults to the storage name.'
+            )
+        )
+        parser.add_argument(
+            '--reprocess', action='store_true', dest='reprocess',
+            help=_(
+                'Read and save the processed files again to convert them '
+                'to the current format of the storage pipeline. Use a '
+                'different name than the one of the initial processing.'
+            )
+        )
         parser.add_argument(
             '--reverse', action='store_true', dest='reverse',
             help=_(
@@ -38,11 +57,38 @@ class Command(management.BaseCommand):
             help=_('Name of the storage to process.'),
             required=True,
         )
+        parser.add_argument(
+            '--throttle', action='store', dest='throttle', type=float,
+            help=_('Maximum read rate in megabytes per second.')
+        )
+        parser.add_argument(
+            '--workers', action='store', default=1, dest='workers',
+            help=_('Number of files to process concurrently.'), type=int
+        )
 
     def handle(self, *args, **options):
         processor = PassthroughStorageProcessor(
             app_label=options['app_label'],
             defined_storage_name=options['defined_storage_name'],
             log_file=options['log_file'], model_name=options['model_name'],
+            name=options['name'],
+            rate_limit=(options['throttle'] or 0) * 2 ** 20,
+            workers=options['workers']
+        )
+
+        try:
+            statistics = processor.execute(
+                reprocess=options['reprocess'], reverse=options['reverse']
+            )
+        except dbm.error as exception:
+            raise CommandError(
+                'Unable to read the log file "{}"; {}'.format(
+                    options['log_file'], exception
+                )
+            )
+
+        self.stdout.write(
+            'Files processed: {processed}, failed: {failed}'.format(
+                **statistics
+            )
         )
-        processor.execute(reverse=options['reverse'])
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.23 on 2026-10-19 09:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('storage', '0007_auto_20210218_0708'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageProcessEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, help_text='Name of the storage process.', max_length=255, verbose_name='Name')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Object ID')),
+                ('datetime', models.DateTimeField(auto_now_add=True, verbose_name='Date time')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='storage_process_entries', to='contenttypes.ContentType', verbose_name='Content type')),
+            ],
+            options={
+                'verbose_name': 'Storage process entry',
+                'verbose_name_plural': 'Storage process entries',
+                'unique_together': {('name', 'content_type', 'object_id')},
+            },
+        ),
+    ]
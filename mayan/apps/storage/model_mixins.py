@@ -5,6 +5,8 @@ from django.db import models
 from django.utils.encoding import force_text
 from django.utils.translation import ugettext_lazy as _, ugettext
 
+from .utils import field_file_link
+
 logger = logging.getLogger(name=__name__)
 
 
@@ -49,4 +51,5 @@ class DatabaseFileModelMixin(models.Model):
             )
 
         self.filename = self.filename or force_text(s=self.file)
+        field_file_link(field_file=self.file)
         super().save(*args, **kwargs)
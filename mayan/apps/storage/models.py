@@ -124,6 +124,42 @@ class SharedUploadedFile(DatabaseFileModelMixin, models.Model):
     def __str__(self):
         return self.filename
 
+    def open(self, **kwargs):
+        file_object = super().open(**kwargs)
+        # Shared uploaded files are not modified once consumed, allow linking
+        # them into other storages instead of copying them.
+        file_object._storage_link = True
+        return file_object
+
     def save(self, *args, **kwargs):
         self.filename = self.filename or Path(path=self.file.name).name
         super().save(*args, **kwargs)
+
+
+class StorageProcessEntry(models.Model):
+    """
+    Record of a model instance whose stored file was processed by a
+    storage process. Allows interrupted processes to resume.
+    """
+    name = models.CharField(
+        db_index=True, help_text=_('Name of the storage process.'),
+        max_length=255, verbose_name=_('Name')
+    )
+    content_type = models.ForeignKey(
+        on_delete=models.CASCADE, related_name='storage_process_entries',
+        to=ContentType, verbose_name=_('Content type')
+    )
+    object_id = models.PositiveIntegerField(verbose_name=_('Object ID'))
+    datetime = models.DateTimeField(
+        auto_now_add=True, verbose_name=_('Date time')
+    )
+
+    class Meta:
+        unique_together = ('name', 'content_type', 'object_id')
+        verbose_name = _('Storage process entry')
+        verbose_name_plural = _('Storage process entries')
+
+    def __str__(self):
+        return '{}: {} {}'.format(
+            self.name, self.content_type, self.object_id
+        )
@@ -3,6 +3,7 @@ from django.utils.translation import ugettext_lazy as _
 from mayan.apps.smart_settings.classes import SettingNamespace
 
 from .literals import (
+    DEFAULT_STORAGE_BUFFERED_FILE_MAXIMUM_MEMORY_SIZE,
     DEFAULT_STORAGE_DOWNLOAD_FILE_STORAGE,
     DEFAULT_STORAGE_DOWNLOAD_FILE_STORAGE_ARGUMENTS,
     DEFAULT_STORAGE_SHARED_STORAGE, DEFAULT_STORAGE_SHARED_STORAGE_ARGUMENTS,
@@ -11,6 +12,14 @@ from .literals import (
 
 namespace = SettingNamespace(label=_('Storage'), name='storage')
 
+setting_buffered_file_maximum_memory_size = namespace.add_setting(
+    default=DEFAULT_STORAGE_BUFFERED_FILE_MAXIMUM_MEMORY_SIZE,
+    global_name='STORAGE_BUFFERED_FILE_MAXIMUM_MEMORY_SIZE', help_text=_(
+        'Maximum size in bytes of the content that buffered storage files, '
+        'like decompressed or decrypted files, keep in memory. Content '
+        'beyond this size is moved to a temporary file.'
+    )
+)
 setting_download_file_storage = namespace.add_setting(
     default=DEFAULT_STORAGE_DOWNLOAD_FILE_STORAGE,
     global_name='STORAGE_DOWNLOAD_FILE_STORAGE', help_text=_(
@@ -0,0 +1,23 @@
+import threading
+import time
+
+from django.core.files.storage import FileSystemStorage
+
+
+class LatencyFileSystemStorage(FileSystemStorage):
+    """
+    Stand in for a remote storage. Opening a file is delayed and counted.
+    """
+    def __init__(self, *args, **kwargs):
+        self.latency = kwargs.pop('latency', 0.1)
+        self.open_count = 0
+        self.open_count_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def _open(self, name, mode='rb'):
+        time.sleep(self.latency)
+
+        with self.open_count_lock:
+            self.open_count += 1
+
+        return super()._open(name=name, mode=mode)
@@ -6,6 +6,7 @@ TEST_DOWNLOAD_FILE_CONTENT_FILE_NAME = 'test content name'
 
 TEST_CONTENT = 'testcontent'
 TEST_FILE_NAME = 'test_file'
+TEST_ZSTANDARD_FRAME_MAGIC = b'\x28\xb5\x2f\xfd'
 
 # Filenames
 TEST_ARCHIVE_MSG_STRANGE_DATE_FILENAME = 'strangeDate.msg'
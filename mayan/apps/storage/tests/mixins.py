@@ -1,7 +1,8 @@
 import importlib
 import logging
-from pathlib import Path
-import shutil
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
 
 from django.core.files.base import ContentFile
 
@@ -10,10 +11,10 @@ from mayan.apps.documents.literals import STORAGE_NAME_DOCUMENT_FILES
 from mayan.apps.permissions.tests.mixins import PermissionTestMixin
 from mayan.apps.smart_settings.classes import SettingNamespace
 
+from ..backends.literals import ENCRYPTION_FILE_CHUNK_SIZE
 from ..classes import DefinedStorage
 from ..compressed_files import Archive
 from ..models import DownloadFile
-from ..utils import mkdtemp
 
 from .literals import (
     TEST_COMPRESSED_FILE_CONTENTS, TEST_DOWNLOAD_FILE_CONTENT_FILE_NAME,
@@ -118,6 +119,30 @@ class DownloadFileViewTestMixin:
         return self.get(viewname='storage:download_file_list')
 
 
+class EncryptedStorageTestMixin:
+    def _create_legacy_encrypted_file(self, content, key, path):
+        """
+        Store content using the previous encrypted storage format: an
+        initial vector followed by individually padded AES-CBC chunks.
+        """
+        cipher = AES.new(key=key, mode=AES.MODE_CBC)
+
+        with open(file=path, mode='wb') as file_object:
+            file_object.write(cipher.iv)
+
+            for index in range(0, len(content), ENCRYPTION_FILE_CHUNK_SIZE):
+                file_object.write(
+                    cipher.encrypt(
+                        pad(
+                            block_size=AES.block_size,
+                            data_to_pad=content[
+                                index:index + ENCRYPTION_FILE_CHUNK_SIZE
+                            ]
+                        )
+                    )
+                )
+
+
 class StorageProcessorTestMixin:
     @classmethod
     def setUpClass(cls):
@@ -125,17 +150,12 @@ class StorageProcessorTestMixin:
         cls.defined_storage = DefinedStorage.get(
             name=STORAGE_NAME_DOCUMENT_FILES
         )
+        cls.document_storage_dotted_path = cls.defined_storage.dotted_path
         cls.document_storage_kwargs = cls.defined_storage.kwargs
 
-    def setUp(self):
-        super().setUp()
-        self.temporary_directory = mkdtemp()
-        self.path_temporary_directory = Path(self.temporary_directory)
-        self.path_test_file = self.path_temporary_directory / 'test_file.txt'
-
     def tearDown(self):
         super().tearDown()
-        shutil.rmtree(path=self.temporary_directory, ignore_errors=True)
+        self.defined_storage.dotted_path = self.document_storage_dotted_path
         self.defined_storage.kwargs = self.document_storage_kwargs
 
 
@@ -1,22 +1,42 @@
 from pathlib import Path
+import threading
+
+import zstandard
 
 from django.core.files.base import ContentFile
-from django.utils.encoding import force_bytes
+from django.utils.encoding import force_bytes, force_text
 
 from mayan.apps.mimetype.api import get_mimetype
 from mayan.apps.storage.utils import fs_cleanup, mkdtemp
 from mayan.apps.testing.tests.base import BaseTestCase
 
-from ..backends.compressedstorage import ZipCompressedPassthroughStorage
+from ..backends.cachedstorage import LocalCachePassthroughStorage
+from ..backends.compressedstorage import (
+    ZipCompressedPassthroughStorage, ZstandardCompressedPassthroughStorage
+)
 from ..backends.encryptedstorage import EncryptedPassthroughStorage
+from ..backends.literals import ENCRYPTION_FORMAT_MAGIC
+from ..exceptions import CompressionFileError, EncryptedFileError
 
-from .literals import TEST_CONTENT, TEST_FILE_NAME
+from .literals import (
+    TEST_CONTENT, TEST_FILE_NAME, TEST_ZSTANDARD_FRAME_MAGIC
+)
+from .mixins import EncryptedStorageTestMixin
 
 
-class EncryptedPassthroughStorageTestCase(BaseTestCase):
+class EncryptedPassthroughStorageTestCase(
+    EncryptedStorageTestMixin, BaseTestCase
+):
     def setUp(self):
         super().setUp()
         self.temporary_directory = mkdtemp()
+        self.test_storage = EncryptedPassthroughStorage(
+            password='testpassword',
+            next_storage_backend_arguments={
+                'location': self.temporary_directory,
+            }
+        )
+        self.test_content = bytes(range(256)) * 1024
 
     def tearDown(self):
         fs_cleanup(filename=self.temporary_directory)
@@ -53,6 +73,233 @@ class EncryptedPassthroughStorageTestCase(BaseTestCase):
         with storage.open(name=TEST_FILE_NAME, mode='r') as file_object:
             self.assertEqual(file_object.read(999), TEST_CONTENT)
 
+    def test_file_empty(self):
+        self.test_storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content=b'')
+        )
+
+        with self.test_storage.open(name=TEST_FILE_NAME, mode='rb') as file_object:
+            self.assertEqual(file_object.read(), b'')
+
+    def test_file_seek(self):
+        self.test_storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content=self.test_content)
+        )
+
+        with self.test_storage.open(name=TEST_FILE_NAME, mode='rb') as file_object:
+            file_object.seek(200000)
+            self.assertEqual(file_object.tell(), 200000)
+            self.assertEqual(
+                file_object.read(16), self.test_content[200000:200016]
+            )
+
+            file_object.seek(-16, 2)
+            self.assertEqual(file_object.read(), self.test_content[-16:])
+
+            file_object.seek(100)
+            self.assertEqual(file_object.read(16), self.test_content[100:116])
+
+            file_object.seek(0)
+            self.assertEqual(file_object.read(), self.test_content)
+
+    def test_file_tampered(self):
+        test_file_name = self.test_storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content=self.test_content)
+        )
+
+        path_file = Path(self.temporary_directory) / test_file_name
+
+        with path_file.open(mode='rb+') as file_object:
+            file_object.seek(100000)
+            data = file_object.read(1)
+            file_object.seek(100000)
+            file_object.write(bytes((data[0] ^ 1,)))
+
+        with self.test_storage.open(name=TEST_FILE_NAME, mode='rb') as file_object:
+            self.assertEqual(file_object.read(16), self.test_content[:16])
+
+            with self.assertRaises(expected_exception=EncryptedFileError):
+                file_object.read()
+
+    def test_file_truncated(self):
+        test_file_name = self.test_storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content=self.test_content)
+        )
+
+        path_file = Path(self.temporary_directory) / test_file_name
+
+        # Remove the last segment.
+        with path_file.open(mode='rb+') as file_object:
+            file_object.truncate(path_file.stat().st_size - 1000)
+
+        with self.test_storage.open(name=TEST_FILE_NAME, mode='rb') as file_object:
+            with self.assertRaises(expected_exception=EncryptedFileError):
+                file_object.read()
+
+    def test_file_legacy_format(self):
+        self._create_legacy_encrypted_file(
+            content=self.test_content, key=self.test_storage.key,
+            path=Path(self.temporary_directory) / TEST_FILE_NAME
+        )
+
+        with self.test_storage.open(name=TEST_FILE_NAME, mode='rb') as file_object:
+            self.assertEqual(file_object.read(), self.test_content)
+
+            file_object.seek(100000)
+            self.assertEqual(
+                file_object.read(16), self.test_content[100000:100016]
+            )
+
+    def test_file_legacy_format_resave(self):
+        self._create_legacy_encrypted_file(
+            content=self.test_content, key=self.test_storage.key,
+            path=Path(self.temporary_directory) / TEST_FILE_NAME
+        )
+
+        content = self.test_storage.open(name=TEST_FILE_NAME, mode='rb')
+        self.test_storage.delete(name=TEST_FILE_NAME)
+        self.test_storage.save(name=TEST_FILE_NAME, content=content)
+        content.close()
+
+        path_file = Path(self.temporary_directory) / TEST_FILE_NAME
+
+        with path_file.open(mode='rb') as file_object:
+            self.assertEqual(
+                file_object.read(len(ENCRYPTION_FORMAT_MAGIC)),
+                ENCRYPTION_FORMAT_MAGIC
+            )
+
+        with self.test_storage.open(name=TEST_FILE_NAME, mode='rb') as file_object:
+            self.assertEqual(file_object.read(), self.test_content)
+
+
+class LocalCachePassthroughStorageTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.temporary_directory = mkdtemp()
+        self.temporary_cache_directory = mkdtemp()
+        self.test_storage = self._create_test_storage()
+
+    def tearDown(self):
+        fs_cleanup(filename=self.temporary_cache_directory)
+        fs_cleanup(filename=self.temporary_directory)
+        super().tearDown()
+
+    def _create_test_storage(self, **kwargs):
+        kwargs.setdefault('cache_location', self.temporary_cache_directory)
+
+        return LocalCachePassthroughStorage(
+            next_storage_backend='mayan.apps.storage.tests.backends.LatencyFileSystemStorage',
+            next_storage_backend_arguments={
+                'latency': 0.05, 'location': self.temporary_directory
+            }, **kwargs
+        )
+
+    def _get_test_cached_files(self):
+        return [
+            path for path in Path(self.temporary_cache_directory).glob('*/*')
+            if path.suffix == ''
+        ]
+
+    def _read_test_file(self, name=TEST_FILE_NAME):
+        with self.test_storage.open(name=name, mode='rb') as file_object:
+            return file_object.read()
+
+    def test_file_open_cached(self):
+        self.test_storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content=TEST_CONTENT)
+        )
+
+        self.assertEqual(self._read_test_file(), force_bytes(s=TEST_CONTENT))
+        self.assertEqual(self._read_test_file(), force_bytes(s=TEST_CONTENT))
+        self.assertEqual(self.test_storage.next_storage_backend.open_count, 1)
+
+        with self.test_storage.open(name=TEST_FILE_NAME, mode='r') as file_object:
+            self.assertEqual(file_object.read(), TEST_CONTENT)
+
+    def test_file_open_concurrent(self):
+        self.test_storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content=TEST_CONTENT)
+        )
+
+        results = []
+
+        def read():
+            results.append(self._read_test_file())
+
+        threads = [threading.Thread(target=read) for count in range(5)]
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [force_bytes(s=TEST_CONTENT)] * 5)
+        self.assertEqual(self.test_storage.next_storage_backend.open_count, 1)
+
+    def test_file_delete_invalidation(self):
+        self.test_storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content=TEST_CONTENT)
+        )
+        self._read_test_file()
+
+        self.test_storage.delete(name=TEST_FILE_NAME)
+        self.assertEqual(self._get_test_cached_files(), [])
+
+        self.test_storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content='new content')
+        )
+        self.assertEqual(self._read_test_file(), b'new content')
+
+    def test_file_size_validation(self):
+        self.test_storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content=TEST_CONTENT)
+        )
+        self._read_test_file()
+
+        # Modify the file bypassing the cache.
+        with self.test_storage.next_storage_backend.open(name=TEST_FILE_NAME, mode='wb') as file_object:
+            file_object.write(b'modified content')
+
+        self.assertEqual(self._read_test_file(), b'modified content')
+        self.assertEqual(self.test_storage.next_storage_backend.open_count, 3)
+
+    def test_file_checksum_verification(self):
+        self.test_storage = self._create_test_storage(
+            cache_verify_checksum=True
+        )
+        self.test_storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content=TEST_CONTENT)
+        )
+        self._read_test_file()
+
+        path_cached_file = self._get_test_cached_files()[0]
+        path_cached_file.write_bytes(data=b'x' * len(TEST_CONTENT))
+
+        self.assertEqual(self._read_test_file(), force_bytes(s=TEST_CONTENT))
+        self.assertEqual(self.test_storage.next_storage_backend.open_count, 2)
+
+    def test_eviction(self):
+        self.test_storage = self._create_test_storage(
+            cache_maximum_size=2500
+        )
+
+        for index in range(4):
+            name = '{}_{}'.format(TEST_FILE_NAME, index)
+            self.test_storage.save(
+                name=name, content=ContentFile(content=b'x' * 1000)
+            )
+            self._read_test_file(name=name)
+
+        self.assertEqual(len(self._get_test_cached_files()), 2)
+
+        # The most recently used files are kept.
+        self.test_storage.next_storage_backend.open_count = 0
+        self._read_test_file(name='{}_3'.format(TEST_FILE_NAME))
+        self.assertEqual(self.test_storage.next_storage_backend.open_count, 0)
+        self._read_test_file(name='{}_0'.format(TEST_FILE_NAME))
+        self.assertEqual(self.test_storage.next_storage_backend.open_count, 1)
+
 
 class ZipCompressedPassthroughStorageTestCase(BaseTestCase):
     def setUp(self):
@@ -90,6 +337,164 @@ class ZipCompressedPassthroughStorageTestCase(BaseTestCase):
         with storage.open(name=TEST_FILE_NAME, mode='r') as file_object:
             self.assertEqual(file_object.read(), TEST_CONTENT)
 
+    def test_file_seek(self):
+        storage = ZipCompressedPassthroughStorage(
+            next_storage_backend_arguments={
+                'location': self.temporary_directory
+            }
+        )
+
+        test_content = bytes(range(256)) * 1024
+
+        storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content=test_content)
+        )
+
+        with storage.open(name=TEST_FILE_NAME, mode='rb') as file_object:
+            file_object.seek(200000)
+            self.assertEqual(file_object.tell(), 200000)
+            self.assertEqual(
+                file_object.read(16), test_content[200000:200016]
+            )
+
+            file_object.seek(100)
+            self.assertEqual(file_object.read(16), test_content[100:116])
+
+            file_object.seek(0)
+            self.assertEqual(file_object.read(), test_content)
+
+    def test_file_write_overwrite(self):
+        storage = ZipCompressedPassthroughStorage(
+            next_storage_backend_arguments={
+                'location': self.temporary_directory
+            }
+        )
+
+        storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(
+                content=bytes(range(256)) * 1024
+            )
+        )
+
+        with storage.open(name=TEST_FILE_NAME, mode='wb') as file_object:
+            file_object.write(force_bytes(s=TEST_CONTENT))
+
+        with storage.open(name=TEST_FILE_NAME, mode='r') as file_object:
+            self.assertEqual(file_object.read(), TEST_CONTENT)
+
+
+class ZstandardCompressedPassthroughStorageTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.temporary_directory = mkdtemp()
+        self.test_content = bytes(range(256)) * 1024
+
+    def tearDown(self):
+        fs_cleanup(filename=self.temporary_directory)
+        super().tearDown()
+
+    def _create_test_storage(self, **kwargs):
+        return ZstandardCompressedPassthroughStorage(
+            next_storage_backend_arguments={
+                'location': self.temporary_directory
+            }, **kwargs
+        )
+
+    def test_file_save_and_load(self):
+        storage = self._create_test_storage()
+
+        test_file_name = storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content=TEST_CONTENT)
+        )
+
+        path_file = Path(self.temporary_directory) / test_file_name
+
+        with path_file.open(mode='rb') as file_object:
+            self.assertEqual(
+                file_object.read(len(TEST_ZSTANDARD_FRAME_MAGIC)),
+                TEST_ZSTANDARD_FRAME_MAGIC
+            )
+
+        with storage.open(name=TEST_FILE_NAME, mode='r') as file_object:
+            self.assertEqual(file_object.read(), TEST_CONTENT)
+
+    def test_file_empty(self):
+        storage = self._create_test_storage()
+
+        storage.save(name=TEST_FILE_NAME, content=ContentFile(content=b''))
+
+        with storage.open(name=TEST_FILE_NAME, mode='rb') as file_object:
+            self.assertEqual(file_object.read(), b'')
+
+    def test_file_seek(self):
+        storage = self._create_test_storage(frame_size=10000, level=10)
+
+        storage.save(
+            name=TEST_FILE_NAME, content=ContentFile(content=self.test_content)
+        )
+
+        with storage.open(name=TEST_FILE_NAME, mode='rb') as file_object:
+            file_object.seek(200000)
+            self.assertEqual(file_object.tell(), 200000)
+            self.assertEqual(
+                file_object.read(16), self.test_content[200000:200016]
+            )
+
+            file_object.seek(-16, 2)
+            self.assertEqual(file_object.read(), self.test_content[-16:])
+
+            file_object.seek(9990)
+            self.assertEqual(
+                file_object.read(20), self.test_content[9990:10010]
+            )
+
+            file_object.seek(0)
+            self.assertEqual(file_object.read(), self.test_content)
+
+    def test_file_dictionary(self):
+        test_samples = [
+            force_bytes(
+                s='{{"id": {0}, "label": "document {0}", "type": "invoice"}}'.format(
+                    index
+                ) * 3
+            ) for index in range(200)
+        ]
+        path_dictionary = Path(self.temporary_directory) / 'dictionary'
+        path_dictionary.write_bytes(
+            data=zstandard.train_dictionary(
+                dict_size=1024, samples=test_samples
+            ).as_bytes()
+        )
+
+        storage = self._create_test_storage()
+        storage_dictionary = self._create_test_storage(
+            dictionary_path=force_text(s=path_dictionary)
+        )
+
+        storage.save(
+            name='plain', content=ContentFile(content=test_samples[0])
+        )
+        storage_dictionary.save(
+            name='dictionary', content=ContentFile(content=test_samples[0])
+        )
+
+        self.assertLess(
+            storage_dictionary.size(name='dictionary'),
+            storage.size(name='plain')
+        )
+
+        with storage_dictionary.open(name='dictionary', mode='rb') as file_object:
+            self.assertEqual(file_object.read(), test_samples[0])
+
+    def test_file_invalid_format(self):
+        storage = self._create_test_storage()
+
+        with (Path(self.temporary_directory) / TEST_FILE_NAME).open(mode='wb') as file_object:
+            file_object.write(force_bytes(s=TEST_CONTENT))
+
+        with self.assertRaises(expected_exception=CompressionFileError):
+            storage.open(name=TEST_FILE_NAME, mode='rb')
+
 
 class CombinationPassthroughStorageTestCase(BaseTestCase):
     def setUp(self):
@@ -0,0 +1,78 @@
+import io
+
+from mayan.apps.testing.tests.base import BaseTestCase
+
+from ..classes import BufferedFile
+
+
+class BufferedFileTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test_content = bytes(range(256)) * 1024
+
+    def _create_test_buffered_file(self, content=None, mode='rb'):
+        return BufferedFile(
+            file_object=io.BytesIO(
+                initial_bytes=content or self.test_content
+            ), maximum_memory_size=100000, mode=mode
+        )
+
+    def test_read_in_memory(self):
+        with self._create_test_buffered_file() as file_object:
+            self.assertEqual(file_object.read(16), self.test_content[:16])
+
+            self.assertEqual(
+                file_object.get_statistics(), {
+                    'buffered_size': 65536, 'maximum_memory_size': 100000,
+                    'memory_size': 65536, 'spilled': False,
+                    'spilled_size': 0
+                }
+            )
+
+    def test_read_spilled(self):
+        with self._create_test_buffered_file() as file_object:
+            self.assertEqual(file_object.read(), self.test_content)
+
+            self.assertEqual(
+                file_object.get_statistics(), {
+                    'buffered_size': len(self.test_content),
+                    'maximum_memory_size': 100000, 'memory_size': 0,
+                    'spilled': True, 'spilled_size': len(self.test_content)
+                }
+            )
+
+    def test_seek_spilled(self):
+        with self._create_test_buffered_file() as file_object:
+            file_object.seek(200000)
+            self.assertEqual(file_object.tell(), 200000)
+            self.assertTrue(file_object.get_statistics()['spilled'])
+            self.assertEqual(
+                file_object.read(16), self.test_content[200000:200016]
+            )
+
+            file_object.seek(-16, io.SEEK_END)
+            self.assertEqual(file_object.read(), self.test_content[-16:])
+
+            file_object.seek(100)
+            self.assertEqual(file_object.read(16), self.test_content[100:116])
+
+            file_object.seek(16, io.SEEK_CUR)
+            self.assertEqual(file_object.read(16), self.test_content[132:148])
+
+            file_object.seek(0)
+            self.assertEqual(file_object.read(), self.test_content)
+
+    def test_read_text(self):
+        test_content = 'テスト' * 100000
+
+        with self._create_test_buffered_file(content=test_content.encode('utf-8'), mode='r') as file_object:
+            result = []
+            while True:
+                # Odd read size to split the multi byte characters.
+                data = file_object.read(1001)
+                if data:
+                    result.append(data)
+                else:
+                    break
+
+            self.assertEqual(''.join(result), test_content)
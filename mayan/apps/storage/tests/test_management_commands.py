@@ -1,25 +1,34 @@
+from io import StringIO
+
 from django.core import management
-from django.utils.encoding import force_text
+from django.core.management.base import CommandError
 
 from mayan.apps.documents.tests.base import GenericDocumentTestCase
 from mayan.apps.documents.storages import storage_document_files
 from mayan.apps.mimetype.api import get_mimetype
 
-from .mixins import StorageProcessorTestMixin
+from ..backends.literals import ENCRYPTION_FORMAT_MAGIC
+
+from .literals import TEST_ZSTANDARD_FRAME_MAGIC
+from .mixins import EncryptedStorageTestMixin, StorageProcessorTestMixin
 
 
 class StorageProcessManagementCommandTestCase(
-    StorageProcessorTestMixin, GenericDocumentTestCase
+    EncryptedStorageTestMixin, StorageProcessorTestMixin,
+    GenericDocumentTestCase
 ):
-    def _call_command(self, reverse=None):
+    def _call_command(self, name=None, reprocess=None, reverse=None):
         options = {
             'app_label': 'documents',
             'defined_storage_name': storage_document_files.name,
-            'log_file': force_text(s=self.path_test_file),
             'model_name': 'DocumentFile',
-            'reverse': reverse
+            'name': name,
+            'reprocess': reprocess,
+            'reverse': reverse,
+            'stdout': StringIO()
         }
         management.call_command(command_name='storage_process', **options)
+        return options['stdout'].getvalue()
 
     def _upload_and_call(self):
         self.defined_storage.dotted_path = 'django.core.files.storage.FileSystemStorage'
@@ -53,6 +62,53 @@ class StorageProcessManagementCommandTestCase(
             self.test_document.file_latest.checksum_update(save=False)
         )
 
+    def test_storage_processor_command_log_file_missing(self):
+        self.defined_storage.dotted_path = 'mayan.apps.storage.backends.compressedstorage.ZipCompressedPassthroughStorage'
+        self.defined_storage.kwargs = {
+            'next_storage_backend': 'django.core.files.storage.FileSystemStorage',
+            'next_storage_backend_arguments': {
+                'location': self.document_storage_kwargs['location']
+            }
+        }
+
+        with self.assertRaises(CommandError):
+            management.call_command(
+                app_label='documents', command_name='storage_process',
+                defined_storage_name=storage_document_files.name,
+                log_file='/nonexistent/test_log', model_name='DocumentFile',
+                stdout=StringIO()
+            )
+
+    def test_storage_processor_command_forwards_zstandard(self):
+        self.defined_storage.dotted_path = 'django.core.files.storage.FileSystemStorage'
+        self.defined_storage.kwargs = {
+            'location': self.document_storage_kwargs['location']
+        }
+
+        self._upload_test_document()
+
+        self.defined_storage.dotted_path = 'mayan.apps.storage.backends.compressedstorage.ZstandardCompressedPassthroughStorage'
+        self.defined_storage.kwargs = {
+            'next_storage_backend': 'django.core.files.storage.FileSystemStorage',
+            'next_storage_backend_arguments': {
+                'location': self.document_storage_kwargs['location']
+            }
+        }
+
+        self._call_command()
+
+        for document in self.test_documents:
+            with open(file=document.file_latest.file.path, mode='rb') as file_object:
+                self.assertEqual(
+                    file_object.read(len(TEST_ZSTANDARD_FRAME_MAGIC)),
+                    TEST_ZSTANDARD_FRAME_MAGIC
+                )
+
+            self.assertEqual(
+                document.file_latest.checksum,
+                document.file_latest.checksum_update(save=False)
+            )
+
     def test_processor_forwards_and_reverse(self):
         self._upload_and_call()
 
@@ -73,3 +129,45 @@ class StorageProcessManagementCommandTestCase(
             self.test_document.file_latest.checksum,
             self.test_document.file_latest.checksum_update(save=False)
         )
+
+    def test_processor_reprocess_legacy_encrypted(self):
+        self.defined_storage.dotted_path = 'django.core.files.storage.FileSystemStorage'
+        self.defined_storage.kwargs = {
+            'location': self.document_storage_kwargs['location']
+        }
+
+        self._upload_test_document()
+
+        self.defined_storage.dotted_path = 'mayan.apps.storage.backends.encryptedstorage.EncryptedPassthroughStorage'
+        self.defined_storage.kwargs = {
+            'next_storage_backend': 'django.core.files.storage.FileSystemStorage',
+            'next_storage_backend_arguments': {
+                'location': self.document_storage_kwargs['location']
+            },
+            'password': 'testpassword'
+        }
+
+        key = self.defined_storage.get_storage_instance().key
+
+        for document in self.test_documents:
+            path_file = document.file_latest.file.path
+            with open(file=path_file, mode='rb') as file_object:
+                content = file_object.read()
+
+            self._create_legacy_encrypted_file(
+                content=content, key=key, path=path_file
+            )
+
+        self._call_command(name='reprocess', reprocess=True)
+
+        for document in self.test_documents:
+            with open(file=document.file_latest.file.path, mode='rb') as file_object:
+                self.assertEqual(
+                    file_object.read(len(ENCRYPTION_FORMAT_MAGIC)),
+                    ENCRYPTION_FORMAT_MAGIC
+                )
+
+            self.assertEqual(
+                document.file_latest.checksum,
+                document.file_latest.checksum_update(save=False)
+            )
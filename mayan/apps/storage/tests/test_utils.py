@@ -1,18 +1,109 @@
+import dbm
+import os
 from pathlib import Path
 import shutil
+import time
 
-from django.utils.encoding import force_text
+from django.contrib.contenttypes.models import ContentType
+from django.core.files import File
 
 from mayan.apps.documents.storages import storage_document_files
 from mayan.apps.documents.tests.base import GenericDocumentTestCase
 from mayan.apps.mimetype.api import get_mimetype
 from mayan.apps.testing.tests.base import BaseTestCase
 
-from ..utils import PassthroughStorageProcessor, mkdtemp, patch_files
+from ..models import SharedUploadedFile, StorageProcessEntry
+from ..utils import (
+    PassthroughStorageProcessor, RateLimiter, mkdtemp, patch_files
+)
 
 from .mixins import StorageProcessorTestMixin
 
 
+class FieldFileLinkTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.temporary_directory = mkdtemp()
+        self.path_test_file = Path(self.temporary_directory, 'test_file.txt')
+        self.path_test_file.write_bytes(data=b'test content')
+        self.test_shared_uploaded_files = []
+
+    def tearDown(self):
+        for test_shared_uploaded_file in self.test_shared_uploaded_files:
+            test_shared_uploaded_file.delete()
+
+        shutil.rmtree(path=self.temporary_directory)
+        super().tearDown()
+
+    def _create_test_shared_uploaded_file(self, allow_link=True, read=False):
+        with self.path_test_file.open(mode='rb') as file_object:
+            if allow_link:
+                file_object._storage_link = True
+
+            if read:
+                file_object.read(1)
+
+            self.test_shared_uploaded_file = SharedUploadedFile.objects.create(
+                file=File(file=file_object)
+            )
+            self.test_shared_uploaded_files.append(
+                self.test_shared_uploaded_file
+            )
+
+    def _get_test_shared_uploaded_file_stat(self):
+        return os.stat(
+            self.test_shared_uploaded_file.file.storage.path(
+                name=self.test_shared_uploaded_file.file.name
+            )
+        )
+
+    def _skip_different_filesystem(self):
+        self._create_test_shared_uploaded_file(allow_link=False)
+
+        if self._get_test_shared_uploaded_file_stat().st_dev != self.path_test_file.stat().st_dev:
+            self.skipTest(
+                reason='Storage and temporary directory are in different '
+                'filesystems.'
+            )
+
+    def test_field_file_link(self):
+        self._skip_different_filesystem()
+        self._create_test_shared_uploaded_file()
+
+        self.assertTrue(
+            os.path.samestat(
+                self._get_test_shared_uploaded_file_stat(),
+                self.path_test_file.stat()
+            )
+        )
+        with self.test_shared_uploaded_file.open() as file_object:
+            self.assertEqual(file_object.read(), b'test content')
+
+    def test_field_file_link_not_allowed(self):
+        self._skip_different_filesystem()
+        self._create_test_shared_uploaded_file(allow_link=False)
+
+        self.assertFalse(
+            os.path.samestat(
+                self._get_test_shared_uploaded_file_stat(),
+                self.path_test_file.stat()
+            )
+        )
+        with self.test_shared_uploaded_file.open() as file_object:
+            self.assertEqual(file_object.read(), b'test content')
+
+    def test_field_file_link_read_file(self):
+        self._skip_different_filesystem()
+        self._create_test_shared_uploaded_file(read=True)
+
+        self.assertFalse(
+            os.path.samestat(
+                self._get_test_shared_uploaded_file_stat(),
+                self.path_test_file.stat()
+            )
+        )
+
+
 class PatchFilesTestCase(BaseTestCase):
     test_replace_text = 'replaced_text'
 
@@ -88,14 +179,15 @@ class StorageProcessorTestCase(
 ):
     auto_upload_test_document = False
 
-    def _execute_storage_procesor(self, reverse=None):
+    def _execute_storage_procesor(
+        self, log_file=None, reverse=None, workers=1
+    ):
         storage_processor = PassthroughStorageProcessor(
             app_label='documents',
             defined_storage_name=storage_document_files.name,
-            log_file=force_text(s=self.path_test_file),
-            model_name='DocumentFile'
+            log_file=log_file, model_name='DocumentFile', workers=workers
         )
-        storage_processor.execute(reverse=reverse)
+        return storage_processor.execute(reverse=reverse)
 
     def _upload_and_process(self):
         self.defined_storage.dotted_path = 'django.core.files.storage.FileSystemStorage'
@@ -113,7 +205,7 @@ class StorageProcessorTestCase(
             }
         }
 
-        self._execute_storage_procesor()
+        return self._execute_storage_procesor()
 
     def test_processor_forwards(self):
         self._upload_and_process()
@@ -149,3 +241,119 @@ class StorageProcessorTestCase(
             self.test_document.file_latest.checksum,
             self.test_document.file_latest.checksum_update(save=False)
         )
+
+    def test_processor_forwards_log_file(self):
+        self.defined_storage.dotted_path = 'django.core.files.storage.FileSystemStorage'
+        self.defined_storage.kwargs = {
+            'location': self.document_storage_kwargs['location']
+        }
+
+        self._upload_test_document()
+
+        temporary_directory = mkdtemp()
+        log_file = os.path.join(temporary_directory, 'test_log')
+        with dbm.open(log_file, 'c') as database:
+            database['{}.{}'.format(
+                ContentType.objects.get_for_model(
+                    model=self.test_document.file_latest
+                ).name, self.test_document.file_latest.pk
+            )] = '1'
+
+        self.defined_storage.dotted_path = 'mayan.apps.storage.backends.compressedstorage.ZipCompressedPassthroughStorage'
+        self.defined_storage.kwargs = {
+            'next_storage_backend': 'django.core.files.storage.FileSystemStorage',
+            'next_storage_backend_arguments': {
+                'location': self.document_storage_kwargs['location']
+            }
+        }
+
+        try:
+            self.assertEqual(
+                self._execute_storage_procesor(log_file=log_file),
+                {'failed': 0, 'processed': 0}
+            )
+        finally:
+            shutil.rmtree(path=temporary_directory)
+
+        self.assertTrue(
+            StorageProcessEntry.objects.filter(
+                name=storage_document_files.name,
+                object_id=self.test_document.file_latest.pk
+            ).exists()
+        )
+
+    def test_processor_forwards_original_file_deleted(self):
+        self.defined_storage.dotted_path = 'django.core.files.storage.FileSystemStorage'
+        self.defined_storage.kwargs = {
+            'location': self.document_storage_kwargs['location']
+        }
+
+        self._upload_test_document()
+        path_original = self.test_document.file_latest.file.path
+
+        self._upload_and_process()
+
+        self.test_document.file_latest.refresh_from_db()
+        self.assertNotEqual(
+            self.test_document.file_latest.file.path, path_original
+        )
+        self.assertFalse(os.path.exists(path_original))
+
+    def test_processor_forwards_resume(self):
+        self.assertEqual(
+            self._upload_and_process(), {'failed': 0, 'processed': 1}
+        )
+        self.assertEqual(
+            StorageProcessEntry.objects.filter(
+                name=storage_document_files.name,
+                object_id=self.test_document.file_latest.pk
+            ).count(), 1
+        )
+
+        self.assertEqual(
+            self._execute_storage_procesor(), {'failed': 0, 'processed': 0}
+        )
+
+    def test_processor_forwards_workers(self):
+        self.defined_storage.dotted_path = 'django.core.files.storage.FileSystemStorage'
+        self.defined_storage.kwargs = {
+            'location': self.document_storage_kwargs['location']
+        }
+
+        for count in range(3):
+            self._upload_test_document()
+
+        self.defined_storage.dotted_path = 'mayan.apps.storage.backends.compressedstorage.ZipCompressedPassthroughStorage'
+        self.defined_storage.kwargs = {
+            'next_storage_backend': 'django.core.files.storage.FileSystemStorage',
+            'next_storage_backend_arguments': {
+                'location': self.document_storage_kwargs['location']
+            }
+        }
+
+        self.assertEqual(
+            self._execute_storage_procesor(workers=2),
+            {'failed': 0, 'processed': 3}
+        )
+
+        for document in self.test_documents:
+            self.assertEqual(
+                document.file_latest.checksum,
+                document.file_latest.checksum_update(save=False)
+            )
+
+        self.assertEqual(
+            self._execute_storage_procesor(reverse=True, workers=2),
+            {'failed': 0, 'processed': 3}
+        )
+        self.assertFalse(StorageProcessEntry.objects.exists())
+
+
+class RateLimiterTestCase(BaseTestCase):
+    def test_consume(self):
+        rate_limiter = RateLimiter(rate=1000)
+
+        start = time.monotonic()
+        rate_limiter.consume(amount=1000)
+        rate_limiter.consume(amount=500)
+        self.assertGreaterEqual(time.monotonic() - start, 0.45)
@@ -1,14 +1,26 @@
+from concurrent.futures import (
+    ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+)
 import dbm
+import hashlib
+import io
 import logging
 import os
 from pathlib import Path
 import shutil
 import tempfile
+import threading
+import time
 
 from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.encoding import force_bytes, force_text
 from django.utils.module_loading import import_string
 
-from .classes import DefinedStorage, PassthroughStorage
+from .classes import DefinedStorage, DefinedStorageLazy, PassthroughStorage
+from .exceptions import StorageProcessVerificationError
 from .settings import setting_temporary_directory
 
 logger = logging.getLogger(name=__name__)
@@ -19,67 +31,306 @@ def NamedTemporaryFile(*args, **kwargs):
     return tempfile.NamedTemporaryFile(*args, **kwargs)
 
 
+class ChecksumFile(File):
+    """
+    File wrapper that calculates the SHA256 checksum of the content read.
+    Optionally limits the read rate with a RateLimiter instance.
+    """
+    @staticmethod
+    def get_checksum(file_object):
+        hash_object = hashlib.sha256()
+
+        with file_object:
+            while True:
+                chunk = file_object.read(File.DEFAULT_CHUNK_SIZE)
+                if chunk:
+                    hash_object.update(force_bytes(s=chunk))
+                else:
+                    break
+
+        return hash_object.hexdigest()
+
+    def __init__(self, file, rate_limiter=None):
+        super().__init__(file=file)
+        self.hash_object = hashlib.sha256()
+        self.rate_limiter = rate_limiter
+
+    def get_hexdigest(self):
+        return self.hash_object.hexdigest()
+
+    def read(self, *args, **kwargs):
+        data = self.file.read(*args, **kwargs)
+        self.hash_object.update(force_bytes(s=data))
+
+        if self.rate_limiter:
+            self.rate_limiter.consume(amount=len(data))
+
+        return data
+
+    def seek(self, *args, **kwargs):
+        result = self.file.seek(*args, **kwargs)
+
+        # Storages rewind the content before saving it.
+        if self.file.tell() == 0:
+            self.hash_object = hashlib.sha256()
+
+        return result
+
+
 class PassthroughStorageProcessor:
+    """
+    Convert the stored files of a model to or from the format of a
+    passthrough storage. Each file is copied to a new name by a pool of
+    workers and verified by reading it back and comparing checksums. The
+    model instances are then switched to the new name and only then is the
+    original file deleted. Progress is kept in the database under the
+    process name; executing an interrupted process again resumes it.
+    The progress of the `.dbm` log files of the previous versions is
+    imported from `log_file`.
+    """
     def __init__(
-        self, app_label, defined_storage_name, log_file, model_name,
-        file_attribute='file'
+        self, app_label, defined_storage_name, model_name,
+        file_attribute='file', log_file=None, name=None, rate_limit=None,
+        workers=1
     ):
         self.app_label = app_label
         self.defined_storage_name = defined_storage_name
         self.file_attribute = file_attribute
         self.log_file = log_file
         self.model_name = model_name
+        self.name = name or defined_storage_name
+        self.rate_limit = rate_limit
+        self.workers = workers
+
+    def _collect(self, futures, return_when):
+        done, not_done = wait(fs=futures, return_when=return_when)
+
+        for future in done:
+            file_name = futures.pop(future)
 
-    def _update_entry(self, key):
-        if not self.reverse:
-            self.database[key] = '1'
-        else:
             try:
-                del self.database[key]
-            except KeyError:
-                pass
+                new_name = future.result()
+            except Exception as exception:
+                logger.error(
+                    'Error processing file "%s"; %s', file_name, exception,
+                    exc_info=True
+                )
+                self.statistics['failed'] += 1
+            else:
+                with transaction.atomic():
+                    queryset = self.model.objects.filter(
+                        **{self.file_attribute: file_name}
+                    )
+                    pks = list(queryset.values_list('pk', flat=True))
+                    queryset.update(**{self.file_attribute: new_name})
+                    self._update_entries(pks=pks)
+
+                try:
+                    self.storage_instance.delete(name=file_name)
+                except Exception as exception:
+                    logger.warning(
+                        'Unable to delete the original file "%s"; %s',
+                        file_name, exception
+                    )
 
-    def _inclusion_condition(self, key):
+                self.statistics['processed'] += 1
+
+    def _add_entries(self, pks):
+        StorageProcessEntry = apps.get_model(
+            app_label='storage', model_name='StorageProcessEntry'
+        )
+
+        StorageProcessEntry.objects.bulk_create(
+            ignore_conflicts=True, objs=[
+                StorageProcessEntry(
+                    content_type=self.content_type, name=self.name,
+                    object_id=pk
+                ) for pk in pks
+            ]
+        )
+
+    def _copy_file(self, file_name):
+        # Executed by the workers, must not access the database.
+        new_name = self.storage_instance.get_available_name(name=file_name)
+
+        with self.storage_instance.open(mode='rb', name=file_name, _direct=not (self.reprocess or self.reverse)) as file_object:
+            content = ChecksumFile(
+                file=file_object, rate_limiter=self.rate_limiter
+            )
+            new_name = self.storage_instance.save(
+                content=content, name=new_name, _direct=self.reverse
+            )
+
+        try:
+            checksum = ChecksumFile.get_checksum(
+                file_object=self.storage_instance.open(
+                    mode='rb', name=new_name, _direct=self.reverse
+                )
+            )
+
+            if checksum != content.get_hexdigest():
+                raise StorageProcessVerificationError(
+                    'Checksum of the processed file "{}" does not match '
+                    'the original file "{}".'.format(new_name, file_name)
+                )
+        except Exception:
+            self.storage_instance.delete(name=new_name)
+            raise
+
+        return new_name
+
+    def _import_log(self):
+        """
+        Add the instances recorded as processed by a log file, keyed by
+        content type name and primary key, to the entries of the process.
+        Raises `dbm.error` if the log file cannot be opened.
+        """
+        prefix = '{}.'.format(self.content_type.name)
+        pks = []
+
+        with dbm.open(self.log_file, 'r') as database:
+            for key in database.keys():
+                key = force_text(s=key)
+                if key.startswith(prefix):
+                    try:
+                        pks.append(int(key[len(prefix):]))
+                    except ValueError:
+                        """Not an entry of this model."""
+
+        self._add_entries(pks=pks)
+
+        logger.info(
+            'Imported %d entries from the log file "%s".', len(pks),
+            self.log_file
+        )
+
+    def _inclusion_condition(self, pk):
         if self.reverse:
-            return key in self.database
+            return pk in self.processed_pks
         else:
-            return key not in self.database
+            return pk not in self.processed_pks
+
+    def _update_entries(self, pks):
+        StorageProcessEntry = apps.get_model(
+            app_label='storage', model_name='StorageProcessEntry'
+        )
 
-    def execute(self, reverse=False):
+        if self.reverse:
+            StorageProcessEntry.objects.filter(
+                content_type=self.content_type, name=self.name,
+                object_id__in=pks
+            ).delete()
+        else:
+            self._add_entries(pks=pks)
+
+    def execute(self, reprocess=False, reverse=False):
+        """
+        Forward mode processes the stored files. Reverse mode restores
+        them to their unprocessed form. Reprocess mode reads and saves
+        processed files again to convert them to the current format of the
+        storage; use a process name different from the forward mode one.
+        Returns the number of files processed and failed.
+        """
+        self.reprocess = reprocess
         self.reverse = reverse
-        model = apps.get_model(
+        self.statistics = {'failed': 0, 'processed': 0}
+
+        self.model = apps.get_model(
             app_label=self.app_label, model_name=self.model_name
         )
 
-        storage_instance = DefinedStorage.get(
+        self.storage_instance = DefinedStorage.get(
             name=self.defined_storage_name
         ).get_storage_instance()
 
-        if isinstance(storage_instance, PassthroughStorage):
+        if isinstance(self.storage_instance, PassthroughStorage):
             ContentType = apps.get_model(
                 app_label='contenttypes', model_name='ContentType'
             )
-            content_type = ContentType.objects.get_for_model(model=model)
+            StorageProcessEntry = apps.get_model(
+                app_label='storage', model_name='StorageProcessEntry'
+            )
+
+            self.content_type = ContentType.objects.get_for_model(
+                model=self.model
+            )
 
-            self.database = dbm.open(file=self.log_file, flag='c')
+            if self.log_file:
+                self._import_log()
 
-            for instance in model.objects.all():
-                key = '{}.{}'.format(content_type.name, instance.pk)
-                if self._inclusion_condition(key=key):
-                    file_name = getattr(instance, self.file_attribute).name
+            self.processed_pks = set(
+                StorageProcessEntry.objects.filter(
+                    content_type=self.content_type, name=self.name
+                ).values_list('object_id', flat=True)
+            )
+
+            if self.rate_limit:
+                self.rate_limiter = RateLimiter(rate=self.rate_limit)
+            else:
+                self.rate_limiter = None
+
+            # Instances can share the same stored file. Process each file
+            # only once.
+            file_pks = {}
+            queryset = self.model.objects.order_by('pk').values_list(
+                'pk', self.file_attribute
+            )
+            for pk, file_name in queryset.iterator():
+                file_pks.setdefault(file_name, []).append(pk)
+
+            futures = {}
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for file_name, pks in file_pks.items():
+                    pending_pks = [
+                        pk for pk in pks if self._inclusion_condition(pk=pk)
+                    ]
+
+                    if len(pending_pks) == len(pks):
+                        future = executor.submit(
+                            self._copy_file, file_name=file_name
+                        )
+                        futures[future] = file_name
+
+                        if len(futures) >= self.workers * 2:
+                            self._collect(
+                                futures=futures,
+                                return_when=FIRST_COMPLETED
+                            )
+                    elif pending_pks:
+                        # The file was processed already for a sibling
+                        # instance.
+                        self._update_entries(pks=pending_pks)
+
+                self._collect(futures=futures, return_when=ALL_COMPLETED)
+
+        return self.statistics
 
-                    content = storage_instance.open(
-                        name=file_name, mode='rb',
-                        _direct=not self.reverse
-                    )
-                    storage_instance.delete(name=file_name)
-                    storage_instance.save(
-                        name=file_name, content=content,
-                        _direct=self.reverse
-                    )
-                    self._update_entry(key=key)
 
-            self.database.close
+class RateLimiter:
+    """
+    Token bucket limiting the amount of units consumed per second, shared
+    by multiple threads.
+    """
+    def __init__(self, rate):
+        self.available = rate
+        self.lock = threading.Lock()
+        self.rate = rate
+        self.timestamp = time.monotonic()
+
+    def consume(self, amount):
+        with self.lock:
+            timestamp = time.monotonic()
+            self.available = min(
+                self.rate, self.available + (
+                    timestamp - self.timestamp
+                ) * self.rate
+            )
+            self.timestamp = timestamp
+            self.available -= amount
+            delay = max(0, -self.available / self.rate)
+
+        if delay:
+            time.sleep(delay)
 
 
 def TemporaryFile(*args, **kwargs):
@@ -87,6 +338,55 @@ def TemporaryFile(*args, **kwargs):
     return tempfile.TemporaryFile(*args, **kwargs)
 
 
+def field_file_link(field_file):
+    """
+    Store an uncommitted FieldFile by hard linking its local file into the
+    storage instead of copying the content. Only done when the file object
+    allows it, is an unread local file and the storage is a filesystem
+    storage in the same filesystem. Storages that process the content, like
+    passthrough storages, always get a copy. The FieldFile is marked as
+    committed to skip the copy during the model save.
+    Returns True if the file was linked.
+    """
+    if field_file._committed:
+        return False
+
+    path = get_file_object_link_path(file_object=field_file.file)
+    if not path:
+        return False
+
+    storage = field_file.storage
+    if isinstance(storage, DefinedStorageLazy):
+        storage = DefinedStorage.get(name=storage.name).get_storage_instance()
+
+    if not isinstance(storage, FileSystemStorage):
+        return False
+
+    name = storage.get_available_name(
+        name=field_file.field.generate_filename(
+            instance=field_file.instance, filename=field_file.name
+        ), max_length=field_file.field.max_length
+    )
+    full_path = storage.path(name=name)
+
+    try:
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        os.link(path, full_path)
+    except OSError as exception:
+        # Different filesystems, filesystems without hard link support or
+        # a name collision. Fallback to the normal copy.
+        logger.debug(
+            'Unable to link file "%s" as "%s"; %s', path, full_path,
+            exception
+        )
+        return False
+
+    logger.debug('Linked file "%s" as "%s"', path, full_path)
+    field_file.name = name
+    field_file._committed = True
+    return True
+
+
 def fs_cleanup(filename, suppress_exceptions=True):
     """
     Tries to remove the given filename. Ignores non-existent files.
@@ -103,6 +403,45 @@ def fs_cleanup(filename, suppress_exceptions=True):
                 raise
 
 
+def get_file_object_link_path(file_object):
+    """
+    Return the path of the local file providing the content of a file
+    object when the file can be linked instead of copied. The file object,
+    or one of the File instances wrapping it, must have the attribute
+    `_storage_link` set to True to signal that the file will not be modified
+    after being stored. Only plain, unread, local files qualify. File like
+    objects that transform the content, like archive members, never do.
+    """
+    allow_link = False
+
+    while True:
+        allow_link = allow_link or getattr(file_object, '_storage_link', False)
+        if isinstance(file_object, File):
+            file_object = file_object.file
+        else:
+            break
+
+    if not allow_link:
+        return None
+
+    # Exact types only, subclasses like tarfile.ExFileObject return
+    # transformed content.
+    if type(file_object) not in (io.BufferedRandom, io.BufferedReader, io.FileIO):
+        return None
+
+    try:
+        if file_object.tell() != 0:
+            return None
+
+        path = os.fsdecode(file_object.name)
+        if not os.path.samestat(os.fstat(file_object.fileno()), os.stat(path)):
+            return None
+    except (OSError, TypeError, ValueError):
+        return None
+
+    return path
+
+
 def get_storage_subclass(dotted_path):
     """
     Import a storage class and return a subclass that will always return eq
@@ -105,6 +105,7 @@ requests==2.25.1
 sh==1.14.1
 swagger-spec-validator==2.5.0
 whitenoise==5.0.1
+zstandard==0.15.2
 """.split()
 
 with open(file='README.rst') as file_object: